@@ -4,12 +4,15 @@
 #    "flask",
 #    "flask-cors",
 #    "werkzeug",
-#    "httpx",
+#    "httpx[http2]",
 #    "google-generativeai",
 #    "asyncio",
 #    "typing",
 #    "beautifulsoup4",
+#    "lxml",
 #    "pandas",
+#    "pyarrow",
+#    "duckdb",
 #    "playwright",
 #    "PyMuPDF",
 # ]
@@ -17,46 +20,79 @@
 
 import os
 import re
+import asyncio
 from flask import Flask, request, jsonify # type: ignore
 from flask_cors import CORS # type: ignore
 from werkzeug.utils import secure_filename # type: ignore
 
 from llm_conversation import run_conversation  # New orchestration logic
 from utils.formulate_response import prepare_response  # Utility to format final response
+from utils.workspace import create_workspace  # Per-request uploads/outputs directories
+from utils.content_store import get_artifact_cache, save_upload
+from utils.event_loop import get_event_loop
+from tools.browser_pool import get_browser_pool, warm_browser_pool
+from tools.interpreter_pool import get_interpreter_pool
+from tools.code_kernel import get_kernel_manager
+from tools.execute_code import execution_stats
+from tools.html_cache import parsed_html_cache
+from tools.scrape_cache import get_scrape_cache
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-UPLOAD_FOLDER = "/tmp/uploads"
-OUTPUT_FOLDER = "/tmp/outputs"
+# Launch Chromium in the background so the first scrape doesn't pay for it
+if os.environ.get("PREWARM_BROWSER", "1") == "1":
+    asyncio.run_coroutine_threadsafe(warm_browser_pool(), get_event_loop())
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+# Start the warm execute_code interpreters (they import pandas & co. in the background)
+get_interpreter_pool().fill()
 
 
 @app.route("/")
 def health():
     return "OK", 200
 
+@app.route("/stats")
+def stats():
+    try:
+        # utils.embed needs openai, which only the course-content retriever uses
+        from utils.embed import embedding_cache
+        embedding_stats = embedding_cache.stats()
+    except ImportError:
+        embedding_stats = None
+    return jsonify({
+        "browser_pool": get_browser_pool(get_event_loop()).stats(),
+        "interpreter_pool": get_interpreter_pool().stats(),
+        "code_sessions": get_kernel_manager().stats(),
+        "code_execution": execution_stats,
+        "parsed_html_cache": parsed_html_cache.stats(),
+        "scrape_cache": get_scrape_cache().stats(),
+        "embedding_cache": embedding_stats,
+        "artifact_cache": get_artifact_cache().stats(),
+    }), 200
+
 @app.route("/api/", methods=["POST"])
 def handle_query():
     if not request.files:
         return jsonify({"error": "No files uploaded"}), 400
 
-    for field_name, file in request.files.items():
-        # Use the actual file name, not the form field name
-        safe_name = secure_filename(file.filename)
-        file_path = os.path.join(UPLOAD_FOLDER, safe_name)
-        file.save(file_path)
+    # Each request gets its own workspace so concurrent queries never share files
+    with create_workspace() as workspace:
+        for field_name, file in request.files.items():
+            # Use the actual file name, not the form field name
+            safe_name = secure_filename(file.filename)
+            file_path = os.path.join(workspace.uploads, safe_name)
+            # Hashed while streaming to disk, so tools can reuse artifacts cached for the same content
+            save_upload(file.stream, file_path)
 
-    # Run the planner-worker interaction loop
-    try:
-        final_answer = run_conversation()
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        # Run the planner-worker interaction loop
+        try:
+            final_answer = run_conversation(workspace)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
 
-    if final_answer:
-        response_json = prepare_response(final_answer)
+        # Files must be encoded before the workspace is cleaned up
+        response_json = prepare_response(final_answer, workspace)
 
     return response_json, 200
 
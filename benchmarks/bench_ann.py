@@ -0,0 +1,73 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "numpy",
+# ]
+# ///
+
+"""
+Recall@k and latency of the IVF / IVF-PQ index against exact search (get_top_k_chunks' path).
+
+Uses synthetic embeddings with the shape of real text embeddings (topic clusters in a
+low-dimensional latent space, projected up with a little noise) so it runs without
+course_embeddings.npz:
+    python -m benchmarks.bench_ann --size 200000 --dim 384 --pq 48
+"""
+
+import argparse
+import time
+import numpy as np
+
+from utils.ann_index import IVFIndex
+from utils.vector_search import normalize_rows, similarity_top_k
+
+
+def clustered_embeddings(rng, size: int, dim: int, n_topics: int, latent_dim: int = 32) -> np.ndarray:
+    topics = rng.standard_normal((n_topics, latent_dim))
+    latent = topics[rng.integers(0, n_topics, size)] + 0.5 * rng.standard_normal((size, latent_dim))
+    projection = rng.standard_normal((latent_dim, dim))
+    return latent @ projection + 0.5 * rng.standard_normal((size, dim))
+
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / expected.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--pq", type=int, default=0, help="PQ subvectors (0 = IVF with exact scoring)")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = clustered_embeddings(rng, args.size + args.queries, args.dim, n_topics=max(8, args.size // 500))
+    vectors, queries = normalize_rows(data[:args.size]), normalize_rows(data[args.size:])
+
+    started = time.perf_counter()
+    index = IVFIndex.build(vectors, n_lists=args.lists, pq_subvectors=args.pq)
+    print(f"built {index.n_lists} lists{' + PQ' + str(args.pq) if args.pq else ''} in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    expected = np.stack([similarity_top_k(vectors, q, args.k)[0][0] for q in queries])
+    exact_ms = (time.perf_counter() - started) / args.queries * 1e3
+    print(f"exact: {exact_ms:.2f} ms/query")
+
+    print(f"{'probes':>7} {'recall@' + str(args.k):>10} {'ms/query':>9} {'speedup':>8}")
+    for n_probe in args.probes:
+        # PQ is measured both on codes alone and with exact re-ranking
+        for rerank in ([False, True] if args.pq else [True]):
+            started = time.perf_counter()
+            found, _ = index.search(queries, args.k, n_probe=n_probe, vectors=vectors if rerank else None)
+            ms = (time.perf_counter() - started) / args.queries * 1e3
+            label = f"{n_probe}{'' if rerank or not args.pq else ' (pq)'}"
+            print(f"{label:>7} {recall_at_k(found, expected):>10.3f} {ms:>9.2f} {exact_ms / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
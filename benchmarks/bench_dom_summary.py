@@ -0,0 +1,80 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "beautifulsoup4",
+#    "lxml",
+# ]
+# ///
+
+"""
+Benchmark: summarising the DOM of a large saved page.
+
+Baseline is the old extract_dom_structure_with_identifiers: a full BeautifulSoup
+tree (html.parser) and one output line per element. Current is the streaming,
+deduplicating summariser reading the page from disk.
+
+    python -m benchmarks.bench_dom_summary --rows 20000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from bs4 import BeautifulSoup, Comment  # type: ignore
+
+from benchmarks.bench_parse_html import synthetic_page
+from tools.dom_structure import etree, extract_dom_structure_from_file
+
+
+def baseline_dom_structure(path: str, max_depth: int = 12) -> str:
+    with open(path, encoding="utf-8") as f:
+        soup = BeautifulSoup(f.read(), "html.parser")
+
+    def format_tag(tag):
+        parts = [tag.name]
+        if tag.get("id"):
+            parts.append(f"#{tag['id']}")
+        if tag.get("class"):
+            parts.append("." + ".".join(tag.get("class")))
+        return "".join(parts)
+
+    def traverse(node, depth=0):
+        if depth > max_depth:
+            return []
+        lines = []
+        for child in node.children:
+            if isinstance(child, Comment) or child.name in ["script", "style"]:
+                continue
+            if hasattr(child, "name") and child.name:
+                lines.append("  " * depth + format_tag(child))
+                lines.extend(traverse(child, depth + 1))
+        return lines
+
+    return "\n".join(traverse(soup))
+
+
+def measure(fn, path: str):
+    tracemalloc.start()
+    started = time.perf_counter()
+    output = fn(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, len(output), peak / 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "page.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_page(args.rows))
+        print(f"page: {os.path.getsize(path) / 1e6:.1f} MB, streaming parser: {'lxml' if etree is not None else 'html.parser'}")
+        print(f"{'':<30}{'time':>9}{'output':>14}{'peak memory':>14}")
+        for name, fn in [("baseline (soup, every element)", baseline_dom_structure), ("streaming summary", extract_dom_structure_from_file)]:
+            elapsed, chars, peak_mb = measure(fn, path)
+            print(f"{name:<30}{elapsed:8.2f}s{chars:>12,} ch{peak_mb:>11.1f} MB")
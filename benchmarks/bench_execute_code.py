@@ -0,0 +1,67 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "numpy",
+#    "pandas",
+# ]
+# ///
+
+"""
+Benchmark: execute_code latency with a cold `python -I` per snippet vs. the warm
+interpreter pool (heavy libraries already imported).
+
+    python -m benchmarks.bench_execute_code --runs 10
+
+Warm runs are spaced by --gap seconds so each replacement interpreter has finished its
+imports, as it would between LLM tool calls; --gap 0 shows back-to-back behaviour.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import tools.interpreter_pool as interpreter_pool
+from tools.execute_code import run_code_with_timeout
+from tools.interpreter_pool import InterpreterPool
+
+SNIPPET = """
+import pandas as pd
+import numpy as np
+df = pd.DataFrame({"x": np.arange(1000), "y": np.arange(1000) % 7})
+print(df.groupby("y").x.sum().max())
+"""
+
+
+def time_runs(pool: InterpreterPool, runs: int, gap: float, cwd: str) -> list[float]:
+    interpreter_pool._interpreter_pool = pool
+    pool.fill()
+    timings = []
+    try:
+        for _ in range(runs):
+            time.sleep(gap)
+            started = time.perf_counter()
+            output = run_code_with_timeout(SNIPPET, 30, cwd=cwd)
+            timings.append(time.perf_counter() - started)
+            if output.startswith("[Error]"):
+                raise RuntimeError(output)
+    finally:
+        pool.close()
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    print(f"{label:<14} median {statistics.median(timings) * 1000:8.1f} ms   "
+          f"min {min(timings) * 1000:8.1f} ms   max {max(timings) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--gap", type=float, default=2.0, help="seconds between warm runs")
+    parser.add_argument("--pool-size", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        report("cold", time_runs(InterpreterPool(size=0), args.runs, 0, cwd))
+        report("warm pool", time_runs(InterpreterPool(size=args.pool_size), args.runs, args.gap, cwd))
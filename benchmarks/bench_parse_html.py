@@ -0,0 +1,86 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "beautifulsoup4",
+#    "lxml",
+# ]
+# ///
+
+"""
+Benchmark: the planner trying several selectors on one large saved page.
+
+Baseline is the old get_relevant_data: every call re-reads the file, parses it with
+html.parser, and parses it again for the DOM structure when the selector misses.
+Current is get_relevant_data with the parsed-tree cache and the fast parser.
+
+    python -m benchmarks.bench_parse_html --rows 20000 --selectors 5
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from bs4 import BeautifulSoup  # type: ignore
+
+from tools.dom_structure import dom_structure_from_soup
+from tools.get_relevant_data import get_relevant_data
+from tools.html_cache import HTML_PARSER, parsed_html_cache
+from utils.workspace import Workspace
+
+SELECTORS = ["table.data tr td.name", "div.missing", "ul.links li a", "#content h2", "span.nothing-here"]
+
+
+def synthetic_page(rows: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Bench</title><style>td{color:red}</style></head><body><div id='content'>"]
+    parts.append("<h2>Results</h2><table class='data'><thead><tr><th>Name</th><th>Score</th><th>Notes</th></tr></thead><tbody>")
+    for i in range(rows):
+        parts.append(
+            f"<tr class='row'><td class='name'>item {i}</td><td>{rng.random():.4f}</td>"
+            f"<td><a href='/item/{i}'>details</a> {' '.join(rng.choice('abcdefgh') * 3 for _ in range(6))}</td></tr>"
+        )
+    parts.append("</tbody></table><h2>Links</h2><ul class='links'>")
+    for i in range(rows // 4):
+        parts.append(f"<li><a href='/page/{i}'>page {i}</a></li>")
+    parts.append("</ul></div></body></html>")
+    return "".join(parts)
+
+
+def baseline_get_relevant_data(path: str, selector: str):
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    soup = BeautifulSoup(html, "html.parser")
+    if not soup.select(selector):
+        dom_structure_from_soup(BeautifulSoup(html, "html.parser"), max_depth=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--selectors", type=int, default=5, help="selector attempts on the same page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        workspace = Workspace(root)
+        path = os.path.join(workspace.outputs, "page.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(synthetic_page(args.rows))
+        selectors = [SELECTORS[i % len(SELECTORS)] for i in range(args.selectors)]
+        print(f"page: {os.path.getsize(path) / 1e6:.1f} MB, {args.selectors} selector attempts, parser: {HTML_PARSER}")
+
+        started = time.perf_counter()
+        for selector in selectors:
+            baseline_get_relevant_data(path, selector)
+        baseline = time.perf_counter() - started
+
+        started = time.perf_counter()
+        first = None
+        for selector in selectors:
+            get_relevant_data("page.html", selector, workspace=workspace)
+            first = first or time.perf_counter() - started
+        cached = time.perf_counter() - started
+
+        print(f"baseline (html.parser, no cache)  {baseline:7.2f} s")
+        print(f"cached + {HTML_PARSER:<24} {cached:7.2f} s   (first call {first:.2f} s)")
+        print(f"cache: {parsed_html_cache.stats()}")
@@ -0,0 +1,73 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "duckdb",
+#    "numpy",
+#    "pandas",
+#    "pyarrow",
+# ]
+# ///
+
+"""
+Benchmark: a group-by aggregation over a large uploaded file.
+
+Baseline is what the planner used to do in execute_code: pandas loads the whole
+file, then aggregates. Current is query_data running the same query in place.
+
+    python -m benchmarks.bench_query_data --rows 5000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from tools.query_data import query_data
+from utils.workspace import Workspace
+
+SQL = "SELECT city, count(*) AS n, avg(price) AS avg_price FROM {table} WHERE qty > 10 GROUP BY city ORDER BY n DESC"
+
+
+def synthetic_sales(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "city": rng.choice(["Paris", "Oslo", "Lima", "Pune", "Kyoto"], rows),
+        "price": rng.random(rows) * 100,
+        "qty": rng.integers(0, 50, rows),
+        "note": rng.choice(["", "gift", "returned", "bulk order"], rows),
+    })
+
+
+def pandas_baseline(path: str) -> pd.DataFrame:
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    df = df[df["qty"] > 10]
+    return df.groupby("city").agg(n=("id", "size"), avg_price=("price", "mean")).sort_values("n", ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        workspace = Workspace(root)
+        df = synthetic_sales(args.rows)
+        df.to_csv(os.path.join(workspace.uploads, "sales.csv"), index=False)
+        df.to_parquet(os.path.join(workspace.uploads, "sales_pq.parquet"), index=False)
+        del df
+
+        for table, file_name in [("sales", "sales.csv"), ("sales_pq", "sales_pq.parquet")]:
+            path = os.path.join(workspace.uploads, file_name)
+            started = time.perf_counter()
+            pandas_baseline(path)
+            baseline = time.perf_counter() - started
+
+            started = time.perf_counter()
+            result = query_data(SQL.format(table=table), workspace=workspace)
+            current = time.perf_counter() - started
+            assert "error" not in result, result
+
+            print(f"{file_name:<18} {os.path.getsize(path) / 1e6:7.1f} MB   pandas {baseline:6.2f} s   query_data {current:6.2f} s")
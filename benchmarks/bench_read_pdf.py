@@ -0,0 +1,75 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "PyMuPDF",
+# ]
+# ///
+
+"""
+Benchmark: reading a long PDF with read_pdf_file.
+
+Baseline is the old read_pdf_file: every page's text concatenated with +=, then cut
+to 8000 characters. Current reads pages lazily until the budget is met, from a
+cold and then a warm per-page cache, and a search for a term on a late page.
+
+    python -m benchmarks.bench_read_pdf --pages 900
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import fitz  # type: ignore
+
+import utils.content_store as content_store
+from tools.read_pdf_file import read_pdf_file
+from utils.workspace import Workspace
+
+WORDS = ["revenue", "quarter", "growth", "segment", "margin", "total", "region", "forecast"]
+
+
+def synthetic_pdf(path: str, pages: int, seed: int = 0):
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        marker = "NEEDLE " if i == pages * 2 // 3 else ""
+        text = f"Page {i + 1} {marker}" + " ".join(rng.choice(WORDS) for _ in range(400))
+        page.insert_textbox(fitz.Rect(36, 36, 560, 800), text, fontsize=8)
+    doc.save(path)
+
+
+def baseline_read_pdf(path: str) -> str:
+    with fitz.open(path) as doc:
+        text = ""
+        for page in doc:
+            text += page.get_text()
+    return text[:8000]
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=900)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        content_store._artifact_cache = content_store.ArtifactCache(os.path.join(root, "artifacts"))
+        workspace = Workspace(root)
+        synthetic_pdf(os.path.join(workspace.uploads, "report.pdf"), args.pages)
+
+        def read(**kwargs):
+            return read_pdf_file("report.pdf", "/tmp/uploads", workspace=workspace, **kwargs)
+
+        print(f"{args.pages} pages")
+        print(f"baseline (all pages, +=)      {timed(lambda: baseline_read_pdf(os.path.join(workspace.uploads, 'report.pdf'))):7.3f} s")
+        print(f"first pages, cold cache       {timed(read):7.3f} s")
+        print(f"first pages, warm cache       {timed(read):7.3f} s")
+        print(f"search, cold cache            {timed(lambda: read(search='needle')):7.3f} s")
+        print(f"search, warm cache            {timed(lambda: read(search='needle')):7.3f} s")
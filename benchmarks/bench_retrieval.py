@@ -0,0 +1,73 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "numpy",
+# ]
+# ///
+
+"""
+Micro-benchmark: per-row cosine similarity + full sort (the old get_top_k_chunks loop)
+vs. one matrix-vector product over pre-normalized float32 rows + argpartition.
+
+Uses random embeddings so it runs without course_embeddings.npz:
+    python -m benchmarks.bench_retrieval --sizes 10000 100000 1000000 --dim 384
+"""
+
+import argparse
+import time
+import numpy as np
+
+from utils.vector_search import normalize_rows, similarity_top_k
+
+
+def baseline_top_k(embeddings: np.ndarray, query, k: int) -> list[int]:
+    def cosine_similarity(vec1, vec2):
+        v1 = np.array(vec1)
+        v2 = np.array(vec2)
+        return np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
+
+    similarities = [cosine_similarity(query, embeddings[i]) for i in range(len(embeddings))]
+    return sorted(range(len(similarities)), key=lambda i: similarities[i], reverse=True)[:k]
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384, help="embedding width (1536 for text-embedding-3-small)")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=32, help="queries per batched call")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>10} {'baseline ms':>12} {'vectorized ms':>14} {'speedup':>8} {'batched ms/query':>17}")
+    for size in args.sizes:
+        embeddings = rng.standard_normal((size, args.dim))
+        queries = rng.standard_normal((args.batch, args.dim))
+        normalized = normalize_rows(embeddings)
+
+        # Same answer before timing anything
+        expected = baseline_top_k(embeddings, queries[0], args.k)
+        indices, _ = similarity_top_k(normalized, queries[0], args.k)
+        assert list(indices[0]) == expected, "vectorized top-k disagrees with baseline"
+
+        baseline = best_of(lambda: baseline_top_k(embeddings, queries[0], args.k), 1)
+        vectorized = best_of(lambda: similarity_top_k(normalized, queries[0], args.k), args.repeats)
+        batched = best_of(lambda: similarity_top_k(normalized, queries, args.k), args.repeats) / args.batch
+        print(
+            f"{size:>10} {baseline * 1e3:>12.1f} {vectorized * 1e3:>14.2f} "
+            f"{baseline / vectorized:>7.0f}x {batched * 1e3:>17.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
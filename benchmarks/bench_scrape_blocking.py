@@ -0,0 +1,106 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "playwright",
+# ]
+# ///
+
+"""
+Benchmark: what resource blocking saves in "fast" scrape mode.
+
+Loads the same page twice per run with the fast-mode waits (domcontentloaded, then a
+stable DOM): once with every request allowed, once with block_resources. Reports the
+elapsed time and on-the-wire bytes of each. By default the page is a local one with
+images and a stylesheet, each served with --delay-ms latency;
+--url measures a real page instead.
+
+    python -m benchmarks.bench_scrape_blocking --images 40 --runs 3
+    python -m benchmarks.bench_scrape_blocking --url https://en.wikipedia.org/wiki/List_of_highest-grossing_films
+"""
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tools.browser_pool import BrowserPool
+from tools.scrape_webpage import block_resources, downloaded_bytes, wait_for_dom_stable
+
+ASSET_BYTES = 200_000
+
+
+def synthetic_page(images: int) -> bytes:
+    rows = "".join(f"<tr><td>{i}</td><td><img src='/img/{i}.png'></td></tr>" for i in range(images))
+    return (
+        "<html><head><link rel='stylesheet' href='/style.css'></head>"
+        f"<body><h1>Bench</h1><table>{rows}</table></body></html>"
+    ).encode("utf-8")
+
+
+def serve(images: int, delay_ms: int) -> ThreadingHTTPServer:
+    page = synthetic_page(images)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/":
+                body, content_type = page, "text/html"
+            else:
+                time.sleep(delay_ms / 1000)
+                body = b"\0" * ASSET_BYTES
+                content_type = "text/css" if self.path.endswith(".css") else "application/octet-stream"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def load(pool: BrowserPool, url: str, blocking: bool) -> tuple[float, int]:
+    async with pool.page() as page:
+        finished = []
+        page.on("requestfinished", finished.append)
+        if blocking:
+            await block_resources(page, {"requests_blocked": 0, "blocked_by_type": {}})
+        started = time.perf_counter()
+        await page.goto(url, wait_until="domcontentloaded")
+        await wait_for_dom_stable(page)
+        return time.perf_counter() - started, await downloaded_bytes(finished)
+
+
+async def main(url: str, runs: int):
+    pool = BrowserPool()
+    try:
+        await load(pool, url, blocking=False)  # warm up the browser
+        for blocking in (False, True):
+            results = [await load(pool, url, blocking) for _ in range(runs)]
+            elapsed = statistics.median(seconds for seconds, _ in results)
+            size = statistics.median(size for _, size in results)
+            print(f"{'blocked' if blocking else 'unblocked':<10} {elapsed:7.3f} s   {size / 1e6:7.2f} MB")
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--delay-ms", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    server = None if args.url else serve(args.images, args.delay_ms)
+    url = args.url or f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        asyncio.run(main(url, args.runs))
+    finally:
+        if server:
+            server.shutdown()
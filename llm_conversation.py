@@ -1,12 +1,28 @@
 import os
 import json
 import re
+import asyncio
 
-from utils.planner import generate_planner_response
-from worker_llm import tools, run_worker, execute_tool_call
+from utils.planner import generate_planner_response_async
+from worker_llm import tools, run_worker_async
+from tools.code_kernel import get_kernel_manager
+from utils.workspace import Workspace, default_workspace
+from utils.event_loop import run_sync
 
 
-def run_conversation():
+async def run_conversation_async(workspace: Workspace = None):
+    """
+    Runs the planner/worker loop, then shuts down the conversation's execute_code session.
+    """
+    workspace = workspace or default_workspace()
+    try:
+        return await plan_and_execute(workspace)
+    finally:
+        # Shutting a kernel down waits for its process to exit
+        await asyncio.to_thread(get_kernel_manager().close_session, workspace.root)
+
+
+async def plan_and_execute(workspace: Workspace):
     tool_definitions = [
         {
             "name": tool["function"]["name"],
@@ -35,9 +51,14 @@ Special Tools:
 📝 Note:
 - Be specific with your instruction steps, name any files you might be talking about explicitly, the worker would not remember them.
 - Do not tell worker to read html files directly. use the `get_relevant_data` tool with guessed js_selector to extract data from HTML files.
+- To learn a CSV's schema (row count, column types, nulls, ranges) before writing code, use `read_csv_file` with profile=true; it works on files too large to load.
+- For filters, joins and aggregations over `.csv`, `.parquet`, `.json` or `.db` files, prefer `query_data` (one SQL query run in place, fast even on multi-GB files) over loading them with pandas in execute_code.
+- For long PDFs, `read_pdf_file` returns only about 8000 characters: use its `pages` or `search` parameters to reach later parts, or full_document=true to save all text to a .txt file for execute_code.
+- For tables in HTML files, use `extract_html_tables`: it writes each table to a CSV (or Parquet) file in one step and reports its columns, so the next step can load that file in execute_code.
+- For tables in PDF files, use `extract_pdf_tables` (with `pages` for long documents) instead of parsing `read_pdf_file` text.
 - Do not dump multiple tasks/questions in a single step, keep them in mind, you have the entire conversation history, make the steps concise and short.
 - Try to break down any preliminary tasks and the questions into smaller steps that the worker can carry, don't overload it with multiple tasks at once.
-- execute_code doesn't carry over multiple steps, so if you have a complex task, try to do it in a single step.
+- execute_code doesn't carry over multiple steps unless you ask for session mode (session=true): then variables and loaded DataFrames stay defined for later session=true steps, so load a file once and reuse it instead of re-reading it every step.
 - Do remember that if the entire question is code related and wouldn't work in tiny steps, you can send a single long code string at once to the worker.
 
 🌟 Extremely important, when writing code, use print statements in order to get relevant outputs, otherwise no output will be given by worker.
@@ -67,6 +88,7 @@ Special Tools:
 
 ⚠️ Restrictions:
 - Never read large files (like `.html`) directly; use a compact version (e.g., `dom_structure.txt`).
+- In DOM summaries, `tr.row ×2,314` means 2,314 sibling elements with that tag and classes (only the first one's children are listed), and tables show `[rows × cols; headers: ...]`.
 - If CSS-based extraction fails, try to guess an appropriate javascript selector after inspecting url.
 
 📌 Handling Multiple Questions:
@@ -119,6 +141,7 @@ Special Tools:
 
 🐍 'execute_code' - Custom Code Execution Tool:
 - Runs Python code in isolation and returns the raw output.
+- Set `session` to true only when the Planner asks for session mode (variables carry over between session steps).
 - Your job when told to execute code is to pass along as input the code string given by planner.
 - Always execute the code and **return only the result**, not the code or reasoning.
 
@@ -173,7 +196,7 @@ Special Tools:
         iteration += 1
 
         # --- PLANNER THINKS ---
-        planner_response = generate_planner_response(planner_messages)
+        planner_response = await generate_planner_response_async(planner_messages)
         planner_messages.append({"role": "assistant", "content": planner_response})
         print("Planner:", planner_response)
 
@@ -193,7 +216,7 @@ Special Tools:
             {"role": "system", "content": worker_messages[0]["content"]},
             {"role": "user", "content": planner_response}
         ]
-        worker_response = run_worker(worker_step_messages)
+        worker_response = await run_worker_async(worker_step_messages, workspace)
 
         quota_error = detect_quota_or_malformed(
             worker_response if isinstance(worker_response, str) else worker_response.get("content", "")
@@ -233,5 +256,13 @@ Special Tools:
     return final_answer
 
 
+def run_conversation(workspace: Workspace = None):
+    """
+    Blocking entry point: runs the conversation on the shared event loop, where it
+    shares one pooled HTTP client with every other in-flight conversation.
+    """
+    return run_sync(run_conversation_async(workspace))
+
+
 if __name__ == "__main__":
     print(run_conversation())
\ No newline at end of file
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import shutil
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import tools.scrape_webpage as scrape_webpage_module
+from tools.scrape_cache import ScrapeCache
+from tools.scrape_webpage import scrape_webpage
+from utils.workspace import Workspace
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    """
+    Serves files with Last-Modified (answering If-Modified-Since with 304) and counts GETs.
+    """
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("If-Modified-Since")))
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    root = tmp_path / "site"
+    root.mkdir()
+    shutil.copy(os.path.join(FIXTURES, "static_page.html"), root / "page.html")
+    CountingHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(CountingHandler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    cache = ScrapeCache(str(tmp_path / "cache"), ttl_sec=3600)
+    monkeypatch.setattr(scrape_webpage_module, "get_scrape_cache", lambda: cache)
+    yield f"http://127.0.0.1:{server.server_address[1]}/page.html", root / "page.html", cache, Workspace(str(tmp_path / "workspace"))
+    server.shutdown()
+    server.server_close()
+
+
+def scrape(url: str, workspace: Workspace) -> dict:
+    return asyncio.run(scrape_webpage(url, "page.html", workspace=workspace))
+
+
+def test_fresh_entry_is_served_without_a_request(site):
+    url, _, cache, workspace = site
+    assert scrape(url, workspace)["path"] == "static"
+    result = scrape(url, workspace)
+    assert result["path"] == "cache"
+    assert result["stats"]["cache"] == "hit"
+    assert len(CountingHandler.requests) == 1
+
+
+def test_stale_entry_revalidated_with_304(site):
+    url, _, cache, workspace = site
+    scrape(url, workspace)
+    cache.ttl_sec = 0
+    result = scrape(url, workspace)
+    assert result["path"] == "cache"
+    assert result["stats"]["cache"] == "revalidated"
+    assert CountingHandler.requests[-1][1] is not None  # conditional GET
+
+
+def test_modified_page_reuses_the_revalidation_body(site):
+    url, page, cache, workspace = site
+    scrape(url, workspace)
+    cache.ttl_sec = 0
+    page.write_text(page.read_text(encoding="utf-8").replace("Titanic", "Star Wars"), encoding="utf-8")
+    stat = os.stat(page)
+    os.utime(page, (stat.st_atime, stat.st_mtime + 10))
+
+    result = scrape(url, workspace)
+    assert result["path"] == "static"
+    assert result["stats"]["cache"] == "modified"
+    assert len(CountingHandler.requests) == 2  # the revalidation only, no second GET
+    with open(os.path.join(workspace.outputs, "page.html"), encoding="utf-8") as f:
+        assert "Star Wars" in f.read()
+
+
+def test_entry_removed_before_copy_is_a_miss(site):
+    url, _, cache, workspace = site
+    scrape(url, workspace)
+
+    async def get_then_evict():
+        cached = await cache.get(url, "auto|")
+        shutil.rmtree(os.path.dirname(cached["html_file"]))
+        return await cache.copy_out(cached, os.path.join(workspace.outputs, "a.html"), os.path.join(workspace.outputs, "a.txt"))
+
+    assert asyncio.run(get_then_evict()) is False
+    assert scrape(url, workspace)["path"] == "static"
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import tools.scrape_webpage as scrape_webpage_module
+from tools.scrape_cache import ScrapeCache
+from tools.scrape_webpage import fetch_static, is_usable_html, scrape_webpage
+from utils.workspace import Workspace
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class RecordingPool:
+    """
+    Stands in for the browser pool to record whether a browser was asked for.
+    """
+
+    def __init__(self):
+        self.leases = 0
+
+    @asynccontextmanager
+    async def page(self):
+        self.leases += 1
+        raise RuntimeError("browser requested")
+        yield
+
+
+@pytest.fixture(scope="module")
+def fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=FIXTURES))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.setattr(scrape_webpage_module, "get_scrape_cache", lambda: ScrapeCache(str(tmp_path / "cache")))
+    pool = RecordingPool()
+    monkeypatch.setattr(scrape_webpage_module, "get_browser_pool", lambda: pool)
+    return Workspace(str(tmp_path / "workspace")), pool
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_is_usable_html():
+    assert is_usable_html(read_fixture("static_page.html"))
+    assert not is_usable_html(read_fixture("js_shell.html"))
+
+
+def test_fetch_static_accepts_server_rendered_page(fixture_server):
+    html, reason, headers = asyncio.run(fetch_static(f"{fixture_server}/static_page.html"))
+    assert reason == "ok"
+    assert "Avengers: Endgame" in html
+    assert "text/html" in headers["content-type"]
+
+
+def test_fetch_static_rejects_js_shell(fixture_server):
+    html, reason, _ = asyncio.run(fetch_static(f"{fixture_server}/js_shell.html"))
+    assert html is None
+    assert reason == "looks like a JavaScript-rendered shell"
+
+
+def test_fetch_static_reports_http_errors(fixture_server):
+    html, reason, _ = asyncio.run(fetch_static(f"{fixture_server}/missing.html"))
+    assert html is None
+    assert reason == "HTTP 404"
+
+
+def test_static_page_skips_the_browser(fixture_server, isolated):
+    workspace, pool = isolated
+    result = asyncio.run(scrape_webpage(f"{fixture_server}/static_page.html", "films.html", workspace=workspace))
+
+    assert result["status"] == "success"
+    assert result["path"] == "static"
+    assert pool.leases == 0
+    with open(os.path.join(workspace.outputs, "films.html"), encoding="utf-8") as f:
+        assert "Titanic" in f.read()
+    with open(os.path.join(workspace.outputs, "films_dom.txt"), encoding="utf-8") as f:
+        assert "table#films.wikitable" in f.read()
+
+
+def test_js_shell_falls_back_to_the_browser(fixture_server, isolated):
+    workspace, pool = isolated
+    result = asyncio.run(scrape_webpage(f"{fixture_server}/js_shell.html", "shell.html", workspace=workspace))
+
+    assert pool.leases == 1
+    assert result["status"] == "error"
+    assert "browser requested" in result["message"]
+
+
+def test_js_shell_browser_render(fixture_server, tmp_path, monkeypatch):
+    pytest.importorskip("playwright")
+    from tools.browser_pool import BrowserPool
+
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+    monkeypatch.setattr(scrape_webpage_module, "get_scrape_cache", lambda: ScrapeCache(str(tmp_path / "cache")))
+    workspace = Workspace(str(tmp_path / "workspace"))
+
+    async def scrape():
+        pool = BrowserPool()
+        monkeypatch.setattr(scrape_webpage_module, "get_browser_pool", lambda: pool)
+        try:
+            await pool.start()
+        except Exception as e:
+            pytest.skip(f"Chromium is not available: {e}")
+        try:
+            return await scrape_webpage(f"{fixture_server}/js_shell.html", "shell.html", workspace=workspace)
+        finally:
+            await pool.close()
+
+    result = asyncio.run(scrape())
+    assert result["status"] == "success"
+    assert result["path"] == "browser"
+    assert result["stats"]["mode"] == "fast"
+    assert result["stats"]["static_fallback_reason"] == "looks like a JavaScript-rendered shell"
+    with open(os.path.join(workspace.outputs, "shell.html"), encoding="utf-8") as f:
+        assert "Paris" in f.read()
@@ -0,0 +1,124 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "asyncio",
+#    "playwright",
+# ]
+# ///
+
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright  # type: ignore
+
+# safer chromium launch options to prevent crashes (no --single-process: the browser is shared)
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+]
+
+MAX_CONTEXTS = int(os.environ.get("BROWSER_MAX_CONTEXTS", "4"))  # concurrent scrapes per browser
+
+
+class BrowserPool:
+    """
+    Keeps one headless Chromium warm and gives every scrape its own browser context.
+
+    Launching the browser is the expensive part and is done once; a context is cheap and
+    is created per lease and closed afterwards, so cookies, localStorage, sessionStorage,
+    IndexedDB, HTTP cache and permissions never carry over from one scrape to the next.
+    If the browser itself dies it is relaunched on the next lease.
+    """
+
+    def __init__(self, max_contexts: int = MAX_CONTEXTS):
+        self.max_contexts = max_contexts
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._in_use = 0
+        self.browser_launches = 0
+        self.contexts_created = 0
+        self.pages_served = 0
+
+    def is_running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self):
+        """
+        Launches Chromium if it is not already running (or has crashed).
+        """
+        async with self._lock:
+            if self.is_running():
+                return
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+            self.browser_launches += 1
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Yields a page in a fresh, private context; waits while max_contexts scrapes are running.
+        """
+        async with self._semaphore:
+            await self.start()
+            context = await self._browser.new_context()
+            self.contexts_created += 1
+            self._in_use += 1
+            try:
+                yield await context.new_page()
+            finally:
+                self._in_use -= 1
+                self.pages_served += 1
+                try:
+                    await context.close()  # also closes the page
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "browser_running": self.is_running(),
+            "max_contexts": self.max_contexts,
+            "contexts_in_use": self._in_use,
+            "pages_served": self.pages_served,
+            "contexts_created": self.contexts_created,
+            "browser_launches": self.browser_launches,
+        }
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+# Playwright objects are bound to the loop that created them
+_pools = weakref.WeakKeyDictionary()
+
+
+def get_browser_pool(loop: asyncio.AbstractEventLoop = None) -> BrowserPool:
+    """
+    Returns the browser pool of the given (default: running) event loop.
+    """
+    loop = loop or asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = BrowserPool()
+        _pools[loop] = pool
+    return pool
+
+
+async def warm_browser_pool():
+    """
+    Starts Chromium ahead of the first scrape. Failures are logged, not raised.
+    """
+    try:
+        await get_browser_pool().start()
+    except Exception as e:
+        print(f"Browser pool warm-up failed: {e}")
@@ -0,0 +1,292 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = []
+# ///
+
+import atexit
+import json
+import os
+import select
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+from tools.interpreter_pool import PYTHON_EXECUTABLE, PRELOAD_MODULES
+from tools.resource_limits import apply_limits, execution_limits, process_cpu_sec, process_memory_mb
+
+KERNEL_MEMORY_MB = int(os.environ.get("KERNEL_MEMORY_MB", "2048"))  # restart a kernel whose RSS grows past this
+KERNEL_IDLE_SEC = float(os.environ.get("KERNEL_IDLE_SEC", "600"))  # evict kernels unused for this long
+KERNEL_MAX_SESSIONS = int(os.environ.get("KERNEL_MAX_SESSIONS", "8"))  # least recently used evicted beyond this
+INTERRUPT_GRACE_SEC = 2.0  # after a timeout, how long an interrupted cell gets to unwind before a kill
+
+# Runs inside the kernel process: executes cells (one JSON line each on stdin) in one
+# persistent namespace and answers each with a JSON line on the original stdout.
+# Cell output is captured like execute_code.BoundedCapture does (head + tail in memory,
+# the rest spilled to a file), counting characters instead of bytes.
+KERNEL_BOOTSTRAP = r"""
+import contextlib, importlib, io, json, linecache, os, sys, traceback
+
+class _Capture(io.TextIOBase):
+    def __init__(self, max_chars, spill_path, spill_max):
+        self.half, self.spill_path, self.spill_max = max_chars // 2, spill_path, spill_max
+        self.head, self.tail, self.tail_len, self.total = "", [], 0, 0
+        self.spill, self.spilled = None, 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.total += len(text)
+        if self.spill is None and self.total > 2 * self.half:
+            self.spill = open(self.spill_path, "w", encoding="utf-8", errors="replace")
+            self._spill_write(self.head + "".join(self.tail))
+        if self.spill is not None:
+            self._spill_write(text)
+        room = self.half - len(self.head)
+        rest = text
+        if room > 0:
+            self.head += text[:room]
+            rest = text[room:]
+        if rest:
+            self.tail.append(rest)
+            self.tail_len += len(rest)
+            if self.tail_len > 2 * self.half:
+                self.tail = ["".join(self.tail)[-self.half:]]
+                self.tail_len = len(self.tail[0])
+        return len(text)
+
+    def _spill_write(self, text):
+        text = text[:self.spill_max - self.spilled]
+        if text:
+            try:
+                self.spill.write(text)
+            except OSError:  # e.g. the file size limit; keep the cell running
+                self.spilled = self.spill_max
+                return
+            self.spilled += len(text)
+
+    def result(self):
+        if self.spill is not None:
+            self.spill.close()
+        tail = "".join(self.tail)[-self.half:]
+        truncated = self.total > len(self.head) + len(tail)
+        return {
+            "head": self.head if truncated else self.head + tail,
+            "tail": tail if truncated else "",
+            "total": self.total,
+            "file": self.spill_path if self.spill is not None else None,
+        }
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+for _name in json.loads(sys.argv[1]):
+    try:
+        importlib.import_module(_name)
+    except Exception:
+        pass
+_protocol = sys.stdout
+_namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+_cell = 0
+while True:
+    try:
+        _line = sys.stdin.readline()
+    except KeyboardInterrupt:
+        continue
+    if not _line:
+        break
+    _job = json.loads(_line)
+    _cell += 1
+    _filename = f"<cell {_cell}>"
+    linecache.cache[_filename] = (len(_job["code"]), None, _job["code"].splitlines(True), _filename)
+    _out = _Capture(_job["max_chars"], _job["spill"][0], _job["spill_max"])
+    _err = _Capture(_job["max_chars"], _job["spill"][1], _job["spill_max"])
+    _ok = True
+    try:
+        os.chdir(_job["cwd"])
+        with contextlib.redirect_stdout(_out), contextlib.redirect_stderr(_err):
+            exec(compile(_job["code"], _filename, "exec"), _namespace)
+    except SystemExit as _e:
+        _ok = _e.code in (None, 0)
+    except BaseException as _e:
+        _ok = False
+        traceback.print_exception(type(_e), _e, _e.__traceback__.tb_next, file=_err)
+    _protocol.write(json.dumps({"ok": _ok, "stdout": _out.result(), "stderr": _err.result()}) + "\n")
+    _protocol.flush()
+"""
+
+
+class KernelTimeout(Exception):
+    pass
+
+
+class CodeKernel:
+    """
+    A persistent Python process whose globals survive from one cell to the next,
+    so a conversation can load a DataFrame once and keep working on it.
+    """
+
+    def __init__(self, preload: list[str] = PRELOAD_MODULES, memory_mb: int = KERNEL_MEMORY_MB):
+        self.memory_mb = memory_mb
+        self.proc = subprocess.Popen(
+            [PYTHON_EXECUTABLE, "-I", "-c", KERNEL_BOOTSTRAP, json.dumps(preload)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=tempfile.gettempdir(),
+            # Memory / file size / process limits; CPU time is bounded per cell by the timeout instead
+            preexec_fn=lambda: apply_limits(execution_limits()),
+        )
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.cells = 0
+        self.notice = None  # why an earlier kernel of this session was replaced, told to the next cell
+
+    def is_alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def rss_mb(self) -> float:
+        return process_memory_mb(self.proc.pid)
+
+    def peak_rss_mb(self) -> float:
+        return process_memory_mb(self.proc.pid, "VmHWM")
+
+    def cpu_sec(self) -> float:
+        return process_cpu_sec(self.proc.pid)
+
+    def _read_reply(self, timeout_sec: float) -> dict | None:
+        ready, _, _ = select.select([self.proc.stdout], [], [], timeout_sec)
+        if not ready:
+            return None
+        line = self.proc.stdout.readline()
+        if not line:
+            raise RuntimeError("The code session crashed; its variables were lost.")
+        return json.loads(line)
+
+    def run(self, code: str, cwd: str, timeout_sec: float, spill: tuple, max_chars: int, spill_max: int) -> dict:
+        """
+        Executes one cell. Returns {"ok", "stdout", "stderr"}, each stream captured as
+        {"head", "tail", "total", "file"} within max_chars (overflow spilled to the spill paths).
+        On timeout the cell is interrupted (KeyboardInterrupt) and the kernel kept;
+        a kernel that does not unwind in time is killed and KernelTimeout raised.
+        """
+        self.last_used = time.monotonic()
+        self.cells += 1
+        job = {"code": code, "cwd": cwd, "spill": list(spill), "max_chars": max_chars, "spill_max": spill_max}
+        self.proc.stdin.write((json.dumps(job) + "\n").encode("utf-8"))
+        self.proc.stdin.flush()
+
+        reply = self._read_reply(timeout_sec)
+        if reply is None:
+            self.proc.send_signal(signal.SIGINT)
+            reply = self._read_reply(INTERRUPT_GRACE_SEC)
+            if reply is None:
+                self.close()
+            raise KernelTimeout()
+        self.last_used = time.monotonic()
+        return reply
+
+    def close(self):
+        if self.is_alive():
+            self.proc.kill()
+        self.proc.wait()
+
+
+class KernelManager:
+    """
+    One CodeKernel per conversation (session id), created on first use.
+    Kernels idle for KERNEL_IDLE_SEC or already dead are evicted; only when KERNEL_MAX_SESSIONS
+    live sessions remain is the least recently used one evicted, and its conversation's next
+    cell is told its variables were lost. Conversations close theirs when they finish.
+    """
+
+    def __init__(self, max_sessions: int = KERNEL_MAX_SESSIONS, idle_sec: float = KERNEL_IDLE_SEC):
+        self.max_sessions = max_sessions
+        self.idle_sec = idle_sec
+        self._kernels = {}
+        self._lost = {}  # session id -> why its kernel was evicted while the conversation was open
+        self._lock = threading.Lock()
+        self.started = 0
+        self.evicted = 0
+        self.restarted = 0
+
+    def get(self, session_id: str) -> CodeKernel:
+        with self._lock:
+            self._evict(exclude=session_id)
+            kernel = self._kernels.get(session_id)
+            if kernel is None or not kernel.is_alive():
+                kernel = self._kernels[session_id] = CodeKernel()
+                kernel.notice = self._lost.pop(session_id, None)
+                self.started += 1
+            kernel.last_used = time.monotonic()
+            return kernel
+
+    def restart(self, session_id: str):
+        """
+        Drops a session's kernel (e.g. over its memory cap); the next cell starts fresh.
+        """
+        with self._lock:
+            kernel = self._kernels.pop(session_id, None)
+            self.restarted += 1
+        if kernel is not None:
+            kernel.close()
+
+    def _evict(self, exclude: str):
+        now = time.monotonic()
+        by_age = sorted(self._kernels.items(), key=lambda item: item[1].last_used)
+        candidates = [(session_id, kernel) for session_id, kernel in by_age if session_id != exclude and not kernel.lock.locked()]
+        for session_id, kernel in candidates:
+            if not kernel.is_alive():
+                self._drop(session_id, "the code session crashed")
+            elif now - kernel.last_used > self.idle_sec:
+                self._drop(session_id, f"the code session was idle for over {self.idle_sec:.0f} s")
+        # Still full: a live session has to go
+        for session_id, kernel in candidates:
+            if len(self._kernels) < self.max_sessions:
+                break
+            if session_id in self._kernels:
+                self._drop(session_id, "the code session was evicted to make room for other conversations")
+
+    def _drop(self, session_id: str, reason: str):
+        kernel = self._kernels.pop(session_id)
+        kernel.close()
+        self._lost[session_id] = reason
+        self.evicted += 1
+
+    def close_session(self, session_id: str):
+        with self._lock:
+            kernel = self._kernels.pop(session_id, None)
+            self._lost.pop(session_id, None)
+        if kernel is not None:
+            kernel.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._kernels),
+                "max_sessions": self.max_sessions,
+                "idle_sec": self.idle_sec,
+                "started": self.started,
+                "evicted": self.evicted,
+                "restarted": self.restarted,
+            }
+
+    def close(self):
+        with self._lock:
+            kernels, self._kernels = list(self._kernels.values()), {}
+        for kernel in kernels:
+            kernel.close()
+
+
+_kernel_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_kernel_manager() -> KernelManager:
+    global _kernel_manager
+    if _kernel_manager is None:
+        with _manager_lock:
+            if _kernel_manager is None:
+                _kernel_manager = KernelManager()
+                atexit.register(_kernel_manager.close)
+    return _kernel_manager
@@ -2,7 +2,9 @@ import base64
 import os
 import mimetypes
 
-def convert_to_base64(file_name: str, directory: str = "/tmp/outputs") -> str:
+from utils.workspace import Workspace, default_workspace
+
+def convert_to_base64(file_name: str, directory: str = "/tmp/outputs", workspace: Workspace = None) -> str:
     """
     Converts any file from the specified directory to a base64-encoded string.
     Automatically detects MIME type.
@@ -11,7 +13,8 @@ def convert_to_base64(file_name: str, directory: str = "/tmp/outputs") -> str:
     if directory not in ["/tmp/uploads", "/tmp/outputs"]:
         return f"Error: Unsupported directory '{directory}'. Must be '/tmp/uploads' or '/tmp/outputs'."
 
-    file_path = os.path.join(directory, file_name)
+    workspace = workspace or default_workspace()
+    file_path = os.path.join(workspace.resolve(directory), file_name)
 
     if not os.path.exists(file_path):
         return f"Error: File '{file_name}' not found in '{directory}/'."
@@ -2,47 +2,271 @@
 # requires-python = ">=3.11"
 # dependencies = [
 #   "beautifulsoup4",
+#   "lxml",
 # ]
 # ///
 
-from bs4 import BeautifulSoup, Comment # type: ignore
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup, Tag # type: ignore
+
+try:
+    from lxml import etree  # type: ignore
+except ImportError:
+    etree = None
+
+MAX_SUMMARY_CHARS = 20000  # the summary is cut (with a note) beyond this
+MAX_CHILD_KINDS = 40  # distinct child patterns listed per element
+MAX_NODES = 5000  # distinct patterns kept in memory overall
+MAX_HEADERS = 12  # table header cells quoted per table
+FEED_CHUNK_CHARS = 1 << 16
+
+SKIPPED_TAGS = {"script", "style"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class _Node:
+    __slots__ = ("tag", "label", "key", "count", "size", "children", "omitted", "rows", "cols", "cells", "headers", "text")
+
+    def __init__(self, tag: str, attrs: dict):
+        element_id = attrs.get("id")
+        classes = attrs.get("class") or ""
+        classes = classes.split() if isinstance(classes, str) else list(classes)
+        class_str = "." + ".".join(classes) if classes else ""
+        self.tag = tag
+        self.label = tag + (f"#{element_id}" if element_id else "") + class_str
+        # Siblings sharing tag, id and classes are collapsed into one line. Tables never are,
+        # so each keeps its own row/column/header annotation.
+        self.key = self.label if tag != "table" else (self.label, id(self))
+        self.count = 1
+        self.size = 1  # this node plus the descendants kept under it
+        self.children = {}
+        self.omitted = 0
+        self.rows = self.cols = self.cells = 0
+        self.headers = []
+        self.text = None
+
+    def describe(self) -> str:
+        line = self.label if self.count == 1 else f"{self.label} ×{self.count:,}"
+        if self.tag == "table":
+            line += f" [{self.rows:,} rows × {self.cols} cols"
+            if self.headers:
+                line += "; headers: " + " | ".join(self.headers)
+            line += "]"
+        return line
+
+
+class DomSummary:
+    """
+    Builds a DOM outline from start/end events without keeping the document.
+
+    Sibling elements with the same tag, id and classes collapse into one line ("tr.row ×2,314")
+    showing the first one's children; tables are never collapsed and are annotated with
+    row/column counts and header text. Memory is bounded by the number of distinct patterns, not page size.
+    """
+
+    def __init__(self, max_depth: int = 12, max_chars: int = MAX_SUMMARY_CHARS):
+        self.max_depth = max_depth
+        self.max_chars = max_chars
+        self.root = _Node("", {})
+        self.stack = [self.root]
+        self.open_headers = []
+        self.nodes = 0
+        self.elements = 0
+
+    def start(self, tag: str, attrs: dict):
+        node = _Node(tag, attrs)
+        if tag == "th":
+            node.text = []
+            self.open_headers.append(node)
+        self.stack.append(node)
+        self.elements += 1
+
+    def data(self, text: str):
+        if self.open_headers:
+            self.open_headers[-1].text.append(text)
+
+    def end(self):
+        node = self.stack.pop()
+        parent = self.stack[-1]
+        if node.tag in ("td", "th") and parent.tag == "tr":
+            parent.cells += 1
+            if node.tag == "th" and len(parent.headers) < MAX_HEADERS:
+                parent.headers.append(" ".join("".join(node.text).split())[:40])
+        if node.tag == "th":
+            self.open_headers.pop()
+        if node.tag == "tr":
+            table = next((n for n in reversed(self.stack) if n.tag == "table"), None)
+            if table is not None:
+                table.rows += 1
+                table.cols = max(table.cols, node.cells)
+                if not table.headers and node.headers:
+                    table.headers = node.headers
+
+        # The root's children are at depth 0, as in the old traversal
+        if node.tag in SKIPPED_TAGS or len(self.stack) - 1 > self.max_depth:
+            return
+        existing = parent.children.get(node.key)
+        if existing is None and (len(parent.children) >= MAX_CHILD_KINDS or self.nodes >= MAX_NODES):
+            parent.omitted += 1
+            existing = node  # dropped like a duplicate
+        if existing is not None:
+            if existing is not node:
+                existing.count += 1
+            # A duplicate's subtree is dropped; only the first instance's is shown
+            self.nodes -= node.size - 1
+            return
+        parent.children[node.key] = node
+        parent.size += node.size
+        self.nodes += 1
+
+    def render(self) -> str:
+        if not self.elements:
+            return "No HTML content found."
+
+        lines = []
+        size = 0
+        cut = 0
+        pending = [(self.root, -1)]
+        while pending:
+            node, depth = pending.pop()
+            if depth >= 0:
+                line = "  " * depth + (node.describe() if isinstance(node, _Node) else node)
+                if size + len(line) + 1 > self.max_chars:
+                    cut += 1
+                    continue
+                lines.append(line)
+                size += len(line) + 1
+            if isinstance(node, _Node):
+                children = [(child, depth + 1) for child in node.children.values()]
+                if node.omitted:
+                    children.append((f"… {node.omitted:,} more elements of other kinds", depth + 1))
+                pending.extend(reversed(children))
+        if cut:
+            lines.append(f"[... {cut:,} more lines omitted]")
+        return "\n".join(lines)
+
+
+class _EventParser(HTMLParser):
+    """
+    Stdlib fallback when lxml is unavailable: turns tags into DomSummary events,
+    closing unclosed elements the way browsers do on a matching end tag.
+    """
+
+    def __init__(self, summary: DomSummary):
+        super().__init__(convert_charrefs=True)
+        self.summary = summary
+        self.open_tags = []
+
+    def handle_starttag(self, tag, attrs):
+        self.summary.start(tag, dict(attrs))
+        if tag in VOID_TAGS:
+            self.summary.end()
+        else:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.summary.start(tag, dict(attrs))
+        self.summary.end()
+
+    def handle_endtag(self, tag):
+        if tag not in self.open_tags:
+            return
+        while self.open_tags:
+            self.summary.end()
+            if self.open_tags.pop() == tag:
+                break
+
+    def handle_data(self, data):
+        self.summary.data(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.open_tags.pop()
+            self.summary.end()
+
+
+def _feed_lxml(summary: DomSummary, chunks):
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    for chunk in chunks:
+        parser.feed(chunk)
+        _drain_lxml(summary, parser)
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:  # empty document
+        return
+    _drain_lxml(summary, parser)
+
+
+def _drain_lxml(summary: DomSummary, parser):
+    for event, element in parser.read_events():
+        if not isinstance(element.tag, str):  # comments, processing instructions
+            continue
+        if event == "start":
+            summary.start(element.tag, element.attrib)
+            continue
+        if element.tag == "th":
+            summary.data("".join(element.itertext()))
+        summary.end()
+        if summary.open_headers:  # header text is read when the enclosing <th> ends
+            continue
+        # Free what has been summarised: the element's content and its earlier siblings
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+def _summarise_chunks(chunks, max_depth: int) -> str:
+    summary = DomSummary(max_depth)
+    if etree is not None:
+        _feed_lxml(summary, chunks)
+    else:
+        parser = _EventParser(summary)
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+    return summary.render()
+
 
 def extract_dom_structure_with_identifiers(html: str, max_depth: int = 12) -> str:
     """
     Returns a formatted DOM structure from the given HTML string, including tags with IDs/classes,
-    up to a specified depth (default is 10).
-    """
-    soup = BeautifulSoup(html, "html.parser")
-
-    if not soup.find():
-        return "No HTML content found."
-
-    
-    def format_tag(tag):
-        parts = [tag.name]
-        if tag.get("id"):
-            parts.append(f"#{tag['id']}")
-        if tag.get("class"):
-            class_str = "." + ".".join(tag.get("class"))
-            parts.append(class_str)
-        return "".join(parts)
-
-    def traverse(node, depth=0):
-        if depth > max_depth:
-            return []
-        lines = []
-        for child in node.children:
-            if isinstance(child, Comment) or child.name in ['script', 'style']:
-                continue
-            if hasattr(child, 'name') and child.name:
-                lines.append("  " * depth + format_tag(child))
-                lines.extend(traverse(child, depth + 1))
-        return lines
+    up to a specified depth (default is 12). Repeated siblings are collapsed (see DomSummary).
+    """
+    return _summarise_chunks(
+        (html[i:i + FEED_CHUNK_CHARS] for i in range(0, len(html), FEED_CHUNK_CHARS)),
+        max_depth,
+    )
+
 
-    return "\n".join(traverse(soup))
+def extract_dom_structure_from_file(path: str, max_depth: int = 12) -> str:
+    """
+    Same as extract_dom_structure_with_identifiers, streaming the page from disk.
+    """
+    with open(path, encoding="utf-8") as f:
+        return _summarise_chunks(iter(lambda: f.read(FEED_CHUNK_CHARS), ""), max_depth)
+
+
+def dom_structure_from_soup(soup: BeautifulSoup, max_depth: int = 12) -> str:
+    """
+    Same as extract_dom_structure_with_identifiers, for an already parsed document.
+    """
+    summary = DomSummary(max_depth)
+    pending = [(child, False) for child in reversed(list(soup.children))]
+    while pending:
+        node, closing = pending.pop()
+        if closing:
+            if node.name == "th":
+                summary.data(node.get_text())
+            summary.end()
+        elif isinstance(node, Tag):
+            summary.start(node.name, node.attrs)
+            pending.append((node, True))
+            pending.extend((child, False) for child in reversed(list(node.children)))
+    return summary.render()
 
 # Optional debug usage
 if __name__ == "__main__":
-    with open("/tmp/outputs/scraped_content.html", encoding="utf-8") as f:
-        html = f.read()
-    print(extract_dom_structure_with_identifiers(html))
\ No newline at end of file
+    print(extract_dom_structure_from_file("/tmp/outputs/scraped_content.html"))
@@ -6,52 +6,253 @@
 import subprocess
 import tempfile
 import os
+import signal
 import sys
+import threading
+import time
+import uuid
 
-# Directory where user code can read/write files
+from tools.code_kernel import KernelTimeout, get_kernel_manager
+from tools.interpreter_pool import PYTHON_EXECUTABLE, get_interpreter_pool
+from tools.resource_limits import CODE_MAX_FILE_MB, CODE_MEMORY_MB, apply_limits, execution_limits, process_cpu_sec
+from utils.workspace import Workspace, default_workspace
+
+# Default directory where user code can read/write files
 OUTPUT_DIR = "/tmp/outputs"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 MAX_TIMEOUT_SEC = 30  # hard max timeout enforced internally
+READ_CHUNK_BYTES = 65536
+OUTPUT_MAX_BYTES = int(os.environ.get("CODE_OUTPUT_MAX_BYTES", "32768"))  # per stream returned to the LLM (head + tail)
+SPILL_MAX_BYTES = CODE_MAX_FILE_MB * 1024 * 1024  # the full-output file stops growing here
+
+# Totals over every execution in this process, served by GET /stats
+execution_stats = {
+    "executions": 0,
+    "by_status": {},
+    "wall_sec_total": 0.0,
+    "cpu_sec_total": 0.0,
+    "max_peak_rss_mb": 0.0,
+    "output_bytes_total": 0,
+}
+_stats_lock = threading.Lock()
 
-def run_code_with_timeout(code: str, timeout_sec: int = 15) -> str:
+def record_execution(status: str, metrics: dict):
+    with _stats_lock:
+        execution_stats["executions"] += 1
+        execution_stats["by_status"][status] = execution_stats["by_status"].get(status, 0) + 1
+        execution_stats["wall_sec_total"] = round(execution_stats["wall_sec_total"] + metrics["wall_sec"], 3)
+        execution_stats["cpu_sec_total"] = round(execution_stats["cpu_sec_total"] + metrics["cpu_sec"], 3)
+        execution_stats["max_peak_rss_mb"] = max(execution_stats["max_peak_rss_mb"], metrics["peak_rss_mb"])
+        execution_stats["output_bytes_total"] += metrics["output_bytes"]
+    print(
+        f"execute_code: {status} wall={metrics['wall_sec']}s cpu={metrics['cpu_sec']}s "
+        f"peak_rss={metrics['peak_rss_mb']}MB output={metrics['output_bytes']}B"
+    )
+
+class BoundedCapture:
     """
-    Runs given Python code safely in a subprocess with a timeout.
-    Returns stdout or error message.
+    Captures a byte stream in bounded memory: the first and last max_bytes / 2 are kept.
+    Once the stream outgrows max_bytes, everything (so far and from then on, up to
+    SPILL_MAX_BYTES) is also written to spill_path so the full output is not lost.
     """
-    # Cap timeout to MAX_TIMEOUT_SEC no matter what
+
+    def __init__(self, max_bytes: int = OUTPUT_MAX_BYTES, spill_path: str = None):
+        self.half = max_bytes // 2
+        self.spill_path = spill_path
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self.spilled = 0
+        self._spill = None
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        if self._spill is None and self.spill_path and self.total > 2 * self.half:
+            # Nothing has been dropped yet: head + tail is the whole stream so far
+            self._spill = open(self.spill_path, "wb")
+            self._write_spill(bytes(self.head) + bytes(self.tail))
+        if self._spill is not None:
+            self._write_spill(data)
+
+        room = self.half - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        self.tail += data
+        if len(self.tail) > self.half:
+            del self.tail[:len(self.tail) - self.half]
+
+    def _write_spill(self, data: bytes):
+        data = data[:SPILL_MAX_BYTES - self.spilled]
+        if data:
+            self._spill.write(data)
+            self.spilled += len(data)
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+
+    def result(self) -> dict:
+        """
+        {"head", "tail", "total", "file"} with text decoded; tail is empty unless truncated.
+        """
+        truncated = self.total > len(self.head) + len(self.tail)
+        return {
+            "head": self.head.decode("utf-8", errors="replace") + ("" if truncated else self.tail.decode("utf-8", errors="replace")),
+            "tail": self.tail.decode("utf-8", errors="replace") if truncated else "",
+            "total": self.total,
+            "file": self.spill_path if self._spill is not None else None,
+        }
+
+def format_capture(capture: dict) -> str:
+    """
+    The captured text, with a note where the middle of an oversized stream was cut.
+    """
+    if not capture["tail"]:
+        return capture["head"]
+    saved = f"; full output saved to {capture['file']}" if capture["file"] else ""
+    return (
+        f"{capture['head']}\n... [output truncated: {capture['total']} bytes in total, showing the first "
+        f"{len(capture['head'])} and last {len(capture['tail'])} characters{saved}] ...\n{capture['tail']}"
+    )
+
+def spill_paths(cwd: str) -> tuple[str, str]:
+    token = uuid.uuid4().hex[:8]
+    return (
+        os.path.join(cwd, f"execute_code_{token}.stdout.txt"),
+        os.path.join(cwd, f"execute_code_{token}.stderr.txt"),
+    )
+
+def clamp_timeout(timeout_sec: int) -> int:
     if timeout_sec > MAX_TIMEOUT_SEC:
-        timeout_sec = MAX_TIMEOUT_SEC
+        return MAX_TIMEOUT_SEC
     if timeout_sec <= 0:
-        timeout_sec = 15  # default fallback timeout
+        return 15  # default fallback timeout
+    return timeout_sec
+
+def limit_error(stderr: str) -> str | None:
+    """
+    Which resource limit a failed run's traceback points at, if any.
+    """
+    if "MemoryError" in stderr:
+        return f"memory limit ({CODE_MEMORY_MB} MB) exceeded"
+    if "File too large" in stderr:
+        return f"file size limit ({CODE_MAX_FILE_MB} MB) exceeded"
+    return None
+
+def collect_process(proc: subprocess.Popen, job: bytes, timeout_sec: int, cwd: str) -> tuple[dict, dict, int, object, bool]:
+    """
+    Feeds the job (if any) to the process, streams its output through BoundedCaptures
+    (spilling to files in cwd) and reaps it with wait4 so its resource usage is available.
+    Kills it after timeout_sec.
+    Returns (stdout capture, stderr capture, exit code, rusage, timed_out).
+    """
+    stdout_path, stderr_path = spill_paths(cwd)
+    captures = [BoundedCapture(spill_path=stdout_path), BoundedCapture(spill_path=stderr_path)]
+
+    def drain(stream, capture):
+        for chunk in iter(lambda: stream.read1(READ_CHUNK_BYTES), b""):
+            capture.write(chunk)
+
+    readers = [
+        threading.Thread(target=drain, args=(proc.stdout, captures[0]), daemon=True),
+        threading.Thread(target=drain, args=(proc.stderr, captures[1]), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    if job is not None:
+        try:
+            proc.stdin.write(job)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+
+    reaped = {}
+    def reap():
+        _, reaped["status"], reaped["rusage"] = os.wait4(proc.pid, 0)
+
+    waiter = threading.Thread(target=reap, daemon=True)
+    waiter.start()
+    waiter.join(timeout_sec)
+    timed_out = waiter.is_alive()
+    if timed_out:
+        # os.kill rather than proc.kill: Popen would poll (and could reap) the child itself
+        os.kill(proc.pid, signal.SIGKILL)
+        waiter.join()
+    proc.returncode = os.waitstatus_to_exitcode(reaped["status"])
+
+    for reader in readers:
+        reader.join(1.0)  # a leftover grandchild may hold the pipe open
+    for capture in captures:
+        capture.close()
+    return captures[0].result(), captures[1].result(), proc.returncode, reaped["rusage"], timed_out
+
+def run_code(code: str, timeout_sec: int = 15, cwd: str = OUTPUT_DIR) -> dict:
+    """
+    Runs given Python code safely in a subprocess with a timeout and resource limits
+    (CPU time, address space, file size, processes; see tools.resource_limits).
+    The code runs (and its temp file lives) in `cwd`, in a pre-started interpreter from
+    the warm pool when one is available (CODE_POOL_SIZE=0 always starts a cold one).
+    Output beyond CODE_OUTPUT_MAX_BYTES per stream is cut to its head and tail and the
+    full stream saved next to the code (see BoundedCapture).
+    Returns {"status": "ok" | "error" | "timeout" | "limit", "output": stdout or error message,
+    "truncated": bool, "metrics": {"wall_sec", "cpu_sec", "peak_rss_mb", "output_bytes"}}.
+    """
+    # Cap timeout to MAX_TIMEOUT_SEC no matter what
+    timeout_sec = clamp_timeout(timeout_sec)
 
     # If code contains escaped newlines, convert them to real newlines
     if "\\n" in code:
         code = code.encode().decode("unicode_escape")
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", dir=OUTPUT_DIR, delete=False) as tmp_file:
+    os.makedirs(cwd, exist_ok=True)
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", dir=cwd, delete=False) as tmp_file:
         tmp_file.write(code)
         tmp_filename = tmp_file.name
 
     try:
-        proc = subprocess.Popen(
-            ["/usr/local/bin/python", "-I", tmp_filename],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=OUTPUT_DIR,
-        )
-
-        try:
-            stdout, stderr = proc.communicate(timeout=timeout_sec)
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return "[Error] Code execution timed out."
+        limits = execution_limits(cpu_sec=timeout_sec)
+        pool = get_interpreter_pool()
+        started = time.perf_counter()
+        proc = pool.acquire()
+        job = None
+        cpu_before = 0.0
+        if proc is not None:
+            job = pool.job(tmp_filename, cwd, limits)
+            # CPU already spent importing the preloaded modules is not this snippet's
+            cpu_before = process_cpu_sec(proc.pid)
+        else:
+            proc = subprocess.Popen(
+                [PYTHON_EXECUTABLE, "-I", tmp_filename],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cwd,
+                preexec_fn=lambda: apply_limits(limits),
+            )
 
-        if proc.returncode != 0:
-            return f"[Error] Runtime error:\n{stderr.strip()}"
+        stdout_capture, stderr_capture, exit_code, rusage, timed_out = collect_process(proc, job, timeout_sec, cwd)
+        metrics = {
+            "wall_sec": round(time.perf_counter() - started, 3),
+            "cpu_sec": round(max(0.0, rusage.ru_utime + rusage.ru_stime - cpu_before), 3),
+            "peak_rss_mb": round(rusage.ru_maxrss / 1024, 1),
+            "output_bytes": stdout_capture["total"] + stderr_capture["total"],
+        }
+        truncated = bool(stdout_capture["tail"] or stderr_capture["tail"])
+        stdout = format_capture(stdout_capture)
+        stderr = format_capture(stderr_capture)
 
-        return stdout.strip() or "[No output from code.]"
+        if timed_out:
+            status, output = "timeout", "[Error] Code execution timed out."
+        elif exit_code == -signal.SIGXCPU or (exit_code == -signal.SIGKILL and metrics["cpu_sec"] >= timeout_sec):
+            status, output = "limit", f"[Error] CPU time limit ({timeout_sec} s) exceeded."
+        elif exit_code != 0:
+            reason = limit_error(stderr)
+            status = "limit" if reason else "error"
+            output = f"[Error] Runtime error{f' ({reason})' if reason else ''}:\n{stderr.strip()}"
+        else:
+            status, output = "ok", stdout.strip() or "[No output from code.]"
 
     finally:
         try:
@@ -59,15 +260,99 @@ def run_code_with_timeout(code: str, timeout_sec: int = 15) -> str:
         except Exception:
             pass
 
-def execute_code(code: str, timeout_sec: int = 15) -> str:
+    record_execution(status, metrics)
+    return {"status": status, "output": output, "truncated": truncated, "metrics": metrics}
+
+def run_code_with_timeout(code: str, timeout_sec: int = 15, cwd: str = OUTPUT_DIR) -> str:
+    """
+    Runs given Python code safely in a subprocess with a timeout.
+    Returns stdout or error message.
+    """
+    return run_code(code, timeout_sec, cwd)["output"]
+
+def run_code_in_session(code: str, session_id: str, timeout_sec: int = 15, cwd: str = OUTPUT_DIR) -> dict:
+    """
+    Runs code in the session's persistent kernel: variables from earlier calls in the same
+    conversation are still defined. Same result format as run_code; peak_rss_mb is the
+    kernel's high-water mark so far.
+    """
+    timeout_sec = clamp_timeout(timeout_sec)
+    if "\\n" in code:
+        code = code.encode().decode("unicode_escape")
+
+    manager = get_kernel_manager()
+    kernel = manager.get(session_id)
+    with kernel.lock:
+        started = time.perf_counter()
+        cpu_before = kernel.cpu_sec()
+        reply = None
+        note = ""
+        if kernel.notice:
+            # This cell runs in a fresh kernel; earlier cells' variables are gone
+            note = f"\n[Kernel was restarted ({kernel.notice}); state from earlier cells is lost, re-run the code that defines it.]"
+            kernel.notice = None
+        try:
+            reply = kernel.run(code, cwd, timeout_sec, spill_paths(cwd), OUTPUT_MAX_BYTES, SPILL_MAX_BYTES)
+            status = "ok" if reply["ok"] else "error"
+        except KernelTimeout:
+            status = "timeout"
+            if kernel.is_alive():
+                output = "[Error] Code execution timed out (session variables are kept)."
+            else:
+                output = "[Error] Code execution timed out. The session was restarted; its variables are lost."
+        except RuntimeError as e:
+            status, output = "error", f"[Error] {e}"
+        except (BrokenPipeError, ValueError) as e:
+            # Dead kernel or a corrupted protocol line: the kernel cannot be trusted any more
+            kernel.close()
+            status = "error"
+            output = f"[Error] The code session failed ({type(e).__name__}) and was restarted; its variables are lost."
+
+        metrics = {
+            "wall_sec": round(time.perf_counter() - started, 3),
+            "cpu_sec": round(max(0.0, kernel.cpu_sec() - cpu_before), 3),
+            "peak_rss_mb": round(kernel.peak_rss_mb(), 1),
+            "output_bytes": reply["stdout"]["total"] + reply["stderr"]["total"] if reply else 0,
+        }
+        if not kernel.is_alive():
+            manager.restart(session_id)
+        elif kernel.rss_mb() > kernel.memory_mb:
+            manager.restart(session_id)
+            note = f"\n[Session restarted: memory use exceeded {kernel.memory_mb} MB; its variables are lost.]"
+
+    truncated = False
+    if reply is not None:
+        truncated = bool(reply["stdout"]["tail"] or reply["stderr"]["tail"])
+        stdout = format_capture(reply["stdout"])
+        stderr = format_capture(reply["stderr"])
+        if reply["ok"]:
+            output = stdout.strip() or "[No output from code.]"
+        else:
+            reason = limit_error(stderr)
+            status = "limit" if reason else "error"
+            output = f"[Error] Runtime error{f' ({reason})' if reason else ''}:\n{stderr.strip()}"
+    record_execution(status, metrics)
+    return {"status": status, "output": output + note, "truncated": truncated, "metrics": metrics}
+
+def execute_code(code: str, timeout_sec: int = 15, session: bool = False, workspace: Workspace = None) -> dict:
     """
-    Executes raw multi-line Python code safely.
+    Executes raw multi-line Python code safely inside the workspace's outputs directory.
+    '/tmp/uploads' and '/tmp/outputs' paths in the code are mapped onto the workspace.
+    With session=True the code runs in the conversation's persistent kernel, so variables
+    and loaded data carry over to later session calls.
+    Returns {"status", "output", "truncated", "metrics"} (see run_code).
     """
     forbidden = [
         "import os", "import sys", "import subprocess", "open(", "eval(", "exec(",
         "socket", "threading", "multiprocessing"
     ]
     if any(f in code for f in forbidden):
-        return "[Error] Code contains forbidden operations."
+        return {"status": "rejected", "output": "[Error] Code contains forbidden operations.", "truncated": False, "metrics": None}
 
-    return run_code_with_timeout(code, timeout_sec)
\ No newline at end of file
+    workspace = workspace or default_workspace()
+    if session:
+        result = run_code_in_session(workspace.to_physical(code), workspace.root, timeout_sec, cwd=workspace.outputs)
+    else:
+        result = run_code(workspace.to_physical(code), timeout_sec, cwd=workspace.outputs)
+    result["output"] = workspace.to_logical(result["output"])
+    return result
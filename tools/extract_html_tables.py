@@ -0,0 +1,246 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "beautifulsoup4",
+#   "lxml",
+#   "pandas",
+#   "pyarrow",
+# ]
+# ///
+
+import os
+import re
+from typing import Dict, Any
+import pandas as pd  # type: ignore
+from bs4 import Tag  # type: ignore
+from tools.html_cache import parsed_html_cache
+from utils.workspace import Workspace, default_workspace
+
+OUTPUT_DIR = "/tmp/outputs"
+MAX_TABLES = 20  # tables written per call; the rest are only counted
+MAX_SPAN = 1000  # rowspan/colspan values beyond this are treated as 1 (broken markup)
+NUMERIC_SHARE = 0.9  # a column becomes numeric when this share of its non-empty cells parse
+PREVIEW_ROWS = 3
+
+FOOTNOTE = re.compile(r"\[(?:\d+|[a-z]|note \d+|citation needed)\]", re.IGNORECASE)
+NUMBER_NOISE = re.compile(r"[,\s$€£¥₹%]|^\+")
+MISSING = {"", "-", "–", "—", "?", "n/a", "na", "none", "null", "nan"}  # cells counted as empty
+
+
+def table_rows(table: Tag) -> list[list[Tag]]:
+    """
+    The rows of a table (including thead/tbody/tfoot) without descending into nested tables.
+    """
+    rows = []
+    for row in table.find_all("tr"):
+        if row.find_parent("table") is table:
+            rows.append(row.find_all(["td", "th"], recursive=False))
+    return rows
+
+
+def cell_text(cell: Tag) -> str:
+    return FOOTNOTE.sub("", " ".join(cell.get_text(" ").split())).strip()
+
+
+def span(cell: Tag, name: str) -> int:
+    try:
+        value = int(str(cell.get(name, 1)).strip().rstrip(";"))
+    except ValueError:
+        return 1
+    return value if 1 <= value <= MAX_SPAN else 1
+
+
+def table_grid(rows: list[list[Tag]]) -> tuple[list[list[str]], int]:
+    """
+    Expands rowspan/colspan into a rectangular grid of cell texts.
+    Returns the grid and the number of leading header rows (thead rows or rows made only of <th>).
+    """
+    grid = []
+    pending = {}  # (row, col) -> text carried down by a rowspan
+    header_rows = 0
+    in_header = True
+    for r, cells in enumerate(rows):
+        line = []
+        col = 0
+        for cell in cells:
+            while (r, col) in pending:
+                line.append(pending.pop((r, col)))
+                col += 1
+            text = cell_text(cell)
+            for c in range(span(cell, "colspan")):
+                line.append(text)
+                for below in range(1, span(cell, "rowspan")):
+                    pending[(r + below, col + c)] = text
+            col += span(cell, "colspan")
+        while (r, col) in pending:
+            line.append(pending.pop((r, col)))
+            col += 1
+        grid.append(line)
+
+        is_header = bool(cells) and (all(c.name == "th" for c in cells) or cells[0].find_parent("thead") is not None)
+        if in_header and is_header:
+            header_rows += 1
+        else:
+            in_header = False
+
+    width = max((len(line) for line in grid), default=0)
+    return [line + [""] * (width - len(line)) for line in grid], header_rows
+
+
+def column_names(header: list[list[str]], width: int) -> list[str]:
+    """
+    Joins multi-row headers ("Population 2020"), fills blanks and de-duplicates names.
+    """
+    names = []
+    seen = {}
+    for c in range(width):
+        parts = []
+        for line in header:
+            if line[c] and line[c] not in parts:
+                parts.append(line[c])
+        name = " ".join(parts) or f"column_{c + 1}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return names
+
+
+def to_numeric(column: pd.Series) -> pd.Series:
+    """
+    Parses "1,234", "$5.6", "12%", "−3" etc. when nearly every non-empty cell is a number.
+    """
+    missing = column.str.lower().isin(MISSING)
+    values = column[~missing]
+    if values.empty:
+        return column
+    cleaned = column.mask(missing).str.replace("−", "-", regex=False).str.replace(NUMBER_NOISE, "", regex=True)
+    parsed = pd.to_numeric(cleaned, errors="coerce")
+    if parsed[values.index].notna().mean() < NUMERIC_SHARE:
+        return column
+    if parsed.dropna().mod(1).eq(0).all():
+        return parsed.astype("Int64")
+    return parsed
+
+
+def table_frame(table: Tag) -> pd.DataFrame:
+    grid, header_rows = table_grid(table_rows(table))
+    if not grid or not grid[0]:
+        return pd.DataFrame()
+    if header_rows == len(grid):  # only headers: treat the first row as the header
+        header_rows = 1
+    df = pd.DataFrame(grid[header_rows:], columns=column_names(grid[:header_rows], len(grid[0])))
+    # Drop columns and rows that are entirely empty
+    df = df.loc[:, (df != "").any(axis=0)]
+    df = df[(df != "").any(axis=1)].reset_index(drop=True)
+    for name in df.columns:
+        df[name] = to_numeric(df[name])
+    return df
+
+
+def preview_rows(df: pd.DataFrame, rows: int = PREVIEW_ROWS) -> list[list]:
+    """
+    First rows as JSON-safe strings; missing values become "" (astype(str) keeps NaN as a float).
+    """
+    return df.head(rows).astype(object).fillna("").astype(str).values.tolist()
+
+
+def save_frame(df: pd.DataFrame, path: str, output_format: str) -> str:
+    if output_format == "parquet":
+        try:
+            df.to_parquet(path + ".parquet", index=False)
+            return path + ".parquet"
+        except ImportError:  # no parquet engine installed
+            pass
+    df.to_csv(path + ".csv", index=False)
+    return path + ".csv"
+
+
+def extract_html_tables(
+    file_name: str,
+    js_selector: str = None,
+    table_index: int = None,
+    output_format: str = "csv",
+    workspace: Workspace = None,
+) -> Dict[str, Any]:
+    """
+    Extracts tables from a saved HTML file straight into CSV/Parquet files in the outputs directory.
+
+    - js_selector narrows the search to matching tables (or tables inside matching elements).
+    - table_index picks one table (0-based) among those found.
+    - Headers are flattened and de-duplicated; numeric-looking columns are parsed as numbers.
+    Returns one schema summary per written table (file, rows, column names and dtypes, preview).
+    """
+    workspace = workspace or default_workspace()
+
+    # Resolve file path (logical /tmp/... paths map onto the workspace)
+    file_name = workspace.to_physical(file_name)
+    if not os.path.isabs(file_name):
+        file_name = os.path.join(workspace.outputs, file_name)
+
+    if not os.path.exists(file_name):
+        return {"error": f"File not found: {workspace.to_logical(file_name)}"}
+
+    try:
+        soup = parsed_html_cache.get(file_name)
+    except UnicodeDecodeError:
+        return {"error": "Unable to decode HTML file with UTF-8 encoding."}
+
+    if js_selector:
+        try:
+            matches = soup.select(js_selector)
+        except Exception as e:
+            return {"error": f"Invalid selector '{js_selector}': {e}"}
+        tables = []
+        seen = set()
+        for element in matches:
+            for table in [element] if element.name == "table" else element.find_all("table"):
+                if id(table) not in seen:
+                    seen.add(id(table))
+                    tables.append(table)
+    else:
+        tables = soup.find_all("table")
+
+    if not tables:
+        return {"message": "No tables found" + (f" for selector '{js_selector}'." if js_selector else " in the page.")}
+
+    if table_index is not None:
+        if not 0 <= table_index < len(tables):
+            return {"error": f"table_index {table_index} out of range: {len(tables)} tables found."}
+        candidates = [(table_index, tables[table_index])]
+    else:
+        candidates = list(enumerate(tables))
+
+    os.makedirs(workspace.outputs, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    # Files are named by the table's position in the page, so different selectors never collide
+    page_position = {id(table): i for i, table in enumerate(soup.find_all("table"))}
+    summaries = []
+    skipped = 0
+    for index, table in candidates:
+        df = table_frame(table)
+        # Without an explicit index, skip layout tables (a single row or column)
+        if df.empty or (table_index is None and (len(df) < 2 or len(df.columns) < 2)):
+            skipped += 1
+            continue
+        if len(summaries) == MAX_TABLES:
+            skipped += 1
+            continue
+        path = save_frame(df, os.path.join(workspace.outputs, f"{stem}_table_{page_position[id(table)]}"), output_format)
+        summaries.append({
+            "table_index": index,
+            "file_path": os.path.join(OUTPUT_DIR, os.path.basename(path)),
+            "rows": len(df),
+            "columns": {name: str(dtype) for name, dtype in df.dtypes.items()},
+            "preview": preview_rows(df),
+        })
+
+    if not summaries:
+        return {"message": f"Found {len(tables)} tables but none with at least 2 rows and 2 columns; pass table_index to extract one anyway."}
+
+    result = {"tables": summaries}
+    if skipped:
+        result["message"] = f"{skipped} other tables were skipped (layout tables or over the limit of {MAX_TABLES})."
+    return result
+
+
+if __name__ == "__main__":
+    print(extract_html_tables("scraped_content.html"))
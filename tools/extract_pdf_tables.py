@@ -0,0 +1,153 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "PyMuPDF",
+#   "pandas",
+#   "pyarrow",
+# ]
+# ///
+
+import json
+import os
+from typing import Dict, Any
+import fitz  # type: ignore # PyMuPDF
+import pandas as pd  # type: ignore
+
+from tools.extract_html_tables import MAX_TABLES, column_names, preview_rows, save_frame, to_numeric
+from tools.read_pdf_file import PARALLEL_MIN_PAGES, PDF_WORKERS, parse_pages, run_in_workers
+from utils.content_store import file_digest, get_artifact_cache
+from utils.workspace import Workspace, default_workspace
+
+OUTPUT_DIR = "/tmp/outputs"
+
+# See read_pdf_file.PAGE_WORKER for the worker protocol
+TABLES_WORKER = """
+import json, sys
+import fitz
+from tools.extract_pdf_tables import page_tables
+with fitz.open(sys.argv[1]) as doc:
+    found = [page_tables(doc[i]) for i in range(int(sys.argv[2]), int(sys.argv[3]))]
+sys.stdout.write("\\n" + json.dumps(found) + "\\n")
+"""
+
+
+def page_tables(page) -> list[dict]:
+    """
+    Tables PyMuPDF detects on a page, as {"header": [...], "rows": [[...], ...]} with
+    the header row removed from rows and cell text whitespace-normalised.
+    """
+    tables = []
+    for table in page.find_tables().tables:
+        rows = [[" ".join((cell or "").split()) for cell in row] for row in table.extract()]
+        header = [" ".join((name or "").split()) for name in table.header.names]
+        if not table.header.external and rows:
+            rows = rows[1:]
+        tables.append({"header": header, "rows": rows})
+    return tables
+
+
+def table_frame(table: dict) -> pd.DataFrame:
+    width = max([len(table["header"])] + [len(row) for row in table["rows"]])
+    header = table["header"] + [""] * (width - len(table["header"]))
+    rows = [row + [""] * (width - len(row)) for row in table["rows"]]
+    df = pd.DataFrame(rows, columns=column_names([header], width), dtype=object)
+    # Drop columns and rows that are entirely empty
+    df = df.loc[:, (df != "").any(axis=0)]
+    df = df[(df != "").any(axis=1)].reset_index(drop=True)
+    for name in df.columns:
+        df[name] = to_numeric(df[name].astype(str))
+    return df
+
+
+def tables_by_page(file_path: str, doc, indices: list[int]) -> dict:
+    """
+    {page index: tables on that page}, through the per-page artifact cache; uncached pages
+    are processed in parallel worker processes for large ranges.
+    """
+    cache = get_artifact_cache()
+    digest = file_digest(file_path)
+    kind = "pdf_tables_{:05d}.json".format
+    found = {}
+    for index in indices:
+        cached = cache.get_text(digest, kind(index + 1))
+        if cached is not None:
+            found[index] = json.loads(cached)
+
+    missing = [i for i in indices if i not in found]
+    if len(missing) >= PARALLEL_MIN_PAGES and PDF_WORKERS > 1:
+        extracted = run_in_workers(TABLES_WORKER, file_path, missing)
+    else:
+        extracted = {index: page_tables(doc[index]) for index in missing}
+    for index, tables in extracted.items():
+        if index in missing:  # worker batches may span pages that were already cached
+            cache.put_text(digest, kind(index + 1), json.dumps(tables))
+            found[index] = tables
+    return found
+
+
+def extract_pdf_tables(
+    file_name: str,
+    directory: str = "/tmp/uploads",
+    pages: str = None,
+    output_format: str = "csv",
+    workspace: Workspace = None,
+) -> Dict[str, Any]:
+    """
+    Detects tables in a PDF (PyMuPDF find_tables) and writes each to a CSV/Parquet file in the outputs directory.
+
+    - pages: 1-based pages/ranges to scan, e.g. "3-7,12" (default: the whole document).
+    - Headers are flattened and de-duplicated; numeric-looking columns are parsed as numbers.
+    Returns one summary per written table (page, file, rows, column names and dtypes, preview).
+    """
+    workspace = workspace or default_workspace()
+    base = workspace.resolve(directory)
+    if not base:
+        return {"error": f"Unsupported directory '{directory}'. Must be '/tmp/uploads' or '/tmp/outputs'."}
+    file_path = os.path.join(base, file_name)
+    if not os.path.isfile(file_path):
+        return {"error": f"File not found: {workspace.to_logical(file_path)}"}
+
+    try:
+        with fitz.open(file_path) as doc:
+            page_count = len(doc)
+            try:
+                indices = sorted(parse_pages(pages, page_count)) if pages else list(range(page_count))
+            except ValueError as e:
+                return {"error": f"{e}. Use e.g. '1-3,7' (document has {page_count} pages)."}
+            found = tables_by_page(file_path, doc, indices)
+    except Exception as e:
+        return {"error": f"Could not read PDF '{file_name}': {e}"}
+
+    os.makedirs(workspace.outputs, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    summaries = []
+    skipped = 0
+    total = 0
+    for index in indices:
+        for position, table in enumerate(found.get(index, [])):
+            total += 1
+            df = table_frame(table)
+            if df.empty or len(summaries) == MAX_TABLES:
+                skipped += 1
+                continue
+            path = save_frame(df, os.path.join(workspace.outputs, f"{stem}_p{index + 1}_table_{position}"), output_format)
+            summaries.append({
+                "page": index + 1,
+                "file_path": os.path.join(OUTPUT_DIR, os.path.basename(path)),
+                "rows": len(df),
+                "columns": {name: str(dtype) for name, dtype in df.dtypes.items()},
+                "preview": preview_rows(df),
+            })
+
+    scanned = f"{len(indices)} of {page_count} pages"
+    if not summaries:
+        return {"message": f"No tables detected in {scanned}. Try read_pdf_file to inspect the text instead."}
+
+    result = {"tables": summaries, "pages_scanned": scanned}
+    if skipped:
+        result["message"] = f"{skipped} of {total} tables were skipped (empty or over the limit of {MAX_TABLES}); narrow 'pages' to reach them."
+    return result
+
+
+if __name__ == "__main__":
+    print(extract_pdf_tables("example.pdf"))
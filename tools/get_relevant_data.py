@@ -2,44 +2,50 @@
 # requires-python = ">=3.11"
 # dependencies = [
 #   "beautifulsoup4",
+#   "lxml",
 #   "typing",
 # ]
 # ///
 
 import os
-from bs4 import BeautifulSoup  # type: ignore
 from typing import Dict, Any
-from tools.dom_structure import extract_dom_structure_with_identifiers
+from tools.dom_structure import dom_structure_from_soup, extract_dom_structure_from_file
+from tools.html_cache import parsed_html_cache
+from utils.content_store import file_digest, get_artifact_cache
+from utils.workspace import Workspace, default_workspace
 
 MAX_WORDS = 1500
 OUTPUT_DIR = "/tmp/outputs"
 OUTPUT_FILE = "extracted_relevant_data.txt"
 
 
-def get_relevant_data(file_name: str, js_selector: str = None, max_depth: int = 10) -> Dict[str, Any]:
+def get_relevant_data(file_name: str, js_selector: str = None, max_depth: int = 10, workspace: Workspace = None) -> Dict[str, Any]:
     """
     Extract relevant data from a saved HTML file using an optional CSS/JS selector.
     
     - If js_selector is provided, returns matching text content.
     - If no selector or no matches, returns the DOM structure (max depth capped at 15).
     - If extracted text is too large (>MAX_WORDS), saves it to a file instead.
+    The parsed page is cached (per path + mtime), so retrying selectors does not re-parse it;
+    DOM summaries are cached by file content.
     """
-    # Resolve file path
-    if not os.path.isabs(file_name) and not file_name.startswith(OUTPUT_DIR):
-        file_name = os.path.join(OUTPUT_DIR, file_name)
+    workspace = workspace or default_workspace()
 
-    if not os.path.exists(file_name):
-        return {"error": f"File not found: {file_name}"}
-
-    try:
-        with open(file_name, encoding="utf-8") as f:
-            html = f.read()
-    except UnicodeDecodeError:
-        return {"error": "Unable to decode HTML file with UTF-8 encoding."}
+    # Resolve file path (logical /tmp/... paths map onto the workspace)
+    file_name = workspace.to_physical(file_name)
+    if not os.path.isabs(file_name):
+        file_name = os.path.join(workspace.outputs, file_name)
 
-    soup = BeautifulSoup(html, "html.parser")
+    if not os.path.exists(file_name):
+        return {"error": f"File not found: {workspace.to_logical(file_name)}"}
 
+    soup = None
     if js_selector:
+        try:
+            soup = parsed_html_cache.get(file_name)
+        except UnicodeDecodeError:
+            return {"error": "Unable to decode HTML file with UTF-8 encoding."}
+
         try:
             elements = soup.select(js_selector)
         except Exception as e:
@@ -52,13 +58,13 @@ def get_relevant_data(file_name: str, js_selector: str = None, max_depth: int =
                 word_count = len(combined_text.split())
 
                 if word_count > MAX_WORDS:
-                    os.makedirs(OUTPUT_DIR, exist_ok=True)
-                    save_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
+                    os.makedirs(workspace.outputs, exist_ok=True)
+                    save_path = os.path.join(workspace.outputs, OUTPUT_FILE)
                     with open(save_path, "w", encoding="utf-8") as out_f:
                         out_f.write(combined_text)
                     return {
                         "message": f"Extracted text too large (~{word_count} words). Saved to file instead.",
-                        "file_path": save_path
+                        "file_path": os.path.join(OUTPUT_DIR, OUTPUT_FILE)
                     }
 
                 return {"data": text_data}
@@ -66,7 +72,16 @@ def get_relevant_data(file_name: str, js_selector: str = None, max_depth: int =
 
     # Cap depth at 15
     max_depth = min(max_depth, 15)
-    dom_structure = extract_dom_structure_with_identifiers(html, max_depth=max_depth)
+    try:
+        # Without a parsed tree at hand, the summary is streamed from the file instead
+        dom_structure = get_artifact_cache().text(
+            file_digest(file_name),
+            f"dom_{max_depth}.txt",
+            lambda: dom_structure_from_soup(soup, max_depth=max_depth) if soup is not None
+            else extract_dom_structure_from_file(file_name, max_depth=max_depth),
+        )
+    except UnicodeDecodeError:
+        return {"error": "Unable to decode HTML file with UTF-8 encoding."}
 
     if dom_structure.strip() == "No HTML content found.":
         return {"message": "HTML file is empty or contains no parseable content."}
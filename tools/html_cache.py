@@ -0,0 +1,105 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "beautifulsoup4",
+#   "lxml",
+# ]
+# ///
+
+import os
+import threading
+from collections import OrderedDict
+from bs4 import BeautifulSoup  # type: ignore
+
+try:
+    import lxml  # type: ignore # noqa: F401
+    HTML_PARSER = "lxml"  # C parser, several times faster than html.parser on large pages
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+HTML_CACHE_ENTRIES = int(os.environ.get("HTML_CACHE_ENTRIES", "8"))
+HTML_CACHE_MAX_MB = int(os.environ.get("HTML_CACHE_MAX_MB", "512"))  # estimated memory of the cached trees
+# A BeautifulSoup tree takes far more memory than its source; measured ~43x with lxml on a
+# table-heavy page (tracemalloc), less on text-heavy ones
+TREE_BYTES_PER_SOURCE_BYTE = 40
+
+
+def tree_bytes(source_bytes: int) -> int:
+    """
+    Estimated memory of the parsed tree of a source file this large.
+    """
+    return source_bytes * TREE_BYTES_PER_SOURCE_BYTE
+
+
+def parse_html(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+class ParsedHtmlCache:
+    """
+    LRU of parsed BeautifulSoup trees keyed by file path, valid while the file's
+    mtime and size are unchanged. Lets the planner try several selectors on the same
+    saved page without re-reading and re-parsing it each time. Bounded by entry count and
+    by estimated tree memory (source size x TREE_BYTES_PER_SOURCE_BYTE).
+
+    Cached trees are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = HTML_CACHE_ENTRIES, max_bytes: int = HTML_CACHE_MAX_MB * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, soup)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> BeautifulSoup:
+        """
+        The parsed tree of an HTML file, from the cache when the file is unchanged.
+        Raises OSError / UnicodeDecodeError like reading the file would.
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        with open(path, encoding="utf-8") as f:
+            soup = parse_html(f.read())
+        self.put(path, soup, stat)
+        return soup
+
+    def put(self, path: str, soup: BeautifulSoup, stat: os.stat_result = None):
+        """
+        Caches a tree already parsed from the file at path (e.g. right after saving it).
+        """
+        path = os.path.realpath(path)
+        stat = stat or os.stat(path)
+        if tree_bytes(stat.st_size) > self.max_bytes:
+            return
+        with self._lock:
+            self._entries[path] = (stat.st_mtime_ns, stat.st_size, soup)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries or self._cached_bytes() > self.max_bytes:
+                self._entries.popitem(last=False)
+
+    def _cached_bytes(self) -> int:
+        return sum(tree_bytes(size) for _, size, _ in self._entries.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "parser": HTML_PARSER,
+                "entries": len(self._entries),
+                "estimated_mb": round(self._cached_bytes() / (1024 * 1024), 1),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+parsed_html_cache = ParsedHtmlCache()
@@ -0,0 +1,155 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = []
+# ///
+
+import atexit
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from collections import deque
+
+PYTHON_EXECUTABLE = "/usr/local/bin/python"
+
+POOL_SIZE = int(os.environ.get("CODE_POOL_SIZE", "2"))  # warm interpreters kept ready (0 disables the pool)
+PRELOAD_MODULES = [
+    name.strip()
+    for name in os.environ.get("CODE_POOL_PRELOAD", "numpy,pandas,matplotlib,matplotlib.pyplot").split(",")
+    if name.strip()
+]
+
+# Runs inside each pooled interpreter: import the heavy libraries while idle, then wait for
+# one job on stdin ({"path", "cwd", "limits"}), apply the resource limits (as
+# tools.resource_limits.apply_limits does), run it like `python -I path` would, and exit.
+BOOTSTRAP = r"""
+import atexit, gc, importlib, json, os, resource, sys, traceback
+os.environ.setdefault("MPLBACKEND", "Agg")
+for _name in json.loads(sys.argv[1]):
+    try:
+        importlib.import_module(_name)
+    except Exception:
+        pass
+_job = json.loads(sys.stdin.readline())
+os.chdir(_job["cwd"])
+_usage = resource.getrusage(resource.RUSAGE_SELF)
+for _limit, (_soft, _hard) in _job["limits"].items():
+    if _limit == "RLIMIT_CPU":
+        _soft, _hard = _soft + int(_usage.ru_utime + _usage.ru_stime), _hard + int(_usage.ru_utime + _usage.ru_stime)
+    resource.setrlimit(getattr(resource, _limit), (_soft, _hard))
+sys.argv = [_job["path"]]
+with open(_job["path"], encoding="utf-8") as _f:
+    _code = compile(_f.read(), _job["path"], "exec")
+del _name, _job, _f, _usage
+_globals = {"__name__": "__main__", "__file__": sys.argv[0], "__builtins__": __builtins__}
+try:
+    exec(_code, _globals)
+except SystemExit:
+    raise
+except BaseException as _e:
+    # Drop this bootstrap frame so the traceback matches a plain `python script.py`
+    traceback.print_exception(type(_e), _e, _e.__traceback__.tb_next)
+    sys.exit(1)
+# Skip the slow interpreter teardown (unloading pandas & co.), after closing what the
+# snippet left open: its objects are freed (flushing files) and atexit hooks run
+_globals.clear()
+gc.collect()
+atexit._run_exitfuncs()
+sys.stdout.flush()
+sys.stderr.flush()
+os._exit(0)
+"""
+
+
+class InterpreterPool:
+    """
+    Keeps POOL_SIZE Python interpreters pre-started with PRELOAD_MODULES imported.
+
+    Each interpreter runs exactly one snippet and then exits, so executions stay as
+    isolated as a fresh `python -I` process; taking one immediately starts its
+    replacement, which warms up in the background while the snippet runs.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, preload: list[str] = PRELOAD_MODULES):
+        self.size = size
+        self.preload = preload
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self.spawned = 0
+        self.warm_runs = 0
+        self.cold_runs = 0
+
+    def _spawn(self) -> subprocess.Popen:
+        self.spawned += 1
+        return subprocess.Popen(
+            [PYTHON_EXECUTABLE, "-I", "-c", BOOTSTRAP, json.dumps(self.preload)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=tempfile.gettempdir(),
+        )
+
+    def fill(self):
+        with self._lock:
+            while len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+
+    def acquire(self) -> subprocess.Popen | None:
+        """
+        Takes a pre-started interpreter (send it a job() line on stdin) and starts its replacement.
+        Returns None when the pool is disabled.
+        """
+        if self.size <= 0:
+            return None
+        with self._lock:
+            proc = None
+            while self._idle and proc is None:
+                candidate = self._idle.popleft()
+                if candidate.poll() is None:
+                    proc = candidate
+            while len(self._idle) < self.size - (proc is None):
+                self._idle.append(self._spawn())
+            if proc is None:
+                proc = self._spawn()
+                self.cold_runs += 1
+            else:
+                self.warm_runs += 1
+            return proc
+
+    @staticmethod
+    def job(path: str, cwd: str, limits: dict) -> bytes:
+        return (json.dumps({"path": path, "cwd": cwd, "limits": limits}) + "\n").encode("utf-8")
+
+    def stats(self) -> dict:
+        with self._lock:
+            ready = sum(proc.poll() is None for proc in self._idle)
+        return {
+            "size": self.size,
+            "ready": ready,
+            "preload": self.preload,
+            "spawned": self.spawned,
+            "warm_runs": self.warm_runs,
+            "cold_runs": self.cold_runs,
+        }
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                proc = self._idle.popleft()
+                proc.kill()
+                proc.wait()
+
+
+_interpreter_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_interpreter_pool() -> InterpreterPool:
+    global _interpreter_pool
+    if _interpreter_pool is None:
+        with _pool_lock:
+            if _interpreter_pool is None:
+                _interpreter_pool = InterpreterPool()
+                atexit.register(_interpreter_pool.close)
+    return _interpreter_pool
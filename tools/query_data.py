@@ -0,0 +1,327 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#   "duckdb",
+# ]
+# ///
+
+import datetime
+import decimal
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Any
+
+from utils.content_store import file_digest, get_artifact_cache
+from utils.workspace import Workspace, default_workspace
+
+try:
+    import duckdb  # type: ignore
+except ImportError:
+    duckdb = None
+
+QUERY_MEMORY_MB = int(os.environ.get("QUERY_MEMORY_MB", "2048"))
+QUERY_THREADS = int(os.environ.get("QUERY_THREADS", "4"))
+MAX_RESULT_ROWS = 200  # hard cap on rows returned to the LLM
+MAX_CELL_CHARS = 200
+MAX_TIMEOUT_SEC = 60
+# CSVs at least this large are queried through a cached Parquet copy (converted in the
+# background the first time a query names them)
+SIDECAR_MIN_MB = int(os.environ.get("QUERY_SIDECAR_MIN_MB", "32"))
+SIDECAR_THREADS = 2
+
+# File extension -> DuckDB table function reading it in place
+FILE_READERS = {
+    ".csv": "read_csv",
+    ".tsv": "read_csv",
+    ".txt": "read_csv",
+    ".parquet": "read_parquet",
+    ".json": "read_json",
+    ".jsonl": "read_json",
+    ".ndjson": "read_json",
+}
+DATABASE_EXTENSIONS = {".db", ".sqlite", ".sqlite3", ".duckdb"}
+SQLITE_MAGIC = b"SQLite format 3\x00"
+
+# Digests of CSVs whose Parquet copy is being converted in the background
+_converting = set()
+_converting_lock = threading.Lock()
+
+# Set when DuckDB's sqlite extension failed to load (e.g. offline), so later calls go straight to sqlite3
+_sqlite_extension_error = None
+
+
+def table_name(file_name: str, taken: set) -> str:
+    """
+    'Sales 2024.csv' -> 'sales_2024'; a '_2' suffix is added if the name is taken.
+    """
+    name = re.sub(r"\W+", "_", os.path.splitext(file_name)[0].lower()).strip("_") or "data"
+    if name[0].isdigit():
+        name = "t_" + name
+    unique, n = name, 1
+    while unique in taken:
+        n += 1
+        unique = f"{name}_{n}"
+    taken.add(unique)
+    return unique
+
+
+def is_sqlite(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    except OSError:
+        return False
+
+
+def find_sources(workspace: Workspace) -> tuple[dict, dict]:
+    """
+    Data files in uploads, then outputs: ({table: path}, {database alias: path}).
+    """
+    files, databases = {}, {}
+    taken = set()
+    for directory in (workspace.uploads, workspace.outputs):
+        for file_name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, file_name)
+            ext = os.path.splitext(file_name)[1].lower()
+            if not os.path.isfile(path):
+                continue
+            if ext in FILE_READERS:
+                files[table_name(file_name, taken)] = path
+            elif ext in DATABASE_EXTENSIONS:
+                databases[table_name(file_name, taken)] = path
+    return files, databases
+
+
+def parquet_sidecar(file_path: str) -> str | None:
+    """
+    A Parquet copy of a CSV file, converted once per file content and kept in the
+    artifact cache. None when DuckDB is unavailable or cannot parse the file.
+    """
+    if duckdb is None:
+        return None
+    cache = get_artifact_cache()
+    digest = file_digest(file_path)
+    path = cache.get(digest, "csv.parquet")
+    if path is not None:
+        return path
+    try:
+        with cache.writing(digest, "csv.parquet") as tmp_path:
+            con = duckdb.connect(config={"threads": SIDECAR_THREADS})
+            try:
+                con.execute(
+                    "COPY (SELECT * FROM read_csv(?)) TO '" + tmp_path.replace("'", "''") + "' (FORMAT parquet)",
+                    [file_path],
+                )
+            finally:
+                con.close()
+    except duckdb.Error:
+        return None
+    return cache.path(digest, "csv.parquet")
+
+
+def cached_sidecar(file_path: str) -> str | None:
+    """
+    The Parquet copy of a CSV file if it has already been converted. Otherwise starts the
+    conversion in a background thread (once per file content) and returns None, so the
+    current query reads the CSV directly and stays within its timeout.
+    """
+    if duckdb is None:
+        return None
+    digest = file_digest(file_path)
+    path = get_artifact_cache().get(digest, "csv.parquet")
+    if path is not None:
+        return path
+    with _converting_lock:
+        if digest in _converting:
+            return None
+        _converting.add(digest)
+
+    def convert():
+        try:
+            parquet_sidecar(file_path)
+        finally:
+            with _converting_lock:
+                _converting.discard(digest)
+
+    threading.Thread(target=convert, name="csv-sidecar", daemon=True).start()
+    return None
+
+
+def referenced_names(sql: str) -> set:
+    """
+    Lower-cased identifiers (bare or double-quoted) appearing in a statement; a superset
+    of the tables it reads, used to decide which CSVs are worth converting.
+    """
+    names = set()
+    for quoted, bare in re.findall(r'"((?:[^"]|"")+)"|(\w+)', sql):
+        names.add((quoted.replace('""', '"') or bare).lower())
+    return names
+
+
+def sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def json_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    text = str(value)
+    return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS - 1] + "…"
+
+
+def duckdb_connection(workspace: Workspace, files: dict, databases: dict, referenced: set = frozenset()) -> tuple[Any, dict]:
+    """
+    An in-memory DuckDB connection with a view per data file and the databases attached
+    read-only, then locked down to reading the workspace directories only. Large CSVs
+    among the referenced names are read through their Parquet sidecar once it exists; views are only
+    scanned when a query uses them, so other files cost nothing.
+    Returns the connection and {alias: error} for databases that could not be attached.
+    """
+    con = duckdb.connect(config={"memory_limit": f"{QUERY_MEMORY_MB}MB", "threads": QUERY_THREADS})
+    directories = [workspace.uploads.rstrip("/") + "/", workspace.outputs.rstrip("/") + "/"]
+    for name, path in files.items():
+        reader = FILE_READERS[os.path.splitext(path)[1].lower()]
+        if name in referenced and reader == "read_csv" and os.path.getsize(path) >= SIDECAR_MIN_MB * 1024 * 1024:
+            sidecar = cached_sidecar(path)
+            if sidecar is not None:
+                reader, path = "read_parquet", sidecar
+                directories.append(os.path.dirname(sidecar) + "/")
+        con.execute(f'CREATE VIEW "{name}" AS SELECT * FROM {reader}({sql_string(path)})')
+
+    global _sqlite_extension_error
+    failed = {}
+    search_path = ["memory.main"]
+    for alias, path in databases.items():
+        sqlite = is_sqlite(path)
+        if sqlite and _sqlite_extension_error:
+            failed[alias] = _sqlite_extension_error
+            continue
+        try:
+            con.execute(f'ATTACH {sql_string(path)} AS "{alias}" (READ_ONLY{", TYPE sqlite" if sqlite else ""})')
+            search_path.append(f'"{alias}".main')
+        except duckdb.Error as e:
+            failed[alias] = str(e).splitlines()[0]
+            if sqlite and "extension" in failed[alias].lower():
+                _sqlite_extension_error = failed[alias]
+    # Unqualified table names also resolve inside attached databases
+    con.execute(f"SET search_path = {sql_string(','.join(search_path))}")
+
+    con.execute(f"SET allowed_directories = [{', '.join(sql_string(d) for d in directories)}]")
+    con.execute("SET enable_external_access = false")
+    return con, failed
+
+
+def run_duckdb(con, sql: str, max_rows: int, timeout_sec: int) -> dict:
+    statements = duckdb.extract_statements(sql)
+    if len(statements) != 1:
+        raise ValueError(f"Expected exactly one SQL statement, got {len(statements)}.")
+
+    timer = threading.Timer(timeout_sec, con.interrupt)
+    timer.start()
+    try:
+        relation = con.sql(sql)
+        if relation is None:  # a statement without a result set
+            return {"columns": [], "types": [], "rows": [], "truncated": False}
+        # LIMIT is pushed into the plan, so only max_rows + 1 rows are produced
+        rows = relation.limit(max_rows + 1).fetchall()
+        return {
+            "columns": relation.columns,
+            "types": [str(t) for t in relation.types],
+            "rows": rows,
+            "truncated": len(rows) > max_rows,
+        }
+    finally:
+        timer.cancel()
+
+
+def run_sqlite(databases: dict, sql: str, max_rows: int, timeout_sec: int) -> dict:
+    """
+    Fallback for SQLite files when DuckDB is unavailable or cannot attach them.
+    Each database is attached read-only under its alias.
+    """
+    con = sqlite3.connect(":memory:")
+    try:
+        for alias, path in databases.items():
+            if is_sqlite(path):
+                con.execute(f'ATTACH DATABASE ? AS "{alias}"', (f"file:{path}?mode=ro",))
+        deadline = time.monotonic() + timeout_sec
+        con.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+        cursor = con.execute(sql)
+        rows = cursor.fetchmany(max_rows + 1)
+        columns = [d[0] for d in cursor.description or []]
+        return {"columns": columns, "types": [], "rows": rows, "truncated": len(rows) > max_rows}
+    finally:
+        con.close()
+
+
+def describe_sources(files: dict, databases: dict, failed: dict, workspace: Workspace) -> dict:
+    sources = {name: workspace.to_logical(path) for name, path in files.items()}
+    for alias, path in databases.items():
+        sources[alias] = workspace.to_logical(path) + " (database; tables as <name>.<table>)"
+    for alias, error in failed.items():
+        sources[alias] += f" - not attached in DuckDB: {error}"
+    return sources
+
+
+def query_data(sql: str, max_rows: int = 50, timeout_sec: int = 30, workspace: Workspace = None) -> Dict[str, Any]:
+    """
+    Runs one SQL query over the data files in the uploads and outputs directories, in place.
+
+    - Every .csv/.tsv/.parquet/.json file is a view named after the file (see table_name);
+      DuckDB reads only the columns and row groups the query needs. Large CSVs the query
+      names are read through a Parquet copy cached by file content (built in the background
+      on first use).
+    - .db/.sqlite/.duckdb files are attached read-only under their name.
+    - At most max_rows rows (capped at MAX_RESULT_ROWS) are returned, with the query time.
+    SQLite databases fall back to Python's sqlite3 when DuckDB cannot attach them.
+    """
+    workspace = workspace or default_workspace()
+    max_rows = max(1, min(max_rows or 50, MAX_RESULT_ROWS))
+    timeout_sec = max(1, min(timeout_sec or 30, MAX_TIMEOUT_SEC))
+    files, databases = find_sources(workspace)
+    failed = {}
+
+    started = time.perf_counter()
+    try:
+        if duckdb is None:
+            engine = "sqlite"
+            result = run_sqlite(databases, sql, max_rows, timeout_sec)
+        else:
+            engine = "duckdb"
+            con, failed = duckdb_connection(workspace, files, databases, referenced_names(sql))
+            try:
+                result = run_duckdb(con, sql, max_rows, timeout_sec)
+            except duckdb.CatalogException as e:
+                if not failed:
+                    raise
+                # The query may be for a database DuckDB could not attach
+                try:
+                    result = run_sqlite({alias: databases[alias] for alias in failed}, sql, max_rows, timeout_sec)
+                except sqlite3.Error:
+                    raise e from None
+                engine = "sqlite"
+            finally:
+                con.close()
+    except Exception as e:
+        interrupted = (duckdb is not None and isinstance(e, duckdb.InterruptException)) or "interrupted" in str(e)
+        return {
+            "error": f"Query timed out after {timeout_sec} s." if interrupted else f"{type(e).__name__}: {workspace.to_logical(str(e))}",
+            "tables": describe_sources(files, databases, failed, workspace),
+        }
+
+    result["rows"] = [[json_value(v) for v in row[:len(result["columns"])]] for row in result["rows"][:max_rows]]
+    result["row_count"] = len(result["rows"])
+    result["engine"] = engine
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+if __name__ == "__main__":
+    print(query_data("SELECT 42 AS answer"))
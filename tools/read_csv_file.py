@@ -1,24 +1,223 @@
+import csv
 import os
+import re
+import time
+import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
+from pandas.api.types import is_bool_dtype, is_numeric_dtype  # type: ignore
+from pandas.util import hash_array  # type: ignore
+
+from utils.content_store import file_digest, get_artifact_cache
+from utils.workspace import Workspace, default_workspace
 
 ALLOWED_DIRS = {
     "uploads": "/tmp/uploads",
     "outputs": "/tmp/outputs"
 }
 
-def read_csv_file(file_name: str, directory_name: str = "uploads") -> str:
+PREVIEW_ROWS = 10
+SNIFF_BYTES = 64 * 1024  # sample used to detect the encoding and delimiter
+PROFILE_CHUNK_ROWS = int(os.environ.get("CSV_PROFILE_CHUNK_ROWS", "200000"))
+PROFILE_MAX_COLUMNS = 200  # columns reported in a profile; the rest are only counted
+DISTINCT_SKETCH_SIZE = 2048  # hashes kept per column for the distinct-count estimate
+MAX_VALUE_CHARS = 40
+NUMBER_LIKE = re.compile(r"\s*[-+]?(?:\d|\.\d|inf|nan)", re.IGNORECASE)  # cheap pre-filter for pd.to_numeric
+
+
+def sniff_csv(file_path: str) -> tuple[str, str]:
+    """
+    (encoding, delimiter) of a CSV file, guessed from its first SNIFF_BYTES.
+    """
+    with open(file_path, "rb") as f:
+        sample = f.read(SNIFF_BYTES)
+
+    if sample.startswith(b"\xef\xbb\xbf"):
+        encoding = "utf-8-sig"
+    elif sample.startswith((b"\xff\xfe", b"\xfe\xff")):
+        encoding = "utf-16"
+    else:
+        encoding = "utf-8"
+    try:
+        text = sample.decode(encoding)
+    except UnicodeDecodeError as e:
+        if encoding == "utf-8" and e.start >= len(sample) - 3:  # sample cut inside a character
+            text = sample[:e.start].decode(encoding)
+        else:
+            encoding = "cp1252" if encoding == "utf-8" else encoding
+            text = sample.decode(encoding, errors="replace")
+
+    # Only complete lines, so the sniffer does not see a truncated last row
+    if len(sample) == SNIFF_BYTES and "\n" in text:
+        text = text[:text.rindex("\n")]
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=",;\t|").delimiter
+    except csv.Error:
+        delimiter = ","
+    return encoding, delimiter
+
+
+def short(value) -> str:
+    text = str(value)
+    return text if len(text) <= MAX_VALUE_CHARS else text[:MAX_VALUE_CHARS - 1] + "…"
+
+
+class ColumnProfile:
+    """
+    Running statistics for one column, updated chunk by chunk in bounded memory.
+    Distinct values are estimated with a k-minimum-values sketch of 64-bit hashes.
+
+    pandas may parse a column as numbers in some chunks and as text in others. Values that
+    parse as numbers are always hashed and bounded as numbers (so 1, 1.0 and "1" are one
+    value); a column that also has other text is reported as "mixed", numbers sorting first.
+    """
+
+    def __init__(self):
+        self.nulls = 0
+        self.count = 0
+        self.text = False  # some values are not numbers
+        self.fractional = False
+        self.num_min = self.num_max = None
+        self.str_min = self.str_max = None
+        self.sketch = np.empty(0, dtype=np.uint64)
+
+    def update(self, values: pd.Series):
+        present = values.dropna()
+        self.nulls += len(values) - len(present)
+        self.count += len(present)
+        if present.empty:
+            return
+
+        if is_numeric_dtype(present) and not is_bool_dtype(present):
+            hashes = self._update_numbers(present.to_numpy(dtype=np.float64))
+        else:
+            # Bounds and the sketch only need each distinct value once
+            strings = pd.Series(present.astype(str).unique())
+            parsed = np.full(len(strings), np.nan)
+            if not is_bool_dtype(present):
+                # Numbers in a chunk pandas read as text; only number-like strings are parsed
+                candidates = strings.str.match(NUMBER_LIKE).to_numpy(dtype=bool, na_value=False)
+                if candidates.any():
+                    parsed[candidates] = pd.to_numeric(strings[candidates], errors="coerce").to_numpy(dtype=np.float64)
+            is_number = ~np.isnan(parsed)
+            hashes = self._update_numbers(parsed[is_number])
+            text = strings.to_numpy(dtype=object)[~is_number]
+            if len(text):
+                self.text = True
+                hashes = np.concatenate([hashes, hash_array(text)])
+                low, high = text.min(), text.max()
+                self.str_min = low if self.str_min is None else min(self.str_min, low)
+                self.str_max = high if self.str_max is None else max(self.str_max, high)
+
+        if len(self.sketch) == DISTINCT_SKETCH_SIZE:
+            hashes = hashes[hashes < self.sketch[-1]]  # cannot enter the sketch
+        self.sketch = np.unique(np.concatenate([self.sketch, hashes]))[:DISTINCT_SKETCH_SIZE]
+
+    def _update_numbers(self, numbers: np.ndarray) -> np.ndarray:
+        """
+        Folds numbers into the numeric bounds; returns their hashes (as float64, so ints
+        and floats hash alike across chunks).
+        """
+        if not len(numbers):
+            return np.empty(0, dtype=np.uint64)
+        low, high = numbers.min(), numbers.max()
+        self.num_min = low if self.num_min is None else min(self.num_min, low)
+        self.num_max = high if self.num_max is None else max(self.num_max, high)
+        self.fractional = self.fractional or bool((numbers % 1 != 0).any())
+        return hash_array(numbers)
+
+    def number(self, value: float):
+        return value if self.fractional else int(value)
+
+    def distinct(self) -> int:
+        if len(self.sketch) < DISTINCT_SKETCH_SIZE:
+            return len(self.sketch)  # every distinct hash was kept: exact
+        kth = float(self.sketch[-1]) / 2.0 ** 64
+        return int((DISTINCT_SKETCH_SIZE - 1) / kth)
+
+    def summary(self) -> dict:
+        if not self.count:
+            dtype, low, high = "empty", "", ""
+        elif self.text and self.num_min is not None:
+            dtype, low, high = "mixed", self.number(self.num_min), short(self.str_max)
+        elif self.text:
+            dtype, low, high = "string", short(self.str_min), short(self.str_max)
+        else:
+            dtype = "float" if self.fractional else "integer"
+            low, high = self.number(self.num_min), self.number(self.num_max)
+        distinct = self.distinct()
+        return {
+            "dtype": dtype,
+            "nulls": self.nulls,
+            "min": low,
+            "max": high,
+            "distinct": distinct if len(self.sketch) < DISTINCT_SKETCH_SIZE else f"~{distinct:,}",
+        }
+
+
+def profile_csv(file_path: str, encoding: str, delimiter: str) -> str:
+    """
+    Streams the file in PROFILE_CHUNK_ROWS chunks and returns the row count plus
+    per-column dtype, nulls, min/max and (approximate) distinct counts.
+    """
+    columns = None
+    profiles = {}
+    rows = 0
+    reader = pd.read_csv(
+        file_path,
+        sep=delimiter,
+        encoding=encoding,
+        encoding_errors="replace",
+        chunksize=PROFILE_CHUNK_ROWS,
+        low_memory=False,
+    )
+    with reader:
+        for chunk in reader:
+            if columns is None:
+                columns = list(chunk.columns)
+                profiles = {name: ColumnProfile() for name in columns[:PROFILE_MAX_COLUMNS]}
+            rows += len(chunk)
+            for name, profile in profiles.items():
+                profile.update(chunk[name])
+
+    if columns is None:
+        return "The CSV file has no rows."
+    table = pd.DataFrame({name: profile.summary() for name, profile in profiles.items()}).T
+    lines = [
+        f"rows: {rows:,}, columns: {len(columns):,}, delimiter: {delimiter!r}, encoding: {encoding}",
+        "",
+        table.to_string(),
+    ]
+    if len(columns) > PROFILE_MAX_COLUMNS:
+        lines.append(f"... {len(columns) - PROFILE_MAX_COLUMNS:,} more columns not profiled")
+    return "\n".join(lines)
+
+
+def read_csv_file(file_name: str, directory_name: str = "uploads", profile: bool = False, workspace: Workspace = None) -> str:
+    """
+    Previews the first rows of a CSV file without reading the rest of it,
+    or with profile=True streams the whole file to summarise every column.
+    """
     if directory_name not in ALLOWED_DIRS:
         return f"[Error] Invalid directory name: {directory_name}. Allowed: {list(ALLOWED_DIRS.keys())}"
-    
-    directory = ALLOWED_DIRS[directory_name]
+
+    workspace = workspace or default_workspace()
+    directory = workspace.resolve(directory_name)
     file_path = os.path.join(directory, file_name)
-    
+
     if not os.path.isfile(file_path):
-        return f"[Error] File not found: {file_path}"
-    
+        return f"[Error] File not found: {os.path.join(ALLOWED_DIRS[directory_name], file_name)}"
+
     try:
-        df = pd.read_csv(file_path)
-        preview = df.head(10).to_string(index=False)
-        return f"First 10 rows of {file_name} in {directory_name}:\n\n{preview}"
+        encoding, delimiter = sniff_csv(file_path)
+        if profile:
+            # Cached by file content: the same dataset uploaded again is not re-scanned
+            started = time.perf_counter()
+            text = get_artifact_cache().text(
+                file_digest(file_path), "csv_profile_v2.txt", lambda: profile_csv(file_path, encoding, delimiter)
+            )
+            return f"Profile of {file_name} in {directory_name} ({time.perf_counter() - started:.1f} s):\n\n{text}"
+        df = pd.read_csv(file_path, sep=delimiter, encoding=encoding, encoding_errors="replace", nrows=PREVIEW_ROWS)
+        preview = df.to_string(index=False)
+        return f"First {PREVIEW_ROWS} rows of {file_name} in {directory_name}:\n\n{preview}"
     except Exception as e:
-        return f"[Error] Failed to read CSV file: {e}"
\ No newline at end of file
+        return f"[Error] Failed to read CSV file: {e}"
@@ -11,6 +11,13 @@ import tempfile
 import google.generativeai as genai  # type: ignore
 import binascii
 
+import hashlib
+
+from utils.content_store import get_artifact_cache
+from utils.workspace import Workspace, default_workspace
+
+IMAGE_MODEL = "gemini-2.0-flash"
+
 def get_image_description(image_bytes: bytes, suffix: str = ".png") -> str:
     genai.configure(api_key=os.getenv("GENAI_API_KEY"))
 
@@ -20,7 +27,7 @@ def get_image_description(image_bytes: bytes, suffix: str = ".png") -> str:
 
     try:
         uploaded_file = genai.upload_file(tmp_file_path)
-        model = genai.GenerativeModel("gemini-2.0-flash")
+        model = genai.GenerativeModel(IMAGE_MODEL)
         result = model.generate_content(
             [
                 uploaded_file,
@@ -34,16 +41,10 @@ def get_image_description(image_bytes: bytes, suffix: str = ".png") -> str:
         except Exception:
             pass
 
-def read_image_file(file_name=None, b64_string=None, directory="uploads"):
-    # Normalize directory input to full absolute path
-    dir_map = {
-        "uploads": "/tmp/uploads",
-        "/tmp/uploads": "/tmp/uploads",
-        "outputs": "/tmp/outputs",
-        "/tmp/outputs": "/tmp/outputs",
-    }
-
-    directory = dir_map.get(directory)
+def read_image_file(file_name=None, b64_string=None, directory="uploads", workspace: Workspace = None):
+    # Normalize directory input to the workspace's absolute path
+    workspace = workspace or default_workspace()
+    directory = workspace.resolve(directory)
     if not directory:
         return "Error: Unsupported directory. Must be '/tmp/uploads', '/tmp/outputs', 'uploads', or 'outputs'."
 
@@ -54,7 +55,7 @@ def read_image_file(file_name=None, b64_string=None, directory="uploads"):
         if file_name:
             file_path = os.path.join(directory, file_name)
             if not os.path.isfile(file_path):
-                return f"Error: File not found: {file_path}"
+                return f"Error: File not found: {workspace.to_logical(file_path)}"
 
             suffix = os.path.splitext(file_name)[-1] or ".png"
             with open(file_path, "rb") as f:
@@ -79,7 +80,11 @@ def read_image_file(file_name=None, b64_string=None, directory="uploads"):
             except binascii.Error:
                 return "Error: Provided base64 string is invalid."
 
-        return get_image_description(image_bytes, suffix)
+        # Descriptions are cached by image content, so the same image is described once
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return get_artifact_cache().text(
+            digest, f"description_{IMAGE_MODEL}.txt", lambda: get_image_description(image_bytes, suffix)
+        )
 
     except Exception as e:
         return f"Error processing image: {e}"
\ No newline at end of file
@@ -5,29 +5,208 @@
 # ]
 # ///
 
-def read_pdf_file(file_name: str, directory: str) -> str:
-    import os
-    import fitz  # type: ignore # PyMuPDF
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import fitz  # type: ignore # PyMuPDF
 
+from utils.content_store import file_digest, get_artifact_cache
+from utils.workspace import Workspace, default_workspace
+
+CHAR_LIMIT = 8000  # cap on returned text to avoid LLM overload
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARALLEL_MIN_PAGES = 32  # smaller documents are extracted in-process
+PAGE_WORKER_TIMEOUT_SEC = 300
+OUTPUT_DIR = "/tmp/outputs"
+
+# Worker programs get the PDF path and a 0-based [start, stop) page range as arguments and print
+# their result as the last line of stdout, as JSON. Plain interpreters rather than multiprocessing:
+# spawn would re-import app.py in every worker, and forking a process that runs an event loop and
+# thread pools is unsafe.
+PAGE_WORKER = """
+import json, sys
+import fitz
+with fitz.open(sys.argv[1]) as doc:
+    texts = [doc[i].get_text() for i in range(int(sys.argv[2]), int(sys.argv[3]))]
+sys.stdout.write("\\n" + json.dumps(texts) + "\\n")
+"""
+
+
+def page_kind(index: int) -> str:
+    return f"pdf_page_{index + 1:05d}.txt"
+
+
+def run_pdf_worker(code: str, file_path: str, start: int, stop: int):
+    """
+    Runs a worker program over pages [start, stop) in a separate process; returns its JSON result.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", code, file_path, str(start), str(stop)],
+        capture_output=True,
+        check=True,
+        timeout=PAGE_WORKER_TIMEOUT_SEC,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),  # so workers can import tools.*
+    )
+    # The last line is the JSON payload (PyMuPDF may print warnings before it)
+    return json.loads(result.stdout.strip().rsplit(b"\n", 1)[-1])
+
+
+def run_in_workers(code: str, file_path: str, indices: list[int]) -> dict:
+    """
+    Splits sorted page indices into one contiguous batch per worker and runs them in parallel.
+    Returns {page index: that page's result}.
+    """
+    batch = -(-len(indices) // PDF_WORKERS)
+    batches = [indices[i:i + batch] for i in range(0, len(indices), batch)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+        futures = [
+            (pages, executor.submit(run_pdf_worker, code, file_path, pages[0], pages[-1] + 1))
+            for pages in batches
+        ]
+        for pages, future in futures:
+            extracted = future.result()
+            for index in pages:
+                results[index] = extracted[index - pages[0]]
+    return results
+
+
+def parse_pages(spec: str, page_count: int) -> list[int]:
+    """
+    "3", "2-5", "1-3,7,10-" (1-based, open-ended ranges allowed) -> 0-based page indices.
+    Raises ValueError on malformed specs and on ranges starting past the last page.
+    """
+    indices = []
+    seen = set()
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            start = int(first) if first else 1
+            stop = (int(last) if last else page_count) if sep else start
+        except ValueError:
+            raise ValueError(f"invalid page range '{part}'") from None
+        if start < 1 or stop < start:
+            raise ValueError(f"invalid page range '{part}'")
+        if start > page_count:
+            raise ValueError(f"page range '{part}' is past the end of the document")
+        for i in range(start - 1, min(stop, page_count)):
+            if i not in seen:
+                seen.add(i)
+                indices.append(i)
+    return indices
+
+
+class PageReader:
+    """
+    Page texts of one PDF, read through the per-page artifact cache.
+    """
+
+    def __init__(self, file_path: str, doc):
+        self.file_path = file_path
+        self.doc = doc
+        self.digest = file_digest(file_path)
+        self.cache = get_artifact_cache()
+
+    def text(self, index: int) -> str:
+        text = self.cache.get_text(self.digest, page_kind(index))
+        if text is None:
+            text = self.doc[index].get_text()
+            self.cache.put_text(self.digest, page_kind(index), text)
+        return text
+
+    def extract_all(self) -> list[str]:
+        """
+        Every page's text; pages missing from the cache are extracted in parallel worker processes.
+        """
+        texts = [self.cache.get_text(self.digest, page_kind(i)) for i in range(len(self.doc))]
+        missing = [i for i, text in enumerate(texts) if text is None]
+        if len(missing) >= PARALLEL_MIN_PAGES and PDF_WORKERS > 1:
+            for index, text in run_in_workers(PAGE_WORKER, self.file_path, missing).items():
+                texts[index] = text
+        else:
+            for index in missing:
+                texts[index] = self.doc[index].get_text()
+        for index in missing:
+            self.cache.put_text(self.digest, page_kind(index), texts[index])
+        return texts
+
+
+def read_pdf_file(
+    file_name: str,
+    directory: str,
+    pages: str = None,
+    search: str = None,
+    full_document: bool = False,
+    workspace: Workspace = None,
+) -> str:
+    """
+    Returns the text of a PDF, page by page, until CHAR_LIMIT characters are collected.
+
+    - pages: 1-based page numbers/ranges to read, e.g. "1-3,7" (default: all, in order).
+    - search: only pages containing this text (case-insensitive).
+    - full_document: extract every page (in parallel) into /tmp/outputs/<name>.txt for later steps.
+    Page texts are cached by file content, so pages are extracted at most once.
+    """
     if directory not in ["/tmp/uploads", "/tmp/outputs"]:
         return f"Error: Unsupported directory '{directory}'. Must be '/tmp/uploads' or '/tmp/outputs'."
 
-    file_path = os.path.join(directory, file_name)
+    workspace = workspace or default_workspace()
+    file_path = os.path.join(workspace.resolve(directory), file_name)
+    if not os.path.isfile(file_path):
+        return f"Error: File '{file_name}' not found in '{directory}/'."
 
     try:
         with fitz.open(file_path) as doc:
-            text = ""
-            for page in doc:
-                text += page.get_text()
-
-        # Cap output to avoid LLM overload (approx. 8000 characters)
-        char_limit = 8000
-        if len(text) > char_limit:
-            truncated = text[:char_limit]
-            return truncated + "\n\n[Output truncated — file too long for direct reading. Please use a more specific extraction tool or write custom code with `execute_code`.]"
-        return text or "[No readable text found in the PDF.]"
-
-    except FileNotFoundError:
-        return f"Error: File '{file_name}' not found in '{directory}/'."
+            page_count = len(doc)
+            reader = PageReader(file_path, doc)
+            try:
+                indices = parse_pages(pages, page_count) if pages else list(range(page_count))
+            except ValueError as e:
+                return f"Error: {e}. Use e.g. '1-3,7' (document has {page_count} pages)."
+
+            saved = None
+            if full_document:
+                texts = reader.extract_all()
+                saved = os.path.join(OUTPUT_DIR, os.path.splitext(file_name)[0] + ".txt")
+                with open(workspace.to_physical(saved), "w", encoding="utf-8") as f:
+                    f.writelines(f"[Page {i + 1}]\n{text}\n" for i, text in enumerate(texts))
+
+            # Collect pages until the budget is met; later pages are never extracted
+            parts = []
+            size = 0
+            last_page = None
+            needle = search.lower() if search else None
+            for index in indices:
+                if size >= CHAR_LIMIT:
+                    break
+                text = reader.text(index)
+                if needle and needle not in text.lower():
+                    continue
+                part = f"[Page {index + 1}]\n{text}\n"
+                parts.append(part)
+                size += len(part)
+                last_page = index + 1
     except Exception as e:
-        return f"Error: Could not read file '{file_name}': {e}"
\ No newline at end of file
+        return f"Error: Could not read file '{file_name}': {e}"
+
+    text = "".join(parts)
+    notes = []
+    if saved:
+        notes.append(f"All {page_count} pages were saved to {saved}; read it with execute_code for further processing.")
+    if size >= CHAR_LIMIT and (len(text) > CHAR_LIMIT or last_page != indices[-1] + 1):
+        text = text[:CHAR_LIMIT]
+        notes.append(
+            f"Output truncated at page {last_page} of {page_count}. Use 'pages' (e.g. '{last_page}-{min(last_page + 9, page_count)}') "
+            "or 'search' to read further, or a more specific extraction tool."
+        )
+    if not text:
+        if needle:
+            return f"[No page of the {page_count} pages read contains '{search}'.]"
+        return "[No readable text found in the PDF.]"
+    if notes:
+        text += "\n\n[" + " ".join(notes) + "]"
+    return text
@@ -1,4 +1,6 @@
-def read_text_file(file_name: str, directory: str) -> str:
+from utils.workspace import Workspace, default_workspace
+
+def read_text_file(file_name: str, directory: str, workspace: Workspace = None) -> str:
     import os
 
     allowed_extensions = ['.txt', '.csv', '.log', '.md']
@@ -18,7 +20,8 @@ def read_text_file(file_name: str, directory: str) -> str:
     if ext not in allowed_extensions:
         return f"Error: Unsupported file type '{ext}'. Allowed types: {', '.join(allowed_extensions)}"
 
-    file_path = os.path.join(directory, file_name)
+    workspace = workspace or default_workspace()
+    file_path = os.path.join(workspace.resolve(directory), file_name)
 
     try:
         if os.path.getsize(file_path) > max_file_size_bytes:
@@ -0,0 +1,68 @@
+import os
+import resource
+
+CODE_MEMORY_MB = int(os.environ.get("CODE_MEMORY_MB", "4096"))  # address space per execution
+CODE_MAX_FILE_MB = int(os.environ.get("CODE_MAX_FILE_MB", "256"))  # largest file a snippet may write
+# RLIMIT_NPROC counts every process and thread of the user, not just the snippet's (the
+# server, pooled interpreters, kernels and Chromium included), so it is off unless set
+CODE_MAX_PROCS = int(os.environ.get("CODE_MAX_PROCS", "0"))
+CPU_GRACE_SEC = 1  # SIGXCPU at the soft limit, SIGKILL this much CPU time later
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def execution_limits(cpu_sec: int = None) -> dict:
+    """
+    setrlimit values ([soft, hard]) for sandboxed code, by resource name.
+    The CPU limit is relative: it is added to the CPU time the process already used.
+    """
+    limits = {
+        "RLIMIT_AS": [CODE_MEMORY_MB * 1024 * 1024] * 2,
+        "RLIMIT_FSIZE": [CODE_MAX_FILE_MB * 1024 * 1024] * 2,
+        "RLIMIT_CORE": [0, 0],
+    }
+    if CODE_MAX_PROCS:
+        limits["RLIMIT_NPROC"] = [CODE_MAX_PROCS] * 2
+    if cpu_sec:
+        limits["RLIMIT_CPU"] = [cpu_sec, cpu_sec + CPU_GRACE_SEC]
+    return limits
+
+
+def apply_limits(limits: dict):
+    """
+    Applies execution_limits() to the current process (e.g. as a Popen preexec_fn).
+    Mirrored inside the pooled interpreter and kernel bootstraps, which cannot import this module.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used_cpu = int(usage.ru_utime + usage.ru_stime)
+    for name, (soft, hard) in limits.items():
+        if name == "RLIMIT_CPU":
+            soft, hard = soft + used_cpu, hard + used_cpu
+        resource.setrlimit(getattr(resource, name), (soft, hard))
+
+
+def process_cpu_sec(pid: int) -> float:
+    """
+    User + system CPU seconds a live process has used so far (0.0 if unavailable).
+    """
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+            # Fields after the parenthesised command name; utime and stime are fields 14 and 15
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def process_memory_mb(pid: int, field: str = "VmRSS") -> float:
+    """
+    A memory figure from /proc/<pid>/status in MB: VmRSS (current) or VmHWM (peak resident).
+    """
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
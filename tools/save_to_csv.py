@@ -9,7 +9,9 @@ import pandas as pd  # type: ignore
 import os
 from typing import Any, Union, List, Dict
 
-def save_to_csv(data, file_name):
+from utils.workspace import Workspace, default_workspace
+
+def save_to_csv(data, file_name, workspace: Workspace = None):
     import csv, os
 
     # Normalize input: if it's an object with a 'data' key, extract it
@@ -17,8 +19,9 @@ def save_to_csv(data, file_name):
         data = data["data"]
 
     # Ensure outputs directory exists
-    os.makedirs("outputs", exist_ok=True)
-    file_path = os.path.join("outputs", file_name)
+    output_dir = (workspace or default_workspace()).outputs
+    os.makedirs(output_dir, exist_ok=True)
+    file_path = os.path.join(output_dir, file_name)
 
     # Write to CSV
     with open(file_path, "w", newline="", encoding="utf-8") as f:
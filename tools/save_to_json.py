@@ -2,12 +2,14 @@ import os
 import json
 import traceback
 
-def save_to_json(json_input, file_name: str) -> str:
+from utils.workspace import Workspace, default_workspace
+
+def save_to_json(json_input, file_name: str, workspace: Workspace = None) -> str:
     # Case-insensitive check for .json extension
     if not file_name.lower().endswith(".json"):
         return "Error: File name must end with '.json' (case-insensitive)."
 
-    output_dir = "/tmp/outputs"
+    output_dir = (workspace or default_workspace()).outputs
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, file_name)
 
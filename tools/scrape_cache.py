@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from utils.http_client import get_async_client
+
+CACHE_DIR = os.environ.get("SCRAPE_CACHE_DIR", "/tmp/scrape_cache")
+CACHE_TTL_SEC = float(os.environ.get("SCRAPE_CACHE_TTL_SEC", "3600"))
+CACHE_MAX_BYTES = int(os.environ.get("SCRAPE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+REVALIDATE_TIMEOUT_SEC = 10.0
+
+HTML_FILE = "page.html"
+DOM_FILE = "dom.txt"
+META_FILE = "meta.json"
+
+
+class ScrapeCache:
+    """
+    On-disk cache of scraped pages keyed by URL + render mode.
+
+    Each entry is a directory holding the HTML, its DOM summary and metadata
+    (ETag / Last-Modified validators, fetch time). Fresh entries (younger than the TTL)
+    are served directly; stale ones are revalidated with a conditional GET and served
+    again on 304. The cache is size-bounded and evicts least recently used entries.
+    Filesystem work that can be slow (storing, evicting, copying out) runs in worker threads.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, ttl_sec: float = CACHE_TTL_SEC, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _entry_dir(self, url: str, mode: str) -> str:
+        key = hashlib.sha256(f"{mode}\n{url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def _read_meta(self, entry_dir: str) -> dict | None:
+        try:
+            with open(os.path.join(entry_dir, META_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    async def _revalidate(self, meta: dict, request_headers: dict = None):
+        """
+        Conditional GET against the original URL. Returns the response, or None if the
+        entry has no validators or the request failed.
+        """
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        if not headers:
+            return None
+        try:
+            return await get_async_client().get(
+                meta["url"], headers={**(request_headers or {}), **headers}, follow_redirects=True, timeout=REVALIDATE_TIMEOUT_SEC
+            )
+        except Exception:
+            return None
+
+    async def get(self, url: str, mode: str, request_headers: dict = None) -> dict | None:
+        """
+        Returns {"html_file", "dom_file", "status": "hit" | "revalidated", "meta"} or None on a miss.
+
+        When revalidating an entry stored from a plain HTTP GET (path "static") gets a 200,
+        returns {"status": "modified", "response": ...} instead, so the caller can use that
+        body rather than fetching the page again.
+        """
+        entry_dir = self._entry_dir(url, mode)
+        meta = await asyncio.to_thread(self._read_meta, entry_dir)
+        if meta is None:
+            self.misses += 1
+            return None
+
+        status = "hit"
+        if time.time() - meta["fetched_at"] > self.ttl_sec:
+            response = await self._revalidate(meta, request_headers)
+            if response is None or response.status_code != 304:
+                self.misses += 1
+                if response is not None and response.status_code == 200 and meta.get("path") == "static":
+                    return {"status": "modified", "response": response, "meta": meta}
+                return None
+            meta["fetched_at"] = time.time()
+            await asyncio.to_thread(self._write_meta, entry_dir, meta)
+            status = "revalidated"
+            self.revalidated += 1
+        else:
+            self.hits += 1
+
+        # The meta file's mtime doubles as the LRU access time
+        await asyncio.to_thread(os.utime, os.path.join(entry_dir, META_FILE))
+        return {
+            "html_file": os.path.join(entry_dir, HTML_FILE),
+            "dom_file": os.path.join(entry_dir, DOM_FILE),
+            "status": status,
+            "meta": meta,
+        }
+
+    async def copy_out(self, cached: dict, html_path: str, dom_path: str) -> bool:
+        """
+        Copies a cached entry's files to the given paths. False if the entry was evicted or
+        replaced in the meantime, which callers treat as a miss.
+        """
+        try:
+            await asyncio.to_thread(shutil.copyfile, cached["html_file"], html_path)
+            await asyncio.to_thread(shutil.copyfile, cached["dom_file"], dom_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        return True
+
+    async def put(self, url: str, mode: str, html: str, dom: str, headers: dict = None, path: str = None):
+        """
+        Atomically stores (or replaces) an entry, then evicts down to max_bytes.
+        """
+        await asyncio.to_thread(self._put, url, mode, html, dom, headers, path)
+
+    def _put(self, url: str, mode: str, html: str, dom: str, headers: dict = None, path: str = None):
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        os.makedirs(self.directory, exist_ok=True)
+        entry_dir = self._entry_dir(url, mode)
+
+        tmp_dir = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with open(os.path.join(tmp_dir, HTML_FILE), "w", encoding="utf-8") as f:
+                f.write(html)
+            with open(os.path.join(tmp_dir, DOM_FILE), "w", encoding="utf-8") as f:
+                f.write(dom)
+            meta = {
+                "url": url,
+                "mode": mode,
+                "path": path,
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "fetched_at": time.time(),
+                "size": len(html.encode("utf-8")) + len(dom.encode("utf-8")),
+            }
+            self._write_meta(tmp_dir, meta)
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                # A concurrent scrape of the same URL stored it first
+                return
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.stores += 1
+        self.evict()
+
+    def _write_meta(self, entry_dir: str, meta: dict):
+        tmp_path = os.path.join(entry_dir, META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(entry_dir, META_FILE))
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            entry_dir = os.path.join(self.directory, name)
+            meta = None if name.startswith(".") else self._read_meta(entry_dir)
+            if meta is None:
+                continue
+            accessed = os.path.getmtime(os.path.join(entry_dir, META_FILE))
+            entries.append((accessed, meta.get("size", 0), entry_dir))
+        return entries
+
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "ttl_sec": self.ttl_sec,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+_scrape_cache = None
+
+
+def get_scrape_cache() -> ScrapeCache:
+    global _scrape_cache
+    if _scrape_cache is None:
+        _scrape_cache = ScrapeCache()
+    return _scrape_cache
@@ -7,21 +7,193 @@
 # ///
 
 import asyncio
+import re
+import time
 from pathlib import Path
-from playwright.async_api import async_playwright  # type: ignore
+from urllib.parse import urlparse
+from tools.browser_pool import get_browser_pool
 from tools.dom_structure import extract_dom_structure_with_identifiers
+from tools.scrape_cache import get_scrape_cache
+from utils.http_client import get_async_client
+from utils.workspace import Workspace, default_workspace
 
+# "auto" mode: try a plain HTTP GET before paying for a browser
+STATIC_TIMEOUT_SEC = 15.0
+STATIC_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+MIN_STATIC_TEXT_CHARS = 500
+EMPTY_MOUNT_POINT = re.compile(
+    r"<div[^>]*\bid=[\"'](?:root|app|__next|__nuxt|svelte)[\"'][^>]*>\s*</div>", re.IGNORECASE
+)
+NON_CONTENT_BLOCK = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+TAG = re.compile(r"<[^>]+>")
 
-async def scrape_webpage(url: str, output_file: str = "scraped_content.html") -> dict:
+# "fast" mode: only the HTML matters, so skip everything that doesn't change the DOM
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet", "texttrack", "manifest"}
+BLOCKED_HOST_PATTERNS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.com",
+    "hotjar.com",
+    "scorecardresearch.com",
+    "segment.io",
+    "newrelic.com",
+    "nr-data.net",
+)
+
+FAST_NAVIGATION_TIMEOUT_MS = 30000
+FULL_NAVIGATION_TIMEOUT_MS = 120000
+SELECTOR_TIMEOUT_MS = 10000
+DOM_STABLE_TIMEOUT_SEC = 5.0
+DOM_STABLE_INTERVAL_SEC = 0.25
+
+
+async def block_resources(page, stats: dict):
+    """
+    Aborts non-document requests by resource type or tracker host, counting what was blocked.
+    """
+    async def handle(route):
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        blocked = not request.is_navigation_request() and (
+            request.resource_type in BLOCKED_RESOURCE_TYPES
+            or any(pattern in host for pattern in BLOCKED_HOST_PATTERNS)
+        )
+        if blocked:
+            stats["requests_blocked"] += 1
+            by_type = stats["blocked_by_type"]
+            by_type[request.resource_type] = by_type.get(request.resource_type, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handle)
+
+
+async def downloaded_bytes(requests) -> int:
+    """
+    Encoded (on-the-wire) body bytes of finished requests, whether or not the server
+    sent a content-length (chunked and compressed responses included).
+    """
+    sizes = await asyncio.gather(*(request.sizes() for request in requests), return_exceptions=True)
+    return sum(size["responseBodySize"] for size in sizes if isinstance(size, dict))
+
+
+async def wait_for_dom_stable(page, timeout_sec: float = DOM_STABLE_TIMEOUT_SEC) -> bool:
+    """
+    Waits until the element count stops changing for two consecutive polls.
+    Returns False if the DOM was still changing when the timeout hit.
+    """
+    deadline = time.monotonic() + timeout_sec
+    last_count, stable_polls = -1, 0
+    while time.monotonic() < deadline:
+        count = await page.evaluate("document.getElementsByTagName('*').length")
+        if count == last_count:
+            stable_polls += 1
+            if stable_polls >= 2:
+                return True
+        else:
+            last_count, stable_polls = count, 0
+        await asyncio.sleep(DOM_STABLE_INTERVAL_SEC)
+    return False
+
+
+async def fetch_static(url: str) -> tuple[str | None, str, dict]:
+    """
+    Fetches a page with a plain pooled HTTP GET.
+    Returns (html, "ok", headers) when the HTML is usable as-is, else (None, reason, headers).
+    """
+    try:
+        response = await get_async_client().get(
+            url, headers=STATIC_HEADERS, follow_redirects=True, timeout=STATIC_TIMEOUT_SEC
+        )
+    except Exception as e:
+        return None, f"request failed: {type(e).__name__}", {}
+    return static_result(response)
+
+
+def static_result(response) -> tuple[str | None, str, dict]:
+    """
+    fetch_static's verdict on an HTTP response (also used for a cache revalidation's 200).
+    """
+    headers = dict(response.headers)
+    if response.status_code != 200:
+        return None, f"HTTP {response.status_code}", headers
+    content_type = response.headers.get("content-type", "")
+    if "html" not in content_type:
+        return None, f"content-type {content_type or 'missing'}", headers
+
+    html = response.text
+    if not is_usable_html(html):
+        return None, "looks like a JavaScript-rendered shell", headers
+    return html, "ok", headers
+
+
+def is_usable_html(html: str) -> bool:
+    """
+    Heuristic: does server-rendered HTML already carry the page content?
+    Empty SPA mount points or "enable JavaScript" pages with little text are not usable;
+    pages with tables or enough visible text are.
+    """
+    if EMPTY_MOUNT_POINT.search(html):
+        return False
+    if "<table" in html.lower():
+        return True
+
+    visible_text = " ".join(TAG.sub(" ", NON_CONTENT_BLOCK.sub(" ", html)).split())
+    if len(visible_text) < MIN_STATIC_TEXT_CHARS:
+        return False
+    if "enable javascript" in visible_text.lower() and len(visible_text) < 2 * MIN_STATIC_TEXT_CHARS:
+        return False
+    return True
+
+
+async def save_scrape(content: str, html_path: Path, dom_path: Path) -> str:
+    # Save HTML content
+    html_path.write_text(content, encoding="utf-8")
+
+    # Save DOM structure (parsed off the event loop)
+    dom_structure = await asyncio.to_thread(extract_dom_structure_with_identifiers, content)
+    dom_path.write_text(dom_structure, encoding="utf-8")
+    return dom_structure
+
+
+async def scrape_webpage(
+    url: str,
+    output_file: str = "scraped_content.html",
+    mode: str = "auto",
+    wait_for_selector: str = None,
+    workspace: Workspace = None,
+) -> dict:
     """
     Scrapes the HTML content of a webpage and saves both the HTML
-    and a DOM structure representation to /tmp/outputs.
+    and a DOM structure representation to the workspace's outputs directory.
 
-    Returns the saved filenames and a concise message.
+    - mode="auto" (default): plain HTTP GET first; falls back to "fast" if the HTML
+      is unusable (error, non-HTML, or an empty JavaScript shell).
+    - mode="fast": browser, blocks images/fonts/media/stylesheets and trackers, waits for
+      domcontentloaded, then for wait_for_selector if given, else until the DOM stops changing.
+    - mode="full": browser, loads everything and waits for networkidle.
+
+    Pages are served from the on-disk scrape cache when fresh (or revalidated with the server).
+
+    Returns the saved filenames, a concise message, which path ("cache"/"static"/"browser")
+    was taken, and load stats.
     """
+    if mode not in ("auto", "fast", "full"):
+        return {"status": "error", "message": f"Unsupported mode '{mode}'. Must be 'auto', 'fast' or 'full'."}
+
     try:
         # Ensure outputs directory exists
-        output_dir = Path("/tmp/outputs")
+        output_dir = Path((workspace or default_workspace()).outputs)
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # Clean the filename and ensure .html extension
@@ -32,48 +204,97 @@ async def scrape_webpage(url: str, output_file: str = "scraped_content.html") ->
         html_path = output_dir / clean_filename
         dom_path = output_dir / f"{html_path.stem}_dom.txt"
 
-        async with async_playwright() as p:
-            # safer chromium launch options to prevent crashes
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--disable-gpu",
-                    "--single-process",
-                ]
-            )
-            page = await browser.new_page()
-            try:
-                # wait_until networkidle to ensure page fully loads
-                await page.goto(url, wait_until="networkidle", timeout=120000)
-                content = await page.content()
-
-                # Save HTML content
-                html_path.write_text(content, encoding="utf-8")
+        success = {
+            "status": "success",
+            "message": f"Scraping completed and saved to {clean_filename}",
+            "html_file": clean_filename,
+            "dom_file": f"{html_path.stem}_dom.txt",
+        }
 
-                # Save DOM structure
-                dom_structure = extract_dom_structure_with_identifiers(content)
-                dom_path.write_text(dom_structure, encoding="utf-8")
+        cache = get_scrape_cache()
+        cache_mode = f"{mode}|{wait_for_selector or ''}"
+        started = time.monotonic()
+        cached = await cache.get(url, cache_mode, request_headers=STATIC_HEADERS)
+        revalidated = None
+        if cached and cached["status"] == "modified":
+            # The revalidation already downloaded the new version; no need to fetch it again
+            revalidated = cached["response"]
+        elif cached and await cache.copy_out(cached, html_path, dom_path):
+            stats = {"mode": mode, "cache": cached["status"], "elapsed_sec": round(time.monotonic() - started, 2)}
+            print("Scrape stats (cache):", stats)
+            return {**success, "path": "cache", "stats": stats}
 
-                return {
-                    "status": "success",
-                    "message": f"Scraping completed and saved to {clean_filename}",
-                    "html_file": clean_filename,
-                    "dom_file": f"{html_path.stem}_dom.txt"
+        static_fallback_reason = None
+        if mode == "auto":
+            if revalidated is not None:
+                content, static_fallback_reason, headers = static_result(revalidated)
+            else:
+                started = time.monotonic()
+                content, static_fallback_reason, headers = await fetch_static(url)
+            if content is not None:
+                stats = {
+                    "mode": mode,
+                    "bytes_downloaded": len(content.encode("utf-8")),
+                    "elapsed_sec": round(time.monotonic() - started, 2),
                 }
+                if revalidated is not None:
+                    stats["cache"] = "modified"
+                print("Scrape stats (static):", stats)
+                dom_structure = await save_scrape(content, html_path, dom_path)
+                await cache.put(url, cache_mode, content, dom_structure, headers, path="static")
+                return {**success, "path": "static", "stats": stats}
+            mode = "fast"
+
+        # Pages come from the process-wide warm browser instead of a fresh Chromium per call
+        async with get_browser_pool().page() as page:
+            # Blocked requests are counted; what blocking saves in bytes and time is
+            # measured by benchmarks/bench_scrape_blocking.py (it needs an unblocked load)
+            stats = {"mode": mode, "requests_blocked": 0, "blocked_by_type": {}}
+            if static_fallback_reason:
+                stats["static_fallback_reason"] = static_fallback_reason
+            finished = []
+            page.on("requestfinished", finished.append)
+            started = time.monotonic()
+            try:
+                if mode == "full":
+                    # wait_until networkidle to ensure page fully loads
+                    response = await page.goto(url, wait_until="networkidle", timeout=FULL_NAVIGATION_TIMEOUT_MS)
+                else:
+                    await block_resources(page, stats)
+                    response = await page.goto(url, wait_until="domcontentloaded", timeout=FAST_NAVIGATION_TIMEOUT_MS)
+                    if wait_for_selector:
+                        try:
+                            await page.wait_for_selector(wait_for_selector, timeout=SELECTOR_TIMEOUT_MS)
+                        except Exception:
+                            # Keep whatever rendered; the selector may simply not exist
+                            stats["selector_found"] = False
+                    else:
+                        stats["dom_stable"] = await wait_for_dom_stable(page)
+                content = await page.content()
+                stats["elapsed_sec"] = round(time.monotonic() - started, 2)
+                stats["bytes_downloaded"] = await downloaded_bytes(finished)
+                print("Scrape stats (browser):", stats)
+
+                dom_structure = await save_scrape(content, html_path, dom_path)
+                # Only cache real page loads, not error pages
+                if response is not None and response.ok:
+                    await cache.put(url, cache_mode, content, dom_structure, response.headers, path="browser")
+                return {**success, "path": "browser", "stats": stats}
 
             except Exception as e:
                 return {"status": "error", "message": f"Failed to load page: {e}"}
-            finally:
-                await browser.close()
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
 if __name__ == "__main__":
+    async def main(url):
+        try:
+            return await scrape_webpage(url)
+        finally:
+            await get_browser_pool().close()
+
     test_url = "https://en.wikipedia.org/wiki/List_of_highest-grossing_films"
-    result = asyncio.run(scrape_webpage(test_url))
+    result = asyncio.run(main(test_url))
     print(result)
\ No newline at end of file
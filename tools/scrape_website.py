@@ -10,8 +10,10 @@ import asyncio
 import os
 from playwright.async_api import async_playwright  # type: ignore
 from tools.dom_structure import extract_dom_structure_with_identifiers
+from utils.workspace import Workspace, default_workspace
 
-async def scrape_website(url: str, output_file: str = "scraped_content.html"):
+async def scrape_website(url: str, output_file: str = "scraped_content.html", workspace: Workspace = None):
+    output_dir = (workspace or default_workspace()).outputs
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
@@ -21,7 +23,7 @@ async def scrape_website(url: str, output_file: str = "scraped_content.html"):
 
             # Clean the output filename to avoid duplicate 'outputs/' nesting
             clean_filename = output_file.replace("outputs/", "").lstrip("/")
-            output_path = os.path.join("outputs", clean_filename)
+            output_path = os.path.join(output_dir, clean_filename)
 
             # Save the HTML content
             with open(output_path, "w", encoding="utf-8") as file:
@@ -29,7 +31,7 @@ async def scrape_website(url: str, output_file: str = "scraped_content.html"):
 
             # Save DOM structure
             dom_structure = extract_dom_structure_with_identifiers(content)
-            dom_path = os.path.join("outputs", "dom_structure.txt")
+            dom_path = os.path.join(output_dir, "dom_structure.txt")
             with open(dom_path, "w", encoding="utf-8") as f:
                 f.write(dom_structure)
 
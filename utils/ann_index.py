@@ -0,0 +1,271 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "numpy",
+# ]
+# ///
+
+import argparse
+import hashlib
+import os
+import numpy as np
+from typing import Tuple
+
+from utils.vector_search import normalize_rows
+
+DEFAULT_PROBES = int(os.environ.get("ANN_PROBES", "8"))
+ASSIGN_CHUNK_ROWS = 65536  # bounds the (rows x centroids) score matrix during assignment
+TRAIN_POINTS_PER_LIST = 64  # k-means trains on a sample of this many points per list
+PQ_CENTROIDS = 256  # one uint8 code per subvector
+RERANK_FACTOR = 4  # PQ search re-scores this many x k candidates exactly when vectors are given
+
+
+def index_path_for(store_path: str) -> str:
+    """
+    The index lives next to the embeddings: course_embeddings.npz -> course_embeddings.ivf.npz
+    """
+    return os.path.splitext(store_path)[0] + ".ivf.npz"
+
+
+def fingerprint(ids, embeddings) -> str:
+    """
+    Identity of an embedding store, used to detect an index built for other data.
+    Covers the embedding matrix as well as the ids: chunk ids are positional ("page.md#3"),
+    so an edited chunk keeps its id but not its embedding.
+    """
+    digest = hashlib.sha1()
+    for chunk_id in ids:
+        digest.update(str(chunk_id).encode("utf-8"))
+        digest.update(b"\n")
+    digest.update(np.ascontiguousarray(embeddings, dtype=np.float32).data)
+    return digest.hexdigest()
+
+
+def assign_nearest(x: np.ndarray, centroids: np.ndarray, spherical: bool) -> np.ndarray:
+    """
+    Index of the closest centroid for every row (max inner product if spherical, else L2).
+    """
+    assignments = np.empty(len(x), dtype=np.int32)
+    centroid_norms = None if spherical else (centroids ** 2).sum(axis=1)
+    for start in range(0, len(x), ASSIGN_CHUNK_ROWS):
+        block = x[start:start + ASSIGN_CHUNK_ROWS] @ centroids.T
+        if spherical:
+            assignments[start:start + len(block)] = block.argmax(axis=1)
+        else:
+            assignments[start:start + len(block)] = (centroid_norms - 2 * block).argmin(axis=1)
+    return assignments
+
+
+def kmeans(x: np.ndarray, n_clusters: int, n_iter: int, rng: np.random.Generator, spherical: bool) -> np.ndarray:
+    """
+    Lloyd's k-means in numpy. Spherical mode keeps centroids unit-length (cosine k-means).
+    Empty clusters are re-seeded from random points.
+    """
+    n_clusters = min(n_clusters, len(x))
+    centroids = x[rng.choice(len(x), n_clusters, replace=False)].astype(np.float32)
+    for _ in range(n_iter):
+        assignments = assign_nearest(x, centroids, spherical)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_clusters)
+        present = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+        sums = np.add.reduceat(x[order], starts, axis=0)
+
+        updated = centroids.copy()
+        updated[present] = sums if spherical else sums / counts[present, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            updated[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+        centroids = normalize_rows(updated) if spherical else updated.astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index for cosine search over unit-normalized embeddings.
+
+    A k-means coarse quantizer splits the vectors into n_lists lists; a query only scans
+    the n_probe lists whose centroids are closest. Candidates are scored exactly against
+    the embedding matrix or, with product quantization (pq_subvectors > 0), from uint8
+    codes of their residual to the list centroid via per-query lookup tables, optionally
+    re-ranked exactly.
+    """
+
+    def __init__(self, centroids, order, offsets, pq_codebooks=None, pq_codes=None, store_fingerprint=""):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.pq_codebooks = pq_codebooks
+        self.pq_codes = pq_codes
+        self.store_fingerprint = store_fingerprint
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def uses_pq(self) -> bool:
+        return self.pq_codes is not None
+
+    @classmethod
+    def build(
+        cls,
+        normalized: np.ndarray,
+        n_lists: int = None,
+        pq_subvectors: int = 0,
+        n_iter: int = 20,
+        seed: int = 0,
+        store_fingerprint: str = "",
+    ) -> "IVFIndex":
+        rng = np.random.default_rng(seed)
+        n_lists = n_lists or max(1, int(np.sqrt(len(normalized))))
+        train_size = min(len(normalized), n_lists * TRAIN_POINTS_PER_LIST)
+        sample = normalized[rng.choice(len(normalized), train_size, replace=False)]
+
+        centroids = kmeans(sample, n_lists, n_iter, rng, spherical=True)
+        assignments = assign_nearest(normalized, centroids, spherical=True)
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=len(centroids))))).astype(np.int64)
+
+        pq_codebooks = pq_codes = None
+        if pq_subvectors:
+            if normalized.shape[1] % pq_subvectors:
+                raise ValueError(f"Embedding width {normalized.shape[1]} is not divisible by {pq_subvectors} subvectors.")
+            sub_dim = normalized.shape[1] // pq_subvectors
+            sample_residuals = sample - centroids[assign_nearest(sample, centroids, spherical=True)]
+            pq_codebooks = np.stack([
+                kmeans(sample_residuals[:, m * sub_dim:(m + 1) * sub_dim], PQ_CENTROIDS, n_iter, rng, spherical=False)
+                for m in range(pq_subvectors)
+            ])
+            pq_codes = np.empty((len(normalized), pq_subvectors), dtype=np.uint8)
+            for start in range(0, len(normalized), ASSIGN_CHUNK_ROWS):
+                stop = start + ASSIGN_CHUNK_ROWS
+                residuals = normalized[start:stop] - centroids[assignments[start:stop]]
+                for m in range(pq_subvectors):
+                    pq_codes[start:stop, m] = assign_nearest(
+                        residuals[:, m * sub_dim:(m + 1) * sub_dim], pq_codebooks[m], spherical=False
+                    )
+
+        return cls(centroids, order, offsets, pq_codebooks, pq_codes, store_fingerprint)
+
+    def _candidates(self, query: np.ndarray, n_probe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vector ids in the n_probe closest lists, plus each candidate's query-centroid score.
+        """
+        n_probe = min(n_probe, self.n_lists)
+        centroid_scores = self.centroids @ query
+        lists = np.argpartition(centroid_scores, -n_probe)[-n_probe:]
+        candidates = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+        sizes = self.offsets[lists + 1] - self.offsets[lists]
+        return candidates, np.repeat(centroid_scores[lists], sizes)
+
+    def _pq_scores(self, query: np.ndarray, candidates: np.ndarray, base_scores: np.ndarray) -> np.ndarray:
+        # q.x = q.centroid + q.residual, the latter summed from per-subvector lookup tables
+        n_sub, _, sub_dim = self.pq_codebooks.shape
+        lookup = np.einsum("mcd,md->mc", self.pq_codebooks, query.reshape(n_sub, sub_dim))
+        return base_scores + lookup[np.arange(n_sub), self.pq_codes[candidates]].sum(axis=1)
+
+    def search(self, queries, k: int, n_probe: int = DEFAULT_PROBES, vectors: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k for each query. Returns (indices, scores) shaped (n_queries, k),
+        best first; rows are padded with -1 / -inf when the probed lists hold fewer than k vectors.
+        `vectors` (the normalized store) is required without PQ and enables exact re-ranking with it.
+        """
+        if not self.uses_pq and vectors is None:
+            raise ValueError("An IVF index without PQ needs the embedding matrix to score candidates.")
+
+        queries = normalize_rows(queries)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, query in enumerate(queries):
+            candidates, base_scores = self._candidates(query, n_probe)
+            if self.uses_pq:
+                candidate_scores = self._pq_scores(query, candidates, base_scores)
+                if vectors is not None:
+                    shortlist = min(len(candidates), k * RERANK_FACTOR)
+                    keep = np.argpartition(candidate_scores, -shortlist)[-shortlist:] if shortlist < len(candidates) else slice(None)
+                    candidates = candidates[keep]
+                    candidate_scores = vectors[candidates] @ query
+            else:
+                candidate_scores = vectors[candidates] @ query
+
+            top, top_scores = top_k_positions(candidate_scores, k)
+            indices[row, :len(top)] = candidates[top]
+            scores[row, :len(top)] = top_scores
+        return indices, scores
+
+    def save(self, path: str):
+        arrays = {
+            "centroids": self.centroids,
+            "order": self.order,
+            "offsets": self.offsets,
+            "fingerprint": np.array(self.store_fingerprint),
+        }
+        if self.uses_pq:
+            arrays["pq_codebooks"] = self.pq_codebooks
+            arrays["pq_codes"] = self.pq_codes
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(
+                data["centroids"],
+                data["order"],
+                data["offsets"],
+                data["pq_codebooks"] if "pq_codebooks" in data.files else None,
+                data["pq_codes"] if "pq_codes" in data.files else None,
+                str(data["fingerprint"]),
+            )
+
+
+def top_k_positions(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k positions of a 1-D score array, best first.
+    """
+    k = min(k, len(scores))
+    top = np.argpartition(scores, -k)[-k:] if k < len(scores) else np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return top, scores[top]
+
+
+def build_index_for_store(store_path: str, n_lists: int = None, pq_subvectors: int = 0) -> str:
+    """
+    Builds and saves the IVF index for an embedding store (.npz with 'ids' and 'embeddings').
+    Returns the index path.
+    """
+    with np.load(store_path, allow_pickle=True) as data:
+        ids = data["ids"]
+        embeddings = data["embeddings"]
+    index = IVFIndex.build(
+        normalize_rows(embeddings), n_lists=n_lists, pq_subvectors=pq_subvectors, store_fingerprint=fingerprint(ids, embeddings)
+    )
+    path = index_path_for(store_path)
+    index.save(path)
+    return path
+
+
+def load_index_for_store(store_path: str, store_fingerprint: str) -> IVFIndex | None:
+    """
+    Loads the index saved next to the store, or None if there is none or it was built
+    for different data (rebuild it with `python -m utils.ann_index`).
+    """
+    path = index_path_for(store_path)
+    if not os.path.exists(path):
+        return None
+    index = IVFIndex.load(path)
+    if index.store_fingerprint != store_fingerprint:
+        print(f"Ignoring stale ANN index {path}: it was built for a different embedding store.")
+        return None
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the IVF(-PQ) index next to an embedding store.")
+    parser.add_argument("store", nargs="?", default="course_embeddings.npz")
+    parser.add_argument("--lists", type=int, default=None, help="number of inverted lists (default: sqrt(n))")
+    parser.add_argument("--pq", type=int, default=0, help="PQ subvectors (0 = exact scoring inside lists)")
+    args = parser.parse_args()
+    print(f"Index written to {build_index_for_store(args.store, args.lists, args.pq)}")
@@ -0,0 +1,256 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "numpy",
+#    "beautifulsoup4",
+#    "openai",
+#    "httpx[http2]",
+# ]
+# ///
+
+"""
+Builds course_embeddings.npz from a directory of markdown / HTML course pages.
+
+Rebuilds are incremental: chunks are keyed by a hash of their text, and any chunk whose
+hash is already in the previous npz (built with the same embedder) reuses its embedding,
+so only new or edited chunks are sent to the embedder.
+
+    python -m utils.build_embeddings course_pages/ --out course_embeddings.npz
+    python -m utils.build_embeddings course_pages/ --embedder hashing   # offline stand-in
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+import numpy as np
+from typing import Callable
+
+from utils.ann_index import build_index_for_store, fingerprint, index_path_for as ann_index_path_for
+from utils.embedding_store import build_store, store_dir_for
+from utils.lexical_index import BM25Index, index_path_for as bm25_index_path_for, tokenize
+
+SOURCE_EXTENSIONS = (".md", ".markdown", ".html", ".htm")
+CHUNK_CHARS = 1500  # target chunk size; paragraphs are never split unless longer than this
+HASHING_DIM = 384
+
+HEADING_START = re.compile(r"^(?=#{1,6}\s)", re.MULTILINE)
+BLANK_LINES = re.compile(r"\n\s*\n")
+
+
+def openai_embedder(texts: list[str]) -> list[list]:
+    from utils.embed import get_embeddings
+    return get_embeddings(texts)
+
+
+def hashing_embedder(texts: list[str]) -> list[list]:
+    """
+    Deterministic bag-of-words vectors (feature hashing). Needs no network or API key;
+    meant for offline builds and testing, not for answering real queries.
+    """
+    vectors = np.zeros((len(texts), HASHING_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % HASHING_DIM
+            vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+    return vectors.tolist()
+
+
+EMBEDDERS = {
+    "openai": openai_embedder,
+    "hashing": hashing_embedder,
+}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def read_source(path: str) -> str:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    if path.lower().endswith((".html", ".htm")):
+        from bs4 import BeautifulSoup  # type: ignore
+        soup = BeautifulSoup(text, "html.parser")
+        for tag in soup(["script", "style", "nav", "header", "footer"]):
+            tag.decompose()
+        text = soup.get_text("\n\n")
+    return text
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_CHARS) -> list[str]:
+    """
+    Splits a page at headings and blank lines, then packs paragraphs into chunks of up to
+    max_chars. A heading always starts a new chunk.
+    """
+    chunks = []
+    current = ""
+    for section in HEADING_START.split(text):
+        for paragraph in BLANK_LINES.split(section):
+            paragraph = " ".join(paragraph.split())
+            if not paragraph:
+                continue
+            while len(paragraph) > max_chars:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                cut = paragraph.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                chunks.append(paragraph[:cut])
+                paragraph = paragraph[cut:].lstrip()
+            if current and len(current) + len(paragraph) + 1 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n{paragraph}" if current else paragraph
+        if current:
+            chunks.append(current)
+            current = ""
+    return chunks
+
+
+def collect_chunks(source_dir: str) -> list[tuple[str, str]]:
+    """
+    (id, text) for every unique chunk under source_dir, in a stable order. Ids are
+    "<relative path>#<n>"; a chunk repeated across pages is kept once, at its first occurrence.
+    """
+    chunks = []
+    seen = set()
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            page_id = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            for n, text in enumerate(chunk_text(read_source(path))):
+                digest = content_hash(text)
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                chunks.append((f"{page_id}#{n}", text))
+    return chunks
+
+
+def load_previous(npz_path: str, embedder_name: str) -> dict:
+    """
+    hash -> embedding from an earlier build, if it was made with the same embedder.
+    Older npz files without hashes are hashed from their chunk texts.
+    """
+    if not os.path.exists(npz_path):
+        return {}
+    try:
+        with np.load(npz_path, allow_pickle=True) as data:
+            if "embedder" in data.files and str(data["embedder"]) != embedder_name:
+                print(f"Previous build used the '{data['embedder']}' embedder; re-embedding everything.")
+                return {}
+            chunks = [str(chunk) for chunk in data["chunks"]]
+            hashes = [str(h) for h in data["hashes"]] if "hashes" in data.files else [content_hash(c) for c in chunks]
+            return dict(zip(hashes, np.asarray(data["embeddings"], dtype=np.float32)))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not read previous build {npz_path}: {e}")
+        return {}
+
+
+def embed_new(texts: list[str], embedder: Callable, batch_size: int) -> np.ndarray:
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        batch = embedder(texts[start:start + batch_size])
+        if any(not len(embedding) for embedding in batch):
+            raise RuntimeError("The embedder returned an empty embedding; aborting without writing the store.")
+        embeddings.extend(batch)
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def save_npz(npz_path: str, ids, chunks, embeddings, hashes, embedder_name: str):
+    tmp_path = npz_path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        ids=np.array(ids, dtype=object),
+        chunks=np.array(chunks, dtype=object),
+        embeddings=embeddings,
+        hashes=np.array(hashes),
+        embedder=np.array(embedder_name),
+    )
+    os.replace(tmp_path, npz_path)
+
+
+def build(
+    source_dir: str,
+    npz_path: str = "course_embeddings.npz",
+    embedder_name: str = "openai",
+    embedder: Callable = None,
+    batch_size: int = 256,
+    store_dtype: str = None,
+    ann_lists: int = None,
+    ann_pq: int = 0,
+) -> dict:
+    """
+    Chunks source_dir, embeds only chunks not in the previous build, and atomically writes
+    the npz. Index files the retriever uses (memory-mapped store, IVF index, BM25 index) are
+    rebuilt when they already exist or are requested (store_dtype / ann_lists).
+    Returns build statistics.
+    """
+    embedder = embedder or EMBEDDERS[embedder_name]
+    started = time.perf_counter()
+    chunks = collect_chunks(source_dir)
+    if not chunks:
+        raise ValueError(f"No {'/'.join(SOURCE_EXTENSIONS)} content found under {source_dir}.")
+    ids = [chunk_id for chunk_id, _ in chunks]
+    texts = [text for _, text in chunks]
+    hashes = [content_hash(text) for text in texts]
+
+    previous = load_previous(npz_path, embedder_name)
+    new_positions = [i for i, digest in enumerate(hashes) if digest not in previous]
+    new_embeddings = embed_new([texts[i] for i in new_positions], embedder, batch_size)
+
+    dim = new_embeddings.shape[1] if len(new_positions) else len(next(iter(previous.values())))
+    embeddings = np.empty((len(texts), dim), dtype=np.float32)
+    fresh = dict(zip(new_positions, new_embeddings))
+    for i, digest in enumerate(hashes):
+        embeddings[i] = fresh[i] if i in fresh else previous[digest]
+
+    save_npz(npz_path, ids, texts, embeddings, hashes, embedder_name)
+
+    outputs = [npz_path]
+    store_dir = store_dir_for(npz_path)
+    if store_dtype or os.path.exists(store_dir):
+        if not store_dtype:
+            with open(os.path.join(store_dir, "meta.json"), encoding="utf-8") as f:
+                store_dtype = json.load(f)["dtype"]
+        outputs.append(build_store(ids, texts, embeddings, store_dir, store_dtype))
+    if ann_lists or ann_pq or os.path.exists(ann_index_path_for(npz_path)):
+        outputs.append(build_index_for_store(npz_path, ann_lists, ann_pq))
+    bm25_path = bm25_index_path_for(npz_path)
+    BM25Index.build(texts, fingerprint(ids, embeddings)).save(bm25_path)
+    outputs.append(bm25_path)
+
+    return {
+        "chunks": len(texts),
+        "embedded": len(new_positions),
+        "reused": len(texts) - len(new_positions),
+        "removed": len(set(previous) - set(hashes)),
+        "seconds": round(time.perf_counter() - started, 2),
+        "outputs": outputs,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally build the course embedding store from markdown/HTML pages.")
+    parser.add_argument("source_dir")
+    parser.add_argument("--out", default="course_embeddings.npz")
+    parser.add_argument("--embedder", choices=sorted(EMBEDDERS), default="openai")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--store-dtype", choices=("float16", "int8"), default=None,
+                        help="also write the memory-mapped store (rebuilt automatically if it already exists)")
+    parser.add_argument("--lists", type=int, default=None, help="also build the IVF index with this many lists")
+    parser.add_argument("--pq", type=int, default=0, help="PQ subvectors for the IVF index")
+    args = parser.parse_args()
+    stats = build(args.source_dir, args.out, args.embedder, batch_size=args.batch_size,
+                  store_dtype=args.store_dtype, ann_lists=args.lists, ann_pq=args.pq)
+    print(f"{stats['chunks']} chunks: {stats['embedded']} embedded, {stats['reused']} reused, "
+          f"{stats['removed']} removed ({stats['seconds']}s)")
+    for path in stats["outputs"]:
+        print(f"  wrote {path}")
@@ -0,0 +1,206 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+ARTIFACT_CACHE_DIR = os.environ.get("ARTIFACT_CACHE_DIR", "/tmp/artifact_cache")
+ARTIFACT_CACHE_MAX_BYTES = int(os.environ.get("ARTIFACT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+CHUNK_BYTES = 1024 * 1024
+DIGEST_MEMO_SIZE = 4096
+
+# realpath -> (inode, size, mtime_ns, sha256); lets tools find a file's digest without re-reading it
+_digests = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def _remember_digest(path: str, stat: os.stat_result, digest: str):
+    with _digests_lock:
+        _digests[path] = (stat.st_ino, stat.st_size, stat.st_mtime_ns, digest)
+        _digests.move_to_end(path)
+        while len(_digests) > DIGEST_MEMO_SIZE:
+            _digests.popitem(last=False)
+
+
+def file_digest(path: str) -> str:
+    """
+    sha256 of a file's content. Remembered per path while the file's inode, size and
+    mtime are unchanged, so uploads hashed by save_upload are never read again for it.
+    """
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    with _digests_lock:
+        memo = _digests.get(path)
+    if memo is not None and memo[:3] == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+        return memo[3]
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_BYTES):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    _remember_digest(path, stat, digest)
+    return digest
+
+
+def save_upload(stream, path: str) -> str:
+    """
+    Streams an uploaded file to path, hashing it on the way; returns its sha256.
+    """
+    sha = hashlib.sha256()
+    with open(path, "wb") as f:
+        while chunk := stream.read(CHUNK_BYTES):
+            sha.update(chunk)
+            f.write(chunk)
+    digest = sha.hexdigest()
+    _remember_digest(os.path.realpath(path), os.stat(path), digest)
+    return digest
+
+
+class ArtifactCache:
+    """
+    On-disk cache of artifacts derived from file contents, keyed by content hash + kind:
+    a CSV's Parquet copy, a PDF's page text, an HTML file's DOM summary, an image description...
+
+    Entries live at <directory>/<sha256>/<kind>, so the same file uploaded in another request
+    (under any name) is processed once. The cache is size-bounded and evicts least recently
+    used artifacts; a hit refreshes the artifact's mtime.
+    """
+
+    def __init__(self, directory: str = ARTIFACT_CACHE_DIR, max_bytes: int = ARTIFACT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes = None  # total size, computed on first store
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def path(self, digest: str, kind: str) -> str:
+        return os.path.join(self.directory, digest, kind)
+
+    def get(self, digest: str, kind: str) -> str | None:
+        """
+        Path of a cached artifact, or None on a miss.
+        """
+        path = self.path(digest, kind)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    @contextmanager
+    def writing(self, digest: str, kind: str):
+        """
+        Yields a temporary path to write the artifact to; it is stored atomically
+        when the block exits without an exception.
+        """
+        entry_dir = os.path.join(self.directory, digest)
+        os.makedirs(entry_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, prefix=".tmp-")
+        os.close(fd)
+        try:
+            yield tmp_path
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, self.path(digest, kind))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.stores += 1
+        self._added(size)
+
+    def get_text(self, digest: str, kind: str) -> str | None:
+        path = self.get(digest, kind)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        except OSError:  # evicted in between
+            return None
+
+    def put_text(self, digest: str, kind: str, text: str):
+        with self.writing(digest, kind) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+    def text(self, digest: str, kind: str, build) -> str:
+        """
+        The cached text artifact, or build() stored under (digest, kind).
+        """
+        text = self.get_text(digest, kind)
+        if text is None:
+            text = build()
+            self.put_text(digest, kind, text)
+        return text
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for digest in os.listdir(self.directory):
+            entry_dir = os.path.join(self.directory, digest)
+            try:
+                names = os.listdir(entry_dir)
+            except OSError:
+                continue
+            for name in names:
+                if name.startswith("."):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(entry_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(entry_dir, name)))
+        return entries
+
+    def _added(self, size: int):
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                os.rmdir(os.path.dirname(path))  # only succeeds once the entry is empty
+            except OSError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._bytes = total
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "artifacts": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+_artifact_cache = None
+
+
+def get_artifact_cache() -> ArtifactCache:
+    global _artifact_cache
+    if _artifact_cache is None:
+        _artifact_cache = ArtifactCache()
+    return _artifact_cache
@@ -1,45 +1,159 @@
-import numpy as np
+import asyncio
 import os
+import threading
+import numpy as np
 from typing import List, Tuple
-from utils.embed import get_query_embedding
+from utils.embed import get_query_embedding_async, get_embeddings_async
+from utils.event_loop import run_sync
+from utils.ann_index import DEFAULT_PROBES, load_index_for_store
+from utils.embedding_store import EmbeddingStore, open_store
+from utils.lexical_index import BM25Index, load_or_build_for_store, reciprocal_rank_fusion
+
+STORE_PATH = "course_embeddings.npz"
+
+# "vector" (embedding only), "lexical" (BM25 only, no network) or "hybrid" (both, fused)
+RETRIEVAL_MODE = os.environ.get("RETRIEVAL_MODE", "hybrid")
+# In hybrid mode, answer from BM25 alone if the query embedding takes longer than this
+HYBRID_EMBED_TIMEOUT_SEC = float(os.environ.get("HYBRID_EMBED_TIMEOUT_SEC", "3"))
+FUSION_DEPTH = 20  # candidates taken from each ranking before fusion
 
-# Load your course-only embedding database
-npz_data = np.load("course_embeddings.npz", allow_pickle=True)
-stored_chunks = npz_data["chunks"]
-stored_ids = npz_data["ids"]
-stored_embeddings = npz_data["embeddings"]
+# Your course-only embedding database, opened on the first query (see get_store)
+_store = None
+_ann_index = None
+_store_lock = threading.Lock()
+_lexical_index = None
+_lexical_lock = threading.Lock()
 
-def cosine_similarity(vec1, vec2):
+def get_store() -> EmbeddingStore:
     """
-    Computes cosine similarity between two vectors.
+    Opens the embedding store (and its ANN index, if built) once, on first use.
+    Prefers the memory-mapped course_embeddings.store/ over the in-memory npz.
     """
-    v1 = np.array(vec1)
-    v2 = np.array(vec2)
-    return np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
+    global _store, _ann_index
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = open_store(STORE_PATH)
+                # Approximate index (built with `python -m utils.ann_index`); exact search when absent
+                _ann_index = load_index_for_store(STORE_PATH, store.fingerprint)
+                _store = store
+    return _store
 
-def get_top_k_chunks(query: str, k: int = 3) -> List[Tuple[str, str, float]]:
+def get_lexical_index() -> BM25Index:
+    """
+    Loads course_embeddings.bm25.npz (or builds the index from the store's chunks) on first use.
+    """
+    global _lexical_index
+    if _lexical_index is None:
+        with _lexical_lock:
+            if _lexical_index is None:
+                _lexical_index = load_or_build_for_store(STORE_PATH, get_store())
+    return _lexical_index
+
+def get_top_k_chunks(query: str, k: int = 3, mode: str = RETRIEVAL_MODE) -> List[Tuple[str, str, float]]:
     """
     Given a query, return the top-k most relevant course content chunks.
     Returns a list of tuples: (id, chunk_text, similarity_score)
+    mode is "vector", "lexical" (no network call) or "hybrid" (reciprocal rank fusion of both,
+    in which case the score is the fused score).
+    """
+    if mode == "lexical":
+        return search_lexical(query, k)
+    return run_sync(get_top_k_chunks_async(query, k, mode))
+
+async def get_top_k_chunks_async(query: str, k: int = 3, mode: str = RETRIEVAL_MODE) -> List[Tuple[str, str, float]]:
+    """
+    Async variant of get_top_k_chunks; the query embedding goes over the shared HTTP client.
+    In hybrid mode the BM25 search runs while the embedding is in flight. Opening the store
+    and indexes (possibly building BM25 on a cold start) and ranking run in worker threads,
+    off the shared event loop.
+    """
+    if mode == "lexical":
+        return await asyncio.to_thread(search_lexical, query, k)
+    if mode == "vector":
+        return await asyncio.to_thread(rank_chunks, await get_query_embedding_async(query), k)
+    if mode != "hybrid":
+        raise ValueError(f"Unsupported retrieval mode '{mode}'. Must be 'vector', 'lexical' or 'hybrid'.")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + HYBRID_EMBED_TIMEOUT_SEC
+    embedding_task = asyncio.ensure_future(get_query_embedding_async(query))
+    lexical_indices, lexical_scores = await asyncio.to_thread(
+        lambda: get_lexical_index().search(query, max(k, FUSION_DEPTH))
+    )
+    try:
+        # Shielded: a slow embedding still lands in the cache for the next query
+        embedding = await asyncio.wait_for(asyncio.shield(embedding_task), max(0.0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        print("Query embedding timed out; answering from the lexical index only.")
+        embedding = []
+
+    if not len(embedding):
+        return await asyncio.to_thread(chunk_results, lexical_indices[:k], lexical_scores[:k])
+    return await asyncio.to_thread(fuse_rankings, embedding, lexical_indices, k)
+
+def fuse_rankings(embedding, lexical_indices, k: int) -> List[Tuple[str, str, float]]:
+    """
+    Reciprocal rank fusion of the vector ranking for embedding with a BM25 ranking.
     """
-    query_embedding = get_query_embedding(query)
-    if not query_embedding:
-        return []
+    vector_indices, _ = vector_search([embedding], max(k, FUSION_DEPTH))
+    fused = reciprocal_rank_fusion([vector_indices[0][vector_indices[0] >= 0], lexical_indices], k)
+    return chunk_results([idx for idx, _ in fused], [score for _, score in fused])
 
-    similarities = [
-        cosine_similarity(query_embedding, stored_embeddings[i])
-        for i in range(len(stored_chunks))
+def search_lexical(query: str, k: int = 3) -> List[Tuple[str, str, float]]:
+    """
+    BM25-only top-k chunks; needs no embedding and no network.
+    """
+    indices, scores = get_lexical_index().search(query, k)
+    return chunk_results(indices, scores)
+
+def chunk_results(indices, scores) -> List[Tuple[str, str, float]]:
+    store = get_store()
+    return [
+        (store.ids[idx], store.chunk_text(idx), float(score))
+        for idx, score in zip(indices, scores)
+        if idx >= 0
     ]
 
-    # Get indices of top-k similarities
-    top_k_indices = sorted(range(len(similarities)), key=lambda i: similarities[i], reverse=True)[:k]
+async def get_top_k_chunks_batch_async(queries: List[str], k: int = 3) -> List[List[Tuple[str, str, float]]]:
+    """
+    Top-k chunks for many queries: uncached embeddings are fetched in one batched call
+    and all queries are ranked together.
+    """
+    embeddings = await get_embeddings_async(queries)
+    return await asyncio.to_thread(rank_chunks_batch, embeddings, k)
+
+def get_top_k_chunks_batch(queries: List[str], k: int = 3) -> List[List[Tuple[str, str, float]]]:
+    return run_sync(get_top_k_chunks_batch_async(queries, k))
+
+def rank_chunks(query_embedding, k: int = 3) -> List[Tuple[str, str, float]]:
+    """
+    Ranks the stored chunks against an already-computed query embedding.
+    """
+    return rank_chunks_batch([query_embedding], k)[0]
 
-    top_k_results = []
-    for idx in top_k_indices:
-        top_k_results.append((
-            stored_ids[idx],
-            stored_chunks[idx],
-            similarities[idx]
-        ))
+def rank_chunks_batch(query_embeddings, k: int = 3, n_probe: int = DEFAULT_PROBES) -> List[List[Tuple[str, str, float]]]:
+    """
+    Ranks the stored chunks against many query embeddings at once, through the ANN index
+    (scanning n_probe lists) when one is available.
+    Queries whose embedding is empty (embedding error) get an empty result.
+    """
+    results = [[] for _ in query_embeddings]
+    valid = [i for i, embedding in enumerate(query_embeddings) if len(embedding)]
+    if not valid:
+        return results
 
-    return top_k_results
+    indices, scores = vector_search([query_embeddings[i] for i in valid], k, n_probe)
+    for row, i in enumerate(valid):
+        results[i] = chunk_results(indices[row], scores[row])
+    return results
+
+def vector_search(query_embeddings, k: int, n_probe: int = DEFAULT_PROBES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (indices, scores) of the top-k chunks per embedding, via the ANN index when available.
+    Index rows may be padded with -1.
+    """
+    store = get_store()
+    if _ann_index is not None:
+        return _ann_index.search(query_embeddings, k, n_probe=n_probe, vectors=store.rows)
+    return store.search(query_embeddings, k)
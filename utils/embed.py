@@ -1,18 +1,191 @@
 import openai
 import os
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import weakref
+import numpy as np
+from collections import OrderedDict
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from utils.event_loop import run_sync
+from utils.http_client import get_async_client
 
-def get_query_embedding(text: str, model="text-embedding-3-small") -> list:
+DEFAULT_MODEL = "text-embedding-3-small"
+EMBED_CACHE_SIZE = int(os.environ.get("EMBED_CACHE_SIZE", "4096"))  # in-memory entries
+EMBED_CACHE_DB = os.environ.get("EMBED_CACHE_DB")  # optional SQLite file shared across restarts
+EMBED_BATCH_SIZE = 256  # texts per embeddings request
+
+# AsyncOpenAI clients wrap the pooled httpx client of their event loop
+_async_clients = weakref.WeakKeyDictionary()
+
+# Embeddings currently being fetched, per event loop: key -> Future
+_in_flight = weakref.WeakKeyDictionary()
+coalesced_requests = 0
+remote_calls = 0
+
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=get_async_client())
+        _async_clients[loop] = client
+    return client
+
+def cache_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
     """
-    Returns a 1536-dimensional embedding for the input text using OpenAI's embedding model.
+    Content-hash keyed embedding cache: a bounded in-memory LRU in front of an optional
+    SQLite table, so identical texts are embedded once per process (or once ever with a DB).
+    Embeddings are kept as float32 arrays (~6 KB each at 1536 dims, not ~49 KB as float lists).
+    """
+
+    def __init__(self, max_entries: int = EMBED_CACHE_SIZE, db_path: str = EMBED_CACHE_DB):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+            self._db.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    embedding = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, embedding)
+                    self.disk_hits += 1
+                    return embedding
+            self.misses += 1
+            return None
+
+    def put_many(self, items: dict):
+        with self._lock:
+            items = {key: np.asarray(embedding, dtype=np.float32) for key, embedding in items.items()}
+            for key, embedding in items.items():
+                self._remember(key, embedding)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, embedding.tobytes()) for key, embedding in items.items()],
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, embedding: np.ndarray):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "disk": self._db is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": coalesced_requests,
+            "remote_calls": remote_calls,
+        }
+
+
+embedding_cache = EmbeddingCache()
+
+async def fetch_embeddings(texts: list[str], model: str) -> list[np.ndarray]:
     """
-    try:
-        response = openai.embeddings.create(
-            input=[text],
+    Embeds texts remotely in EMBED_BATCH_SIZE batches. Returns one embedding per text.
+    """
+    global remote_calls
+    embeddings = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        remote_calls += 1
+        response = await get_async_openai_client().embeddings.create(
+            input=texts[start:start + EMBED_BATCH_SIZE],
             model=model
         )
-        return response.data[0].embedding
-    except Exception as e:
-        print(f"Embedding error: {e}")
-        return []
+        embeddings.extend(
+            np.asarray(item.embedding, dtype=np.float32)
+            for item in sorted(response.data, key=lambda item: item.index)
+        )
+    return embeddings
+
+async def get_embeddings_async(texts: list[str], model: str = DEFAULT_MODEL) -> list[np.ndarray]:
+    """
+    Embeds many texts with one remote call for all cache misses.
+    Texts already cached are free; texts another request is already embedding are awaited
+    rather than requested twice. Failed texts come back as [] and are not cached.
+    """
+    global coalesced_requests
+    loop = asyncio.get_running_loop()
+    in_flight = _in_flight.setdefault(loop, {})
+
+    keys = [cache_key(text, model) for text in texts]
+    results = {}
+    waiting = {}
+    to_fetch = {}
+    for key, text in zip(keys, texts):
+        if key in results or key in waiting or key in to_fetch:
+            continue
+        cached = embedding_cache.get(key)
+        if cached is not None:
+            results[key] = cached
+        elif key in in_flight:
+            coalesced_requests += 1
+            waiting[key] = in_flight[key]
+        else:
+            to_fetch[key] = text
+            in_flight[key] = loop.create_future()
+
+    if to_fetch:
+        fetched = {key: [] for key in to_fetch}
+        try:
+            fetched = dict(zip(to_fetch, await fetch_embeddings(list(to_fetch.values()), model)))
+            embedding_cache.put_many(fetched)
+        except Exception as e:
+            print(f"Embedding error: {e}")
+        finally:
+            # Wake up coalesced waiters even if this request failed or was cancelled
+            for key in to_fetch:
+                future = in_flight.pop(key)
+                if not future.done():
+                    future.set_result(fetched.get(key, []))
+        results.update(fetched)
+
+    for key, future in waiting.items():
+        # Shielded: a cancelled waiter (e.g. a wait_for timeout) must not cancel the shared future
+        results[key] = await asyncio.shield(future)
+
+    return [results[key] for key in keys]
+
+def get_embeddings(texts: list[str], model: str = DEFAULT_MODEL) -> list[np.ndarray]:
+    """
+    Blocking variant of get_embeddings_async.
+    """
+    return run_sync(get_embeddings_async(texts, model))
+
+async def get_query_embedding_async(text: str, model=DEFAULT_MODEL) -> np.ndarray:
+    """
+    Returns a 1536-dimensional embedding for the input text using OpenAI's embedding model.
+    Requests go over the shared pooled HTTP client and are cached by content hash.
+    """
+    return (await get_embeddings_async([text], model))[0]
+
+def get_query_embedding(text: str, model=DEFAULT_MODEL) -> np.ndarray:
+    """
+    Blocking variant of get_query_embedding_async.
+    """
+    return run_sync(get_query_embedding_async(text, model))
@@ -0,0 +1,208 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "numpy",
+# ]
+# ///
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Tuple
+
+from utils.ann_index import fingerprint
+from utils.vector_search import normalize_rows, top_k_from_scores
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+TEXTS_FILE = "texts.bin"
+TEXT_OFFSETS_FILE = "text_offsets.npy"
+IDS_FILE = "ids.json"
+META_FILE = "meta.json"
+
+SCORE_BLOCK_ROWS = 32768  # rows dequantized to float32 at a time while scoring
+SUPPORTED_DTYPES = ("float16", "int8")
+
+
+def store_dir_for(npz_path: str) -> str:
+    """
+    The mapped store lives next to the npz: course_embeddings.npz -> course_embeddings.store/
+    """
+    return os.path.splitext(npz_path)[0] + ".store"
+
+
+def quantize(normalized: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray | None]:
+    """
+    float16: plain cast. int8: symmetric per-row scale so that row max maps to 127.
+    """
+    if dtype == "float16":
+        return normalized.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(normalized).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(normalized / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    raise ValueError(f"Unsupported dtype '{dtype}'. Must be one of {SUPPORTED_DTYPES}.")
+
+
+class DequantizedRows:
+    """
+    Row access (store[idx]) that returns float32 rows, so the ANN index can score candidates
+    straight from the memory-mapped matrix.
+    """
+
+    def __init__(self, vectors, scales):
+        self.vectors = vectors
+        self.scales = scales
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def __getitem__(self, idx) -> np.ndarray:
+        rows = np.asarray(self.vectors[idx], dtype=np.float32)
+        if self.scales is not None:
+            rows = rows * self.scales[idx][..., None]
+        return rows
+
+
+class EmbeddingStore:
+    """
+    Read-only embedding store.
+
+    The memory-mapped format (see build_store) keeps quantized vectors in a raw .npy opened
+    with mmap_mode="r" and chunk texts in one UTF-8 file indexed by offsets, so every worker
+    process shares the same OS page cache and only touched texts are decoded.
+    The legacy .npz is still readable (fully loaded into memory) via from_npz.
+    """
+
+    def __init__(self, vectors, ids, fingerprint_hex: str, scales=None, texts=None, text_offsets=None, text_list=None):
+        self.vectors = vectors
+        self.scales = scales
+        self.ids = ids
+        self.fingerprint = fingerprint_hex
+        self._texts = texts
+        self._text_offsets = text_offsets
+        self._text_list = text_list
+        self.rows = DequantizedRows(vectors, scales)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @classmethod
+    def open(cls, store_dir: str) -> "EmbeddingStore":
+        with open(os.path.join(store_dir, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(store_dir, IDS_FILE), encoding="utf-8") as f:
+            ids = json.load(f)
+
+        scales_path = os.path.join(store_dir, SCALES_FILE)
+        with open(os.path.join(store_dir, TEXTS_FILE), "rb") as f:
+            # Empty files cannot be mapped
+            texts = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        return cls(
+            np.load(os.path.join(store_dir, VECTORS_FILE), mmap_mode="r"),
+            ids,
+            meta["fingerprint"],
+            scales=np.load(scales_path) if os.path.exists(scales_path) else None,
+            texts=texts,
+            text_offsets=np.load(os.path.join(store_dir, TEXT_OFFSETS_FILE), mmap_mode="r"),
+        )
+
+    @classmethod
+    def from_npz(cls, npz_path: str) -> "EmbeddingStore":
+        with np.load(npz_path, allow_pickle=True) as data:
+            ids = [str(chunk_id) for chunk_id in data["ids"]]
+            embeddings = data["embeddings"]
+            return cls(
+                normalize_rows(embeddings),
+                ids,
+                fingerprint(ids, embeddings),
+                text_list=[str(chunk) for chunk in data["chunks"]],
+            )
+
+    def chunk_text(self, i: int) -> str:
+        if self._text_list is not None:
+            return self._text_list[i]
+        start, end = int(self._text_offsets[i]), int(self._text_offsets[i + 1])
+        return self._texts[start:end].decode("utf-8")
+
+    def search(self, queries, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact cosine top-k, dequantizing SCORE_BLOCK_ROWS rows at a time to bound memory.
+        """
+        queries = normalize_rows(queries)
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, len(self))
+            scores[:, start:stop] = queries @ self.rows[start:stop].T
+        return top_k_from_scores(scores, k)
+
+
+def build_store(ids, chunks, embeddings, store_dir: str, dtype: str = "float16") -> str:
+    """
+    Writes the memory-mapped store atomically (temp dir + rename) and returns its path.
+    """
+    ids = [str(chunk_id) for chunk_id in ids]
+    store_fingerprint = fingerprint(ids, embeddings)
+    vectors, scales = quantize(normalize_rows(embeddings), dtype)
+
+    parent = os.path.dirname(os.path.abspath(store_dir))
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix=".store-")
+    try:
+        np.save(os.path.join(tmp_dir, VECTORS_FILE), vectors)
+        if scales is not None:
+            np.save(os.path.join(tmp_dir, SCALES_FILE), scales)
+
+        offsets = [0]
+        with open(os.path.join(tmp_dir, TEXTS_FILE), "wb") as f:
+            for chunk in chunks:
+                encoded = str(chunk).encode("utf-8")
+                f.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+        np.save(os.path.join(tmp_dir, TEXT_OFFSETS_FILE), np.array(offsets, dtype=np.int64))
+
+        with open(os.path.join(tmp_dir, IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(ids, f, ensure_ascii=False)
+        with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"dtype": dtype, "count": len(ids), "dim": int(vectors.shape[1]), "fingerprint": store_fingerprint}, f)
+
+        old_dir = None
+        if os.path.exists(store_dir):
+            old_dir = tmp_dir + ".old"
+            os.replace(store_dir, old_dir)
+        os.replace(tmp_dir, store_dir)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return store_dir
+
+
+def convert_npz(npz_path: str, dtype: str = "float16") -> str:
+    with np.load(npz_path, allow_pickle=True) as data:
+        return build_store(data["ids"], data["chunks"], data["embeddings"], store_dir_for(npz_path), dtype)
+
+
+def open_store(npz_path: str) -> EmbeddingStore:
+    """
+    Opens the memory-mapped store next to the npz if it exists and is not older than the npz,
+    else loads the npz itself.
+    """
+    store_dir = store_dir_for(npz_path)
+    meta_path = os.path.join(store_dir, META_FILE)
+    if os.path.exists(meta_path):
+        if not os.path.exists(npz_path) or os.path.getmtime(meta_path) >= os.path.getmtime(npz_path):
+            return EmbeddingStore.open(store_dir)
+        print(f"Ignoring stale store {store_dir}: {npz_path} is newer (rebuild it with `python -m utils.embedding_store`).")
+    return EmbeddingStore.from_npz(npz_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert an embedding .npz into the memory-mapped store format.")
+    parser.add_argument("npz", nargs="?", default="course_embeddings.npz")
+    parser.add_argument("--dtype", choices=SUPPORTED_DTYPES, default="float16")
+    args = parser.parse_args()
+    print(f"Store written to {convert_npz(args.npz, args.dtype)}")
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the process-wide event loop, starting it on a daemon thread on first use.
+    All conversations (and the pooled HTTP client) live on this one loop.
+    """
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="event-loop", daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout: float = None):
+    """
+    Runs a coroutine on the shared event loop and blocks the calling thread until it finishes.
+    Must not be called from the shared loop itself; await the coroutine there instead.
+    """
+    loop = get_event_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called from the shared event loop; await the coroutine instead.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
@@ -3,13 +3,16 @@ import os
 import base64
 import re
 
-OUTPUT_FOLDER = "/tmp/outputs"
+from utils.workspace import Workspace, default_workspace
 
-def prepare_response(conversation_result: str) -> dict:
+def prepare_response(conversation_result: str, workspace: Workspace = None) -> dict:
     """
     Takes the final planner message from run_conversation and
     returns a structured JSON including base64-encoded files if any.
+    Files are looked up in the workspace's outputs directory.
     """
+    workspace = workspace or default_workspace()
+
     if not conversation_result:
         return {"final_answer": "", "files": [], "status": "complete"}
 
@@ -30,7 +33,7 @@ def prepare_response(conversation_result: str) -> dict:
     # Encode files as base64
     encoded_files = []
     for filename in files_to_return:
-        file_path = os.path.join(OUTPUT_FOLDER, filename)
+        file_path = os.path.join(workspace.outputs, filename)
         if os.path.exists(file_path) and os.path.isfile(file_path):
             with open(file_path, "rb") as f:
                 file_bytes = f.read()
@@ -0,0 +1,57 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "httpx[http2]",
+# ]
+# ///
+
+import os
+import asyncio
+import weakref
+import httpx # type: ignore
+
+try:
+    import h2  # type: ignore # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+AIPIPE_CHAT_URL = "https://aipipe.org/openai/v1/chat/completions"
+
+# Bounded pool shared by every in-flight conversation on a loop
+POOL_LIMITS = httpx.Limits(
+    max_connections=int(os.environ.get("HTTP_MAX_CONNECTIONS", "64")),
+    max_keepalive_connections=int(os.environ.get("HTTP_MAX_KEEPALIVE", "16")),
+    keepalive_expiry=60.0,
+)
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# httpx.AsyncClient connections are bound to the loop that opened them
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Returns the long-lived AsyncClient (keep-alive, HTTP/2 when `h2` is installed)
+    for the running event loop, creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=POOL_LIMITS, timeout=DEFAULT_TIMEOUT)
+        _clients[loop] = client
+    return client
+
+
+async def post_chat_completion(payload: dict) -> httpx.Response:
+    """
+    Sends a chat completion request to AI Pipe over the pooled client.
+    """
+    return await get_async_client().post(
+        AIPIPE_CHAT_URL,
+        headers={
+            "Authorization": f"Bearer {os.getenv('AIPIPE_TOKEN')}",
+            "Content-Type": "application/json",
+        },
+        json=payload,
+    )
@@ -0,0 +1,159 @@
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#    "numpy",
+# ]
+# ///
+
+import argparse
+import os
+import re
+import numpy as np
+from collections import Counter
+from typing import Tuple
+
+from utils.ann_index import top_k_positions
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the this to was what when "
+    "where which who will with you your".split()
+)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def index_path_for(store_path: str) -> str:
+    """
+    The index lives next to the embeddings: course_embeddings.npz -> course_embeddings.bm25.npz
+    """
+    return os.path.splitext(store_path)[0] + ".bm25.npz"
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk texts with compact postings: for term t, its documents and
+    term frequencies are doc_ids[offsets[t]:offsets[t + 1]] and term_freqs[...].
+    Answers queries locally, with no embedding call.
+    """
+
+    def __init__(self, vocabulary: dict, offsets, doc_ids, term_freqs, doc_lengths, store_fingerprint: str = ""):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.store_fingerprint = store_fingerprint
+        n_docs = len(doc_lengths)
+        doc_freqs = np.diff(offsets)
+        self.idf = np.log(1.0 + (n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        self.length_norm = (BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / max(doc_lengths.mean(), 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, texts, store_fingerprint: str = "") -> "BM25Index":
+        vocabulary = {}
+        term_ids, doc_ids, term_freqs, doc_lengths = [], [], [], []
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for token, count in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                doc_ids.append(doc_id)
+                term_freqs.append(count)
+
+        term_ids = np.array(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(term_ids, minlength=len(vocabulary))))).astype(np.int64)
+        return cls(
+            vocabulary,
+            offsets,
+            np.array(doc_ids, dtype=np.int32)[order],
+            np.array(term_freqs, dtype=np.float32)[order],
+            np.array(doc_lengths, dtype=np.float32),
+            store_fingerprint,
+        )
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k documents for the query, best first. Documents sharing no term are never returned.
+        """
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs, freqs = self.doc_ids[start:end], self.term_freqs[start:end]
+            # doc ids are unique within a posting list, so fancy-index += is safe
+            scores[docs] += self.idf[term] * freqs * (BM25_K1 + 1) / (freqs + self.length_norm[docs])
+
+        matched = np.flatnonzero(scores)
+        top, top_scores = top_k_positions(scores[matched], k)
+        return matched[top], top_scores
+
+    def save(self, path: str):
+        terms = np.array(sorted(self.vocabulary, key=self.vocabulary.get))
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            terms=terms,
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+            fingerprint=np.array(self.store_fingerprint),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            vocabulary = {str(term): i for i, term in enumerate(data["terms"])}
+            return cls(
+                vocabulary,
+                data["offsets"],
+                data["doc_ids"],
+                data["term_freqs"],
+                data["doc_lengths"],
+                str(data["fingerprint"]),
+            )
+
+
+def load_or_build_for_store(store_path: str, store) -> BM25Index:
+    """
+    Loads the saved index when it matches the store, else builds one in memory from its texts.
+    """
+    path = index_path_for(store_path)
+    if os.path.exists(path):
+        index = BM25Index.load(path)
+        if index.store_fingerprint == store.fingerprint:
+            return index
+        print(f"Ignoring stale BM25 index {path}: it was built for a different embedding store.")
+    return BM25Index.build((store.chunk_text(i) for i in range(len(store))), store.fingerprint)
+
+
+def reciprocal_rank_fusion(rankings, k: int, rrf_k: int = 60) -> list[tuple[int, float]]:
+    """
+    Fuses ranked lists of document ids: score(d) = sum over lists of 1 / (rrf_k + rank(d)).
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            fused[int(doc)] = fused.get(int(doc), 0.0) + 1.0 / (rrf_k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+if __name__ == "__main__":
+    from utils.embedding_store import open_store
+
+    parser = argparse.ArgumentParser(description="Build the BM25 index next to an embedding store.")
+    parser.add_argument("store", nargs="?", default="course_embeddings.npz")
+    args = parser.parse_args()
+    store = open_store(args.store)
+    path = index_path_for(args.store)
+    BM25Index.build((store.chunk_text(i) for i in range(len(store))), store.fingerprint).save(path)
+    print(f"Index written to {path}")
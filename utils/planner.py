@@ -1,29 +1,24 @@
 # /// script
 # requires-python = ">=3.11"
 # dependencies = [
-#    "httpx",
+#    "httpx[http2]",
 # ]
 # ///
 
-import os
-import httpx # type: ignore
+from utils.event_loop import run_sync
+from utils.http_client import post_chat_completion
 
-def generate_planner_response(messages: list[dict]) -> str:
-    response = httpx.post(
-        "https://aipipe.org/openai/v1/chat/completions",
-        headers={
-            "Authorization": f"Bearer {os.getenv('AIPIPE_TOKEN')}",
-            "Content-Type": "application/json",
-        },
-        json={
-            "model": "gpt-4o-mini",
-            "messages": messages,
-        },
-        timeout=60.0,
-    )
+async def generate_planner_response_async(messages: list[dict]) -> str:
+    response = await post_chat_completion({
+        "model": "gpt-4o-mini",
+        "messages": messages,
+    })
 
     try:
         result = response.json()
         return result["choices"][0]["message"]["content"]
     except Exception:
-        return f"Planner Error: {response.text}"
\ No newline at end of file
+        return f"Planner Error: {response.text}"
+
+def generate_planner_response(messages: list[dict]) -> str:
+    return run_sync(generate_planner_response_async(messages))
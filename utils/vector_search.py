@@ -0,0 +1,36 @@
+import numpy as np
+from typing import Tuple
+
+def normalize_rows(matrix) -> np.ndarray:
+    """
+    Returns a contiguous float32 copy of the matrix with every row scaled to unit length.
+    Zero rows are left as zeros.
+    """
+    matrix = np.ascontiguousarray(np.atleast_2d(matrix), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def similarity_top_k(normalized_matrix: np.ndarray, queries, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cosine top-k of each query against a row-normalized matrix.
+    Returns (indices, scores), both shaped (n_queries, k), best match first.
+    """
+    return top_k_from_scores(normalize_rows(queries) @ normalized_matrix.T, k)
+
+def top_k_from_scores(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k columns of each row of a (n_queries, n_items) score matrix, best first.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.intp), empty.astype(np.float32)
+
+    if k < scores.shape[1]:
+        candidates = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
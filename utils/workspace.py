@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+# Logical directories the planner, worker and tool schemas refer to
+UPLOAD_FOLDER = "/tmp/uploads"
+OUTPUT_FOLDER = "/tmp/outputs"
+
+# Parent directory for per-request workspaces
+WORKSPACE_ROOT = os.environ.get("WORKSPACE_ROOT", "/tmp/workspaces")
+
+
+class Workspace:
+    """
+    A request-private pair of uploads/outputs directories.
+
+    Prompts and tool schemas keep talking about '/tmp/uploads' and '/tmp/outputs';
+    tools resolve those logical names to this workspace's real directories.
+    """
+
+    def __init__(self, root: str, uploads: str = None, outputs: str = None):
+        self.root = root
+        self.uploads = uploads or os.path.join(root, "uploads")
+        self.outputs = outputs or os.path.join(root, "outputs")
+        os.makedirs(self.uploads, exist_ok=True)
+        os.makedirs(self.outputs, exist_ok=True)
+
+    def resolve(self, directory: str) -> str | None:
+        """
+        Maps 'uploads' / 'outputs' (or their '/tmp/...' forms) to this workspace's directory.
+        Returns None for anything else.
+        """
+        if not directory:
+            return None
+        return {
+            "uploads": self.uploads,
+            UPLOAD_FOLDER: self.uploads,
+            "outputs": self.outputs,
+            OUTPUT_FOLDER: self.outputs,
+        }.get(directory.rstrip("/"))
+
+    def to_physical(self, text: str) -> str:
+        """
+        Rewrites logical '/tmp/uploads' and '/tmp/outputs' paths in text (e.g. code) to real paths.
+        """
+        return text.replace(UPLOAD_FOLDER, self.uploads).replace(OUTPUT_FOLDER, self.outputs)
+
+    def to_logical(self, text: str) -> str:
+        """
+        Rewrites real workspace paths in text back to '/tmp/uploads' and '/tmp/outputs'.
+        """
+        return text.replace(self.uploads, UPLOAD_FOLDER).replace(self.outputs, OUTPUT_FOLDER)
+
+
+_default_workspace = None
+
+
+def default_workspace() -> Workspace:
+    """
+    Returns the shared '/tmp/uploads' + '/tmp/outputs' workspace used when tools
+    are called directly (scripts, debugging) without a per-request workspace.
+    """
+    global _default_workspace
+    if _default_workspace is None:
+        _default_workspace = Workspace(os.path.dirname(UPLOAD_FOLDER), UPLOAD_FOLDER, OUTPUT_FOLDER)
+    return _default_workspace
+
+
+@contextmanager
+def create_workspace():
+    """
+    Creates a fresh workspace under WORKSPACE_ROOT and removes it afterwards.
+    """
+    os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    root = tempfile.mkdtemp(prefix="request-", dir=WORKSPACE_ROOT)
+    try:
+        yield Workspace(root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
@@ -2,7 +2,7 @@
 # requires-python = ">=3.11"
 # dependencies = [
 #    "asyncio",
-#    "httpx",
+#    "httpx[http2]",
 #    "typing",
 #    "playwright",
 #    "pandas"
@@ -15,19 +15,25 @@
 import json
 import asyncio
 import os
-import httpx # type: ignore
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 
 from tools.scrape_webpage import scrape_webpage
 from tools.get_relevant_data import get_relevant_data
+from tools.extract_html_tables import extract_html_tables
 from tools.read_csv_file import read_csv_file
 from tools.save_to_csv import save_to_csv
 from tools.read_image_file import read_image_file
 from tools.convert_to_base64 import convert_to_base64
 from tools.read_pdf_file import read_pdf_file
+from tools.extract_pdf_tables import extract_pdf_tables
 from tools.read_text_file import read_text_file
 from tools.save_to_json import save_to_json
 from tools.execute_code import execute_code
+from tools.query_data import query_data
+from utils.workspace import Workspace, default_workspace
+from utils.event_loop import run_sync
+from utils.http_client import post_chat_completion
 
 # Tool definitions with name and description extracted dynamically
 
@@ -41,35 +47,11 @@ def load_tool_schemas(directory="tools/tool_jsons"):
 
 tools = load_tool_schemas()
 
-def run_worker(messages: list[dict[str, str]]) -> dict[str, Any]:
-    import httpx # type: ignore
-    import os
-    import json
-
-    response = httpx.post(
-        "https://aipipe.org/openai/v1/chat/completions",
-        headers={
-            "Authorization": f"Bearer {os.getenv('AIPIPE_TOKEN')}",
-            "Content-Type": "application/json",
-        },
-        json={
-            "model": "gpt-4o-mini",
-            "messages": messages,
-            "tools": tools,
-            "tool_choice": "auto",
-        },
-        timeout=60.0,
-    )
+# Bounded pool for blocking tools (PDF parsing, pandas, Gemini image descriptions, ...)
+TOOL_WORKERS = int(os.environ.get("TOOL_WORKERS", "8"))
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
 
-    try:
-        parsed = response.json()
-    except Exception as e:
-        print("JSON decode error:", e)
-        print("Raw response text:", response.text)
-        return {"content": f"Error: Invalid JSON response\n\n{response.text}"}
-
-    # --- Append tool calls to gpt_response.json ---
-    gpt_file = "/tmp/gpt_response.json"
+def append_tool_calls(gpt_file: str, tool_calls: list[dict]):
     existing_calls = []
     if os.path.exists(gpt_file):
         try:
@@ -77,6 +59,25 @@ def run_worker(messages: list[dict[str, str]]) -> dict[str, Any]:
                 existing_calls = json.load(f)
         except Exception:
             existing_calls = []
+    with open(gpt_file, "w", encoding="utf-8") as f:
+        json.dump(existing_calls + tool_calls, f, indent=2, ensure_ascii=False)
+
+async def run_worker_async(messages: list[dict[str, str]], workspace: Workspace = None) -> dict[str, Any]:
+    workspace = workspace or default_workspace()
+
+    response = await post_chat_completion({
+        "model": "gpt-4o-mini",
+        "messages": messages,
+        "tools": tools,
+        "tool_choice": "auto",
+    })
+
+    try:
+        parsed = response.json()
+    except Exception as e:
+        print("JSON decode error:", e)
+        print("Raw response text:", response.text)
+        return {"content": f"Error: Invalid JSON response\n\n{response.text}"}
 
     # Collect current tool calls
     current_tool_calls = []
@@ -85,16 +86,19 @@ def run_worker(messages: list[dict[str, str]]) -> dict[str, Any]:
         if "tool_calls" in message:
             current_tool_calls = message["tool_calls"]
 
-    # Append current calls
-    all_tool_calls = existing_calls + current_tool_calls
-    with open(gpt_file, "w", encoding="utf-8") as f:
-        json.dump(all_tool_calls, f, indent=2, ensure_ascii=False)
+    # --- Append tool calls to gpt_response.json ---
+    await asyncio.to_thread(append_tool_calls, os.path.join(workspace.root, "gpt_response.json"), current_tool_calls)
 
-    # --- Execute tool calls ---
-    tool_call_results = []
-    for tool_call in current_tool_calls:
-        result = execute_tool_call(tool_call)
-        tool_call_results.append(result)
+    # --- Execute tool calls concurrently; gather keeps them in tool_call order ---
+    outcomes = await asyncio.gather(
+        *(execute_tool_call_async(tool_call, workspace) for tool_call in current_tool_calls),
+        return_exceptions=True,
+    )
+    # Let every call finish before surfacing the first failure
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+    tool_call_results = list(outcomes)
 
     # Return both the message content and all tool results
     return {
@@ -103,52 +107,55 @@ def run_worker(messages: list[dict[str, str]]) -> dict[str, Any]:
         "tool_results": tool_call_results
     }
 
-def run_worker_followup(original_tool_call_msg, tool_outputs, planner_msg):
-    followup = httpx.post(
-        "https://aipipe.org/openai/v1/chat/completions",
-        headers={
-            "Authorization": f"Bearer {os.getenv('AIPIPE_TOKEN')}",
-            "Content-Type": "application/json",
-        },
-        json={
-            "model": "gpt-4o-mini",
-            "messages": [
-                planner_msg,
-                original_tool_call_msg,
-                *tool_outputs
-            ],
-        },
-        timeout=60.0,
-    )
-    with open("/tmp/followup_response.json", "w", encoding="utf-8") as f:
-        f.write(followup.text)
+def run_worker(messages: list[dict[str, str]], workspace: Workspace = None) -> dict[str, Any]:
+    return run_sync(run_worker_async(messages, workspace))
 
-    try:
-        return followup.json()["choices"][0]["message"].get("content")
-    except KeyError:
-        return followup.text
+def scrape_result_message(tool_call: dict, result: dict) -> dict:
+    if result.get("status") == "success":
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call["id"],
+            "content": result["message"]
+        }
+    else:
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call["id"],
+            "content": f"Error scraping page: {result.get('message')}"
+        }
 
-def execute_tool_call(tool_call: dict) -> dict:
+async def execute_tool_call_async(tool_call: dict, workspace: Workspace = None) -> dict:
+    """
+    Async tools run directly on the event loop; blocking tools run on the bounded
+    tool_executor so they never stall other conversations sharing the loop.
+    """
+    if tool_call["function"]["name"] == "scrape_webpage":
+        parameters = json.loads(tool_call["function"]["arguments"])
+        result = await scrape_webpage(**parameters, workspace=workspace or default_workspace())
+        return scrape_result_message(tool_call, result)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(tool_executor, execute_tool_call, tool_call, workspace)
+
+def execute_tool_call(tool_call: dict, workspace: Workspace = None) -> dict:
     function_name = tool_call["function"]["name"]
     parameters = json.loads(tool_call["function"]["arguments"])
+    workspace = workspace or default_workspace()
 
     if function_name == "scrape_webpage":
-        result = asyncio.run(scrape_webpage(**parameters))
-        if result.get("status") == "success":
-            return {
-                "role": "tool",
-                "tool_call_id": tool_call["id"],
-                "content": result["message"]
-            }
-        else:
-            return {
-                "role": "tool",
-                "tool_call_id": tool_call["id"],
-                "content": f"Error scraping page: {result.get('message')}"
-            }
+        result = run_sync(scrape_webpage(**parameters, workspace=workspace))
+        return scrape_result_message(tool_call, result)
 
     elif function_name == "get_relevant_data":
-        result = get_relevant_data(**parameters)
+        result = get_relevant_data(**parameters, workspace=workspace)
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call["id"],
+            "content": json.dumps(result)
+        }
+
+    elif function_name == "extract_html_tables":
+        result = extract_html_tables(**parameters, workspace=workspace)
         return {
             "role": "tool",
             "tool_call_id": tool_call["id"],
@@ -156,21 +163,21 @@ def execute_tool_call(tool_call: dict) -> dict:
         }
 
     elif function_name == "read_csv_file":
-        result = read_csv_file(**parameters)
+        result = read_csv_file(**parameters, workspace=workspace)
         return {
             "role": "tool",
             "tool_call_id": tool_call["id"],
             "content": (
-                f"Here are the first few rows of the CSV file. Do not interpret, summarize, or modify this. Just return it to the Planner as-is:\n\n{result}"
+                f"Here is the CSV file preview (or profile). Do not interpret, summarize, or modify this. Just return it to the Planner as-is:\n\n{result}"
             )
         }
 
     elif function_name == "save_to_csv":
-        result = save_to_csv(**parameters)
+        result = save_to_csv(**parameters, workspace=workspace)
         return {"role": "tool", "tool_call_id": tool_call["id"], "content": result}
     
     elif function_name == "read_image_file":
-        result = read_image_file(**parameters)
+        result = read_image_file(**parameters, workspace=workspace)
         return {
             "role": "tool",
             "tool_call_id": tool_call["id"],
@@ -180,7 +187,7 @@ def execute_tool_call(tool_call: dict) -> dict:
         }
     
     elif function_name == "convert_to_base64":
-        result = convert_to_base64(**parameters)
+        result = convert_to_base64(**parameters, workspace=workspace)
         return {
             "role": "tool",
             "tool_call_id": tool_call["id"],
@@ -190,7 +197,7 @@ def execute_tool_call(tool_call: dict) -> dict:
         }
 
     elif function_name == "read_text_file":
-        result = read_text_file(**parameters)
+        result = read_text_file(**parameters, workspace=workspace)
         return {
             "role": "tool",
             "tool_call_id": tool_call["id"],
@@ -198,7 +205,7 @@ def execute_tool_call(tool_call: dict) -> dict:
         }
 
     elif function_name == "read_pdf_file":
-        result = read_pdf_file(**parameters)
+        result = read_pdf_file(**parameters, workspace=workspace)
         return {
             "role": "tool",
             "tool_call_id": tool_call["id"],
@@ -206,17 +213,33 @@ def execute_tool_call(tool_call: dict) -> dict:
                 f"Here is the extracted text from the PDF. Do not interpret, summarize, or modify it. Just return it to the Planner as-is:\n\n{result}"
             )
         }
+
+    elif function_name == "extract_pdf_tables":
+        result = extract_pdf_tables(**parameters, workspace=workspace)
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call["id"],
+            "content": json.dumps(result)
+        }
     
     elif function_name == "save_to_json":
-        result = save_to_json(**parameters)
+        result = save_to_json(**parameters, workspace=workspace)
         return {
             "role": "tool",
             "tool_call_id": tool_call["id"],
             "content": result
         }
     
+    elif function_name == "query_data":
+        result = query_data(**parameters, workspace=workspace)
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call["id"],
+            "content": json.dumps(result, ensure_ascii=False)
+        }
+
     elif function_name == "execute_code":
-        result = execute_code(**parameters)
+        result = execute_code(**parameters, workspace=workspace)
         return {
             "role": "tool",
             "tool_call_id": tool_call["id"],